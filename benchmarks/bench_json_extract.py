@@ -0,0 +1,158 @@
+# ---------------------------------------------------------
+# extract_json benchmark — legacy regex vs balanced scanner
+#
+# Run from the repo root:
+#   python -m benchmarks.bench_json_extract [--repeat 20] [--json out.json]
+# ---------------------------------------------------------
+
+import argparse
+import json
+import os
+import re
+import time
+
+from utils.common import extract_json
+from utils.json_scanner import JSONStreamScanner
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus", "llm_json_outputs.jsonl")
+
+
+# ---------------------------------------------------------
+# LEGACY IMPLEMENTATION (baseline, kept verbatim for comparison)
+# ---------------------------------------------------------
+def legacy_extract_json(text: str):
+    raw_text = text.strip()
+    cleaned = raw_text.replace("```json", "").replace("```", "").strip()
+
+    try:
+        return json.loads(cleaned)
+    except:
+        pass
+
+    blocks = re.findall(r"\{[\s\S]*\}|\[[\s\S]*\]", cleaned)
+
+    if blocks:
+        largest = max(blocks, key=len)
+        largest = re.sub(r",(\s*[}\]])", r"\1", largest)
+        try:
+            return json.loads(largest)
+        except:
+            pass
+
+    raise ValueError("JSON extraction failed")
+
+
+# ---------------------------------------------------------
+# FIXTURES
+# ---------------------------------------------------------
+def load_corpus():
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_cases():
+    code = (
+        "```python\n"
+        "config = {\"a\": {\"b\": [1, 2, {\"c\": 3}]}}\n"
+        "print({k: v for k, v in config.items()})\n"
+        "```\n"
+    )
+    markdown = "# Dictionaries\n\n" + "Some prose about dicts.\n\n".join([code] * 200)
+
+    expected = {"markdown": markdown}
+
+    # name -> (raw output, expected value or None when extraction must fail)
+    return {
+        # ~26 KB markdown with hundreds of braces, wrapped in prose
+        "long-markdown-in-prose": (
+            "Here is your content:\n" + json.dumps(expected) + "\nHope it helps!",
+            expected
+        ),
+        # Same, with a trailing comma so the repair path runs
+        "long-markdown-trailing-comma": (
+            "```json\n{\"markdown\": " + json.dumps(markdown) + ",}\n```",
+            expected
+        ),
+        # Many openers and no closers: worst case for the greedy regex
+        "unclosed-braces": ("{ [ " * 3000 + "no json here", None),
+    }
+
+
+# ---------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------
+def time_call(fn, text, expected, repeat):
+    """Best wall time over repeat runs, and whether the result was correct."""
+    best = float("inf")
+    ok = True
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            got = fn(text)
+        except ValueError:
+            got = None
+        best = min(best, time.perf_counter() - start)
+        ok = got == expected
+    return best, ok
+
+
+def stream_first_object(text: str, chunk_size: int = 16):
+    scanner = JSONStreamScanner()
+    for i in range(0, len(text), chunk_size):
+        obj = scanner.feed(text[i:i + chunk_size])
+        if obj is not None:
+            return obj
+    obj = scanner.finish()
+    if obj is None:
+        raise ValueError("no JSON in stream")
+    return obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM JSON extraction")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    cases = {e["id"]: (e["raw"], e["expect"]) for e in load_corpus()}
+    cases.update(synthetic_cases())
+
+    results = []
+    print("====================================")
+    print("⏱  extract_json benchmark (best of %d)" % args.repeat)
+    print("====================================")
+    print(f"{'case':34} {'bytes':>8} {'legacy ms':>10} {'scanner ms':>11} {'stream ms':>10}")
+
+    for name, (text, expected) in cases.items():
+        legacy_s, legacy_ok = time_call(legacy_extract_json, text, expected, args.repeat)
+        new_s, new_ok = time_call(extract_json, text, expected, args.repeat)
+        stream_s, _ = time_call(stream_first_object, text, expected, args.repeat)
+
+        results.append({
+            "case": name,
+            "bytes": len(text),
+            "legacy_ms": legacy_s * 1000,
+            "legacy_ok": legacy_ok,
+            "scanner_ms": new_s * 1000,
+            "scanner_ok": new_ok,
+            "stream_ms": stream_s * 1000,
+        })
+        print(
+            f"{name:34} {len(text):>8} {legacy_s * 1000:>10.3f} "
+            f"{new_s * 1000:>11.3f} {stream_s * 1000:>10.3f}"
+            f"  {'' if legacy_ok else 'legacy✗'} {'' if new_ok else 'scanner✗'}"
+        )
+
+    legacy_correct = sum(r["legacy_ok"] for r in results)
+    new_correct = sum(r["scanner_ok"] for r in results)
+    print("------------------------------------")
+    print(f"✔ correct: legacy {legacy_correct}/{len(results)}, scanner {new_correct}/{len(results)}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"benchmark": "json_extract", "results": results}, f, indent=2)
+        print(f"📁 Results saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ---------------------------------------------------------
+# Learning-path planning benchmark: staged vs single-pass
+#
+# Runs the learning path graph end to end against a fake Ollama server
+# that generates at a fixed tokens/sec, and compares
+#   staged       seed topics -> outline -> submodules per topic
+#   single_pass  one streamed outline+submodules call
+#   single_pass (expand)  the model leaves submodules empty and topics
+#                are expanded while the outline is still streaming
+#                (the fake then also returns no submodules, so each
+#                topic falls back to one)
+#
+#   python -m benchmarks.bench_learning_path [--runs 5] [--tokens-per-s 60]
+# ---------------------------------------------------------
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+# The skeleton cache would turn every run after the first into a hit
+os.environ.setdefault("SKELETON_CACHE", "0")
+os.environ.setdefault("PRELOAD_ON_STARTUP", "0")
+
+from benchmarks.fake_ollama import start_fake_ollama
+
+PAYLOAD = {
+    "user_id": "bench",
+    "course_name": "Python",
+    "experience_level": "beginner",
+    "custom_topics": [],
+    "goal": "Build backend services",
+    "preferred_learning_style": "mixed",
+    "time_availability": {"per_day_hours": 3},
+}
+
+
+def run(graph, server, mode: str, runs: int):
+    latencies, calls = [], []
+    for _ in range(runs):
+        before = server.config.requests
+        start = time.perf_counter()
+        path = graph.invoke({**PAYLOAD, "planning_mode": mode})["learning_path"]
+        latencies.append(time.perf_counter() - start)
+        calls.append(server.config.requests - before)
+
+    return {
+        "mode": mode,
+        "runs": runs,
+        "mean_s": statistics.mean(latencies),
+        "min_s": min(latencies),
+        "llm_calls": statistics.mean(calls),
+        "topics": len(path["topics"]),
+        "submodules": path["progress"]["total_submodules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark learning-path planning modes")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds to first token")
+    parser.add_argument("--tokens-per-s", type=float, default=60.0)
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    full, url = start_fake_ollama(latency=args.latency, tokens_per_s=args.tokens_per_s)
+    sparse, sparse_url = start_fake_ollama(
+        latency=args.latency, tokens_per_s=args.tokens_per_s, array_sizes={"submodules": 0}
+    )
+
+    # The pool is built from OLLAMA_HOST on first use
+    os.environ["OLLAMA_HOST"] = url
+    from graphs.learning_path import learning_path_graph
+    from llm import pool
+
+    results = [
+        run(learning_path_graph, full, "staged", args.runs),
+        run(learning_path_graph, full, "single_pass", args.runs),
+    ]
+
+    pool._pool = pool.BackendPool([pool.Backend(sparse_url)])
+    expand = run(learning_path_graph, sparse, "single_pass", args.runs)
+    expand["mode"] = "single_pass (expand)"
+    results.append(expand)
+
+    print("====================================")
+    print("🧭 Learning path planning benchmark")
+    print(f"   {args.tokens_per_s} tok/s, {args.latency}s to first token, {args.runs} runs")
+    print("====================================")
+    for r in results:
+        print(
+            f"{r['mode']:22} mean {r['mean_s']:6.2f}s  min {r['min_s']:6.2f}s  "
+            f"LLM calls {r['llm_calls']:4.1f}  topics {r['topics']}  submodules {r['submodules']}"
+        )
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"benchmark": "learning_path_planning", "results": results}, f, indent=2)
+        print(f"📁 Results saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
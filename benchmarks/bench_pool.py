@@ -0,0 +1,98 @@
+# ---------------------------------------------------------
+# Backend pool benchmark against local fake Ollama servers
+#
+# Starts three fake backends (one with slow stragglers) plus one dead
+# host, then compares tail latency with and without hedged requests and
+# shows how least-outstanding routing spreads the load.
+#
+#   python -m benchmarks.bench_pool [--requests 300] [--concurrency 8]
+# ---------------------------------------------------------
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_ollama import start_fake_ollama
+from llm.pool import Backend, BackendPool
+
+MODEL = "qwen2.5:3b"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(pool: BackendPool, requests: int, concurrency: int, hedge: bool):
+    latencies = []
+    errors = 0
+
+    def one(_):
+        start = time.perf_counter()
+        pool.chat(
+            model=MODEL,
+            messages=[{"role": "user", "content": "hi"}],
+            hedge=hedge,
+        )
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        for fut in [ex.submit(one, i) for i in range(requests)]:
+            try:
+                latencies.append(fut.result())
+            except Exception:
+                errors += 1
+
+    return {
+        "hedge": hedge,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "pool": pool.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Ollama backend pool")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", dest="json_out", default=None)
+    args = parser.parse_args()
+
+    servers = [
+        start_fake_ollama(latency=0.05, jitter=0.01),
+        start_fake_ollama(latency=0.05, jitter=0.01),
+        start_fake_ollama(latency=0.05, jitter=0.01, straggler_rate=0.15, straggler_latency=0.8),
+    ]
+    hosts = [url for _, url in servers] + ["http://127.0.0.1:9"]  # nothing listens on :9
+
+    results = []
+    for hedge in (False, True):
+        pool = BackendPool([Backend(h) for h in hosts])
+        pool.check_health()
+        # Warm the latency window so hedging has a p95 to work with
+        run(pool, 40, args.concurrency, hedge=False)
+        results.append(run(pool, args.requests, args.concurrency, hedge=hedge))
+
+    print("====================================")
+    print("🦙 Backend pool benchmark")
+    print("====================================")
+    for r in results:
+        print(
+            f"hedge={str(r['hedge']):5}  p50 {r['p50_ms']:7.1f} ms  p95 {r['p95_ms']:7.1f} ms  "
+            f"p99 {r['p99_ms']:7.1f} ms  errors {r['errors']}  hedges {r['pool']['hedging']}"
+        )
+        for b in r["pool"]["backends"]:
+            print(f"   {b['host']:28} healthy={b['healthy']!s:5} requests={b['total_requests']}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"benchmark": "backend_pool", "results": results}, f, indent=2)
+        print(f"📁 Results saved to: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# ---------------------------------------------------------
+# Startup benchmark
+#
+# 1. Import-time report: `python -X importtime -c "import main"` in a
+#    fresh interpreter, aggregated per top-level package, so a new heavy
+#    import at module level shows up as a regression.
+# 2. Cold start: spawns uvicorn and measures the time until
+#    /health/live answers and until /health/ready returns 200.
+#
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --runs 5 --out startup.json
+#
+# Cold start warms up against whatever OLLAMA_HOST points to; model
+# preloading is turned off so the numbers don't depend on Ollama.
+# ---------------------------------------------------------
+
+import argparse
+import collections
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+
+# ---------------------------------------------------------
+# IMPORT TIME
+# ---------------------------------------------------------
+def import_time(module: str = "main") -> Dict[str, Any]:
+    """Wall time of importing `module` cold, and self time per package."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    wall_s = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    by_package: Dict[str, int] = collections.Counter()
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        cumulative.setdefault(name, int(cumulative_us))
+        if name == module:
+            total_us = int(cumulative_us)
+
+    return {
+        "module": module,
+        "process_wall_s": round(wall_s, 3),
+        "import_s": round(total_us / 1e6, 3),
+        "top_packages": [
+            {"package": pkg, "self_ms": round(us / 1000, 1)}
+            for pkg, us in by_package.most_common(15)
+        ],
+        "modules_loaded": len(cumulative),
+    }
+
+
+# ---------------------------------------------------------
+# COLD START
+# ---------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start(timeout_s: float = 60.0) -> Dict[str, Any]:
+    """Seconds from spawning uvicorn until live and until ready."""
+    port = _free_port()
+    env = {**os.environ, "PRELOAD_ON_STARTUP": "0", "TRACE_EXPORTER": "none"}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    result: Dict[str, Any] = {"live_s": None, "ready_s": None}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout_s and proc.poll() is None:
+                path = "/health/live" if result["live_s"] is None else "/health/ready"
+                try:
+                    status = client.get(path).status_code
+                except httpx.TransportError:
+                    status = None
+                if status == 200:
+                    key = "live_s" if path == "/health/live" else "ready_s"
+                    result[key] = round(time.perf_counter() - start, 3)
+                    if key == "ready_s":
+                        break
+                    continue
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return result
+
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"median": None, "min": None, "max": None}
+    return {"median": round(statistics.median(values), 3), "min": min(values), "max": max(values)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and cold start of the service")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("--out", default=os.path.join(RESULTS_DIR, "startup_results.json"))
+    args = parser.parse_args()
+
+    print("====================================")
+    print(f"🚀 Startup benchmark ({args.runs} runs)")
+    print("====================================")
+
+    imports = [import_time() for _ in range(args.runs)]
+    report: Dict[str, Any] = {
+        "benchmark": "startup",
+        "started_at": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "import_main_s": _summary([r["import_s"] for r in imports]),
+        # Package breakdown of the fastest run, the least disturbed by noise
+        "import_report": min(imports, key=lambda r: r["import_s"]),
+    }
+    print(f"📦 import main: {report['import_main_s']['median']}s (median)")
+    for row in report["import_report"]["top_packages"][:10]:
+        print(f"   {row['package']:30} {row['self_ms']:8.1f} ms")
+
+    if not args.skip_cold_start:
+        starts = [cold_start() for _ in range(args.runs)]
+        report["cold_start"] = {
+            "runs": starts,
+            "live_s": _summary([r["live_s"] for r in starts]),
+            "ready_s": _summary([r["ready_s"] for r in starts]),
+        }
+        print(f"💓 Live after:  {report['cold_start']['live_s']['median']}s (median)")
+        print(f"✅ Ready after: {report['cold_start']['ready_s']['median']}s (median)")
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# ---------------------------------------------------------
+# Fake Ollama HTTP server for local benchmarks
+#
+# Speaks enough of the Ollama API for the service and the ollama client:
+# /api/chat, /api/generate (streaming and not), /api/tags, /api/ps.
+# Replies to structured-output requests are generated from the JSON
+# schema in `format`, so graphs run end to end without a GPU.
+#
+# A share of structured replies can be malformed (prose around the JSON,
+# trailing commas, truncation) to exercise extraction and repair.
+#
+#   python -m benchmarks.fake_ollama --port 11500 --latency 0.3 --malformed-rate 0.1
+# ---------------------------------------------------------
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+DEFAULT_MODELS = ["gemma3:1b", "qwen2.5:3b", "gemma2:2b"]
+
+# Items generated per array field name (others get 3)
+ARRAY_SIZES = {"quiz": 5, "options": 4, "topics": 6}
+
+SAMPLE_MARKDOWN = (
+    "# Overview\n\n"
+    "- Key idea one\n"
+    "- Key idea two\n\n"
+    "## Example\n\n"
+    "```python\n"
+    "data = {\"a\": 1}\n"
+    "for key, value in data.items():\n"
+    "    print(key, value)\n"
+    "```\n"
+)
+
+
+# ---------------------------------------------------------
+# SCHEMA-DRIVEN SAMPLE OUTPUT
+# ---------------------------------------------------------
+def _resolve(schema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    ref = schema.get("$ref")
+    if ref and ref.startswith("#/$defs/"):
+        return root.get("$defs", {}).get(ref.split("/")[-1], {})
+    return schema
+
+
+def sample_from_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None,
+                       name: str = "", index: int = 0,
+                       sizes: Optional[Dict[str, int]] = None) -> Any:
+    root = root or schema
+    sizes = sizes or ARRAY_SIZES
+    schema = _resolve(schema, root)
+
+    if "anyOf" in schema:
+        return sample_from_schema(schema["anyOf"][0], root, name, index, sizes)
+    if "enum" in schema:
+        if name == "difficulty":
+            return ["easy", "easy", "medium", "medium", "hard"][index % 5]
+        return schema["enum"][index % len(schema["enum"])]
+    if "const" in schema:
+        return schema["const"]
+
+    kind = schema.get("type", "object")
+
+    if kind == "object":
+        return {
+            key: sample_from_schema(prop, root, key, index, sizes)
+            for key, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        count = sizes.get(name, 3)
+        return [sample_from_schema(schema.get("items", {}), root, name, i, sizes) for i in range(count)]
+    if kind == "integer":
+        return index + 1
+    if kind == "number":
+        return float(index + 1)
+    if kind == "boolean":
+        return True
+
+    # strings
+    if name == "markdown":
+        return SAMPLE_MARKDOWN
+    if name == "options":
+        return f"{'ABCD'[index % 4]}. Option {index + 1}"
+    if name == "question":
+        return f"Sample question {index + 1} about topic {random.randrange(10_000)}?"
+    if name in ("name", "title"):
+        return f"Sample {name} {index + 1}"
+    if name == "id":
+        return str(index + 1)
+    return f"sample {name or 'text'}"
+
+
+def fake_reply(fmt: Any, sizes: Optional[Dict[str, int]] = None) -> str:
+    if isinstance(fmt, dict):
+        return json.dumps(sample_from_schema(fmt, sizes=sizes))
+    if fmt == "json":
+        return json.dumps({"markdown": SAMPLE_MARKDOWN})
+    return "This is a fake Ollama reply."
+
+
+def malform(text: str) -> str:
+    """One of the ways small models break JSON, from repairable to not."""
+    kind = random.choice(("prose", "fence", "trailing_comma", "truncated"))
+    if kind == "prose":
+        return f"Sure! Here is the JSON you asked for:\n{text}\nLet me know if you need more."
+    if kind == "fence":
+        return f"```json\n{text}\n```"
+    if kind == "trailing_comma":
+        return text[:-1] + ",}" if text.endswith("}") else text
+    return text[: max(1, int(len(text) * random.uniform(0.3, 0.9)))]
+
+
+# ---------------------------------------------------------
+# SERVER
+# ---------------------------------------------------------
+class FakeOllamaConfig:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, models=None,
+                 straggler_rate: float = 0.0, straggler_latency: float = 0.0,
+                 tokens_per_s: float = 0.0, array_sizes: Optional[Dict[str, int]] = None,
+                 malformed_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        # Generation speed (~4 chars per token); 0 = instant after `latency`
+        self.tokens_per_s = tokens_per_s
+        self.array_sizes = {**ARRAY_SIZES, **(array_sizes or {})}
+        self.models = list(models or DEFAULT_MODELS)
+        # Occasional very slow replies, to exercise hedging
+        self.straggler_rate = straggler_rate
+        self.straggler_latency = straggler_latency
+        # Share of structured-output replies that are not valid JSON
+        self.malformed_rate = malformed_rate
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.malformed = 0
+
+    def delay(self) -> float:
+        if self.straggler_rate and random.random() < self.straggler_rate:
+            return self.straggler_latency
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def generation_time(self, text: str) -> float:
+        if not self.tokens_per_s:
+            return 0.0
+        return (len(text) / 4) / self.tokens_per_s
+
+
+def _make_handler(config: FakeOllamaConfig):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, body: Dict[str, Any], status: int = 200):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                return self._json({"models": [{"name": m, "model": m} for m in config.models]})
+            if self.path == "/api/ps":
+                return self._json({"models": [{"name": m, "model": m} for m in config.models]})
+            if self.path == "/api/version":
+                return self._json({"version": "0.0.0-fake"})
+            self._json({"error": "not found"}, 404)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            model = body.get("model", "")
+
+            if self.path not in ("/api/chat", "/api/generate"):
+                return self._json({"error": "not found"}, 404)
+            if model not in config.models:
+                return self._json({"error": f"model '{model}' not found"}, 404)
+
+            with config.lock:
+                config.requests += 1
+
+            delay = config.delay()
+            start = time.perf_counter()
+            time.sleep(delay)
+
+            text = fake_reply(body.get("format"), config.array_sizes)
+            if body.get("format") and config.malformed_rate and random.random() < config.malformed_rate:
+                text = malform(text)
+                with config.lock:
+                    config.malformed += 1
+            if self.path == "/api/chat" and (body.get("messages") or [{}])[-1].get("role") == "assistant":
+                text = ""  # continuation of a prefilled assistant message
+
+            streaming = body.get("stream") is not False
+            if not streaming:
+                time.sleep(config.generation_time(text))
+
+            stats = {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - start) * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": 10,
+                "prompt_eval_duration": 1_000_000,
+                "eval_count": max(1, len(text) // 4),
+                "eval_duration": max(1, int((config.generation_time(text) or delay) * 1e9)),
+            }
+            if self.path == "/api/chat":
+                stats["message"] = {"role": "assistant", "content": text}
+            else:
+                stats["response"] = text
+
+            if not streaming:
+                return self._json(stats)
+
+            # NDJSON stream: content in small chunks, stats on the last line
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_line(obj):
+                data = (json.dumps(obj) + "\n").encode()
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+
+            for i in range(0, len(text), 16):
+                piece = text[i:i + 16]
+                time.sleep(config.generation_time(piece))
+                chunk = {"model": model, "created_at": stats["created_at"], "done": False}
+                if self.path == "/api/chat":
+                    chunk["message"] = {"role": "assistant", "content": piece}
+                else:
+                    chunk["response"] = piece
+                write_line(chunk)
+
+            if self.path == "/api/chat":
+                stats["message"] = {"role": "assistant", "content": ""}
+            else:
+                stats["response"] = ""
+            write_line(stats)
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_fake_ollama(port: int = 0, **config_kwargs):
+    """Start a fake server in a daemon thread. Returns (server, base_url)."""
+    config = FakeOllamaConfig(**config_kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="0 = instant generation")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of broken JSON replies")
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS))
+    args = parser.parse_args()
+
+    server, url = start_fake_ollama(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_s=args.tokens_per_s,
+        malformed_rate=args.malformed_rate,
+        models=[m for m in args.models.split(",") if m],
+    )
+    print(f"🦙 Fake Ollama listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# ---------------------------------------------------------
+# Fake DuckDuckGo / YouTube lookups for local benchmarks
+#
+# Stand-ins with configurable latency and failure rate, installed in
+# place of the real lookups used by the content graph. They keep the
+# provider metrics and spans (instrument_provider), so benchmark runs
+# report provider time like production does.
+#
+#   from benchmarks.fake_providers import install_fake_providers
+#   install_fake_providers(latency=0.4, failure_rate=0.05)
+# ---------------------------------------------------------
+
+import random
+import time
+from typing import Dict, List
+
+from observability.instrument import instrument_provider
+
+
+class FakeProviderConfig:
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, failure_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        # Failed lookups return no results, as the real integrations do
+        self.failure_rate = failure_rate
+
+    def wait(self, timeout=None) -> bool:
+        """Sleep for one lookup; False when it fails or times out."""
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            return False
+        time.sleep(delay)
+        return random.random() >= self.failure_rate
+
+
+def _results(source: str, query: str, count: int) -> List[Dict[str, str]]:
+    slug = "-".join(query.lower().split())
+    if source == "duckduckgo":
+        return [
+            {"title": f"{query} ({i + 1})", "href": f"https://example.com/{slug}/{i + 1}",
+             "body": f"A tutorial about {query}."}
+            for i in range(count)
+        ]
+    return [
+        {"title": f"{query} video {i + 1}", "url": f"https://www.youtube.com/watch?v=fake{i + 1}",
+         "description": f"A video explaining {query}."}
+        for i in range(count)
+    ]
+
+
+def install_fake_providers(latency: float = 0.3, jitter: float = 0.1, failure_rate: float = 0.0):
+    """Replace the content graph's DuckDuckGo and YouTube lookups."""
+    import graphs.content_gen as content_gen
+
+    config = FakeProviderConfig(latency, jitter, failure_rate)
+
+    @instrument_provider("duckduckgo")
+    def fake_duckduckgo_search(query: str, max_results: int = 1, timeout: float = 10):
+        return _results("duckduckgo", query, max_results) if config.wait(timeout) else []
+
+    @instrument_provider("youtube")
+    def fake_fetch_youtube_videos(query: str, max_results: int = 10, timeout=None):
+        return _results("youtube", query, max_results) if config.wait(timeout) else []
+
+    content_gen.duckduckgo_search = fake_duckduckgo_search
+    content_gen.fetch_youtube_videos = fake_fetch_youtube_videos
+    return config
@@ -0,0 +1,349 @@
+# ---------------------------------------------------------
+# End-to-end load test for the /api/* endpoints
+#
+# Replays recorded payloads (JSONL lines of {"endpoint", "payload"})
+# against the service at a fixed concurrency and reports throughput,
+# p50/p95/p99 latency and error rates per endpoint to a JSON file.
+#
+# Without --target the service is started in-process, backed by the fake
+# Ollama server (configurable latency, tokens/sec, malformed-JSON rate)
+# and fake DuckDuckGo/YouTube lookups, with fresh stores in a temp dir.
+#
+#   python -m benchmarks.load_test run --concurrency 8 --requests 200 --out new.json
+#   python -m benchmarks.load_test run --target http://localhost:8000 --duration 60
+#   python -m benchmarks.load_test compare base.json new.json --max-regression 0.1
+#
+# `compare` exits with status 1 when the new run regresses: p95 latency
+# or throughput worse by more than --max-regression, or an error rate
+# up by more than --max-error-increase.
+# ---------------------------------------------------------
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PAYLOADS = os.path.join(os.path.dirname(__file__), "corpus", "load_payloads.jsonl")
+REQUEST_TIMEOUT_S = 300
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# ---------------------------------------------------------
+# PAYLOADS
+# ---------------------------------------------------------
+def load_payloads(path: str, endpoints: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not endpoints or entry["endpoint"] in endpoints:
+                entries.append(entry)
+    if not entries:
+        raise SystemExit(f"No payloads for {endpoints or 'any endpoint'} in {path}")
+    return entries
+
+
+def make_unique(entry: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """
+    A copy of the payload no earlier request has sent, so caches (question
+    banks, skeletons) and request coalescing don't short-circuit it.
+    """
+    payload = json.loads(json.dumps(entry["payload"]))
+    tag = f" #{n}"
+    if entry["endpoint"] == "/api/generate-learning-path":
+        payload["course_name"] += tag
+    for sm in payload.get("submodules", []):
+        sm["title"] += tag
+    for cell in payload.get("cells", []):
+        if cell.get("type") == "markdown":
+            cell["content"] += f"\n\nVariant{tag}\n"
+    return {"endpoint": entry["endpoint"], "payload": payload}
+
+
+# ---------------------------------------------------------
+# IN-PROCESS SERVICE
+# ---------------------------------------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_locally(args) -> str:
+    """Start fake Ollama + the service (fake providers) and return its URL."""
+    from benchmarks.fake_ollama import start_fake_ollama
+
+    ollama, ollama_url = start_fake_ollama(
+        latency=args.latency, jitter=args.jitter,
+        tokens_per_s=args.tokens_per_s, malformed_rate=args.malformed_rate
+    )
+    data_dir = tempfile.mkdtemp(prefix="cognigen-load-")
+    os.environ.update({
+        "OLLAMA_HOST": ollama_url,
+        "PRELOAD_ON_STARTUP": "0",
+        "TRACE_EXPORTER": os.environ.get("TRACE_EXPORTER", "none"),
+        "QUESTION_BANK_DB": os.path.join(data_dir, "question_bank.sqlite3"),
+        "SKELETON_CACHE_DB": os.path.join(data_dir, "skeleton_cache.sqlite3"),
+        "CHECKPOINT_DB": os.path.join(data_dir, "checkpoints.sqlite3"),
+        "ARTIFACT_DB": os.path.join(data_dir, "artifacts.sqlite3"),
+        "PROFILE_DIR": os.path.join(data_dir, "profiles"),
+    })
+
+    import uvicorn
+    from benchmarks.fake_providers import install_fake_providers
+    import main as service
+
+    # Per-request payload logging would dominate the run
+    logging.getLogger("cognigen-ai-service").setLevel(logging.WARNING)
+    install_fake_providers(latency=args.provider_latency, failure_rate=args.provider_failure_rate)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(service.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    args.fake_ollama = ollama
+    return f"http://127.0.0.1:{port}"
+
+
+# ---------------------------------------------------------
+# LOAD GENERATION
+# ---------------------------------------------------------
+def send(target: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        target + entry["endpoint"],
+        data=json.dumps(entry["payload"]).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    start = time.perf_counter()
+    status, error = 0, None
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_S) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status, error = e.code, f"HTTP {e.code}"
+    except Exception as e:
+        error = type(e).__name__
+    return {
+        "endpoint": entry["endpoint"],
+        "status": status,
+        "latency_s": time.perf_counter() - start,
+        "error": error,
+    }
+
+
+def generate_load(target: str, entries: List[Dict[str, Any]], concurrency: int,
+                  total: Optional[int], duration_s: Optional[float], unique: bool) -> Dict[str, Any]:
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples: List[Dict[str, Any]] = []
+    stop_at = time.perf_counter() + duration_s if duration_s else None
+
+    def worker():
+        while True:
+            with lock:
+                n = next(counter)
+            if total is not None and n >= total:
+                return
+            if stop_at is not None and time.perf_counter() >= stop_at:
+                return
+            entry = entries[n % len(entries)]
+            sample = send(target, make_unique(entry, n) if unique else entry)
+            with lock:
+                samples.append(sample)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load") as ex:
+        for _ in range(concurrency):
+            ex.submit(worker)
+    return {"samples": samples, "wall_s": time.perf_counter() - start}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Dict[str, Any]], wall_s: float) -> Dict[str, Any]:
+    latencies = sorted(s["latency_s"] * 1000 for s in samples)
+    errors = sum(1 for s in samples if s["error"])
+    statuses = defaultdict(int)
+    for s in samples:
+        statuses[str(s["status"] or s["error"])] += 1
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / wall_s, 3) if wall_s else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "status_codes": dict(statuses),
+    }
+
+
+def run(args):
+    endpoints = [e for e in (args.endpoints or "").split(",") if e]
+    entries = load_payloads(args.payloads, endpoints)
+    target = args.target.rstrip("/") if args.target else serve_locally(args)
+    total = args.requests
+    if total is None and not args.duration:
+        total = 100
+
+    print("====================================")
+    print("🚦 Load test")
+    print(f"   target {target}  concurrency {args.concurrency}  "
+          + (f"duration {args.duration}s" if total is None else f"requests {total}"))
+    print("====================================")
+
+    load = generate_load(target, entries, args.concurrency, total, args.duration, args.unique)
+    samples, wall_s = load["samples"], load["wall_s"]
+
+    by_endpoint = defaultdict(list)
+    for s in samples:
+        by_endpoint[s["endpoint"]].append(s)
+
+    result = {
+        "benchmark": "load_test",
+        "started_at": datetime.utcnow().isoformat(),
+        "config": {
+            "target": args.target or "in-process",
+            "concurrency": args.concurrency,
+            "requests": total,
+            "duration_s": args.duration,
+            "payloads": args.payloads,
+            "unique": args.unique,
+            **({} if args.target else {
+                "latency_s": args.latency,
+                "tokens_per_s": args.tokens_per_s,
+                "malformed_rate": args.malformed_rate,
+                "provider_latency_s": args.provider_latency,
+                "provider_failure_rate": args.provider_failure_rate,
+            }),
+        },
+        "wall_s": round(wall_s, 3),
+        "overall": summarize(samples, wall_s),
+        "endpoints": {ep: summarize(s, wall_s) for ep, s in sorted(by_endpoint.items())},
+    }
+    if getattr(args, "fake_ollama", None) is not None:
+        result["fake_ollama"] = {
+            "requests": args.fake_ollama.config.requests,
+            "malformed": args.fake_ollama.config.malformed,
+        }
+
+    for name, stats in [("overall", result["overall"]), *result["endpoints"].items()]:
+        print(
+            f"{name:32} {stats['requests']:5d} req  {stats['throughput_rps']:7.2f} rps  "
+            f"p50 {stats['p50_ms']:8.1f}  p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f} ms  "
+            f"errors {stats['error_rate']:.2%}"
+        )
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"📁 Results saved to: {args.out}")
+
+
+# ---------------------------------------------------------
+# COMPARISON
+# ---------------------------------------------------------
+def compare_results(base: Dict[str, Any], new: Dict[str, Any], max_regression: float,
+                    max_error_increase: float) -> List[str]:
+    """Human-readable regressions of `new` against `base` (empty = none)."""
+    regressions = []
+    sections = [("overall", base["overall"], new["overall"])] + [
+        (ep, base["endpoints"][ep], new["endpoints"][ep])
+        for ep in sorted(set(base["endpoints"]) & set(new["endpoints"]))
+    ]
+
+    print(f"{'':32} {'p95 ms':^19}  {'throughput rps':^19}  {'error rate':^16}")
+    for name, b, n in sections:
+        print(
+            f"{name:32} {b['p95_ms']:8.1f} → {n['p95_ms']:8.1f}  "
+            f"{b['throughput_rps']:8.2f} → {n['throughput_rps']:8.2f}  "
+            f"{b['error_rate']:6.2%} → {n['error_rate']:6.2%}"
+        )
+        if b["p95_ms"] and n["p95_ms"] > b["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {b['p95_ms']} → {n['p95_ms']} ms")
+        if b["throughput_rps"] and n["throughput_rps"] < b["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {b['throughput_rps']} → {n['throughput_rps']} rps")
+        if n["error_rate"] > b["error_rate"] + max_error_increase:
+            regressions.append(f"{name}: error rate {b['error_rate']:.2%} → {n['error_rate']:.2%}")
+    return regressions
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = compare_results(base, new, args.max_regression, args.max_error_increase)
+    if regressions:
+        print("❌ Regressions:")
+        for r in regressions:
+            print(f"   - {r}")
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the /api/* endpoints")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="generate load and write a result file")
+    r.add_argument("--target", default=None, help="service URL (default: start one in-process)")
+    r.add_argument("--payloads", default=DEFAULT_PAYLOADS, help="JSONL of {endpoint, payload}")
+    r.add_argument("--endpoints", default=None, help="comma-separated subset of endpoints")
+    r.add_argument("--concurrency", type=int, default=8)
+    r.add_argument("--requests", type=int, default=None, help="total requests (default 100)")
+    r.add_argument("--duration", type=float, default=None, help="seconds; instead of --requests")
+    r.add_argument("--unique", action="store_true", help="vary every payload to defeat caches")
+    r.add_argument("--out", default=os.path.join(RESULTS_DIR, "load_test_results.json"))
+    # In-process fakes
+    r.add_argument("--latency", type=float, default=0.2, help="fake Ollama seconds to first token")
+    r.add_argument("--jitter", type=float, default=0.05)
+    r.add_argument("--tokens-per-s", type=float, default=0.0)
+    r.add_argument("--malformed-rate", type=float, default=0.0)
+    r.add_argument("--provider-latency", type=float, default=0.3)
+    r.add_argument("--provider-failure-rate", type=float, default=0.0)
+
+    c = sub.add_parser("compare", help="compare two result files")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--max-regression", type=float, default=0.10)
+    c.add_argument("--max-error-increase", type=float, default=0.01)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# ---------------------------------------------------------
+# Micro-benchmarks for the pure-Python hot paths
+#
+# Fixed, seeded fixtures; each case is calibrated to run ~0.2s per round
+# and measured over several rounds, recording wall and CPU time per call.
+# The report is JSON so runs can be compared (and gated) later.
+#
+#   python -m benchmarks.microbench run [--only json] [--rounds 7] --out micro.json
+#   python -m benchmarks.microbench run --vector-sizes 1000,100000,1000000
+#   python -m benchmarks.microbench compare base.json micro.json --max-regression 0.15
+#
+# A 1M-item vector index of 1024-dim float32 needs ~4 GB of RAM, so the
+# default sizes stop at 100k.
+# ---------------------------------------------------------
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus", "llm_json_outputs.jsonl")
+TARGET_ROUND_S = 0.2
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# group -> setup(args) returning [(case name, callable, fixture description)]
+CASES: Dict[str, Callable[[argparse.Namespace], List[Tuple[str, Callable[[], Any], str]]]] = {}
+
+
+def case(group: str):
+    def register(setup):
+        CASES[group] = setup
+        return setup
+    return register
+
+
+# ---------------------------------------------------------
+# FIXTURES
+# ---------------------------------------------------------
+def _corpus() -> List[str]:
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line)["raw"] for line in f if line.strip()]
+
+
+def _topics(n: int) -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    return [
+        {"id": str(i), "name": f"Topic {i}", "order": i, "submodules": [],
+         "difficulty": rng.choice(["easy", "medium", "hard"])}
+        for i in range(1, n + 1)
+    ]
+
+
+def _questions(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "question": f"  Which statement about concept {i} is correct?  ",
+            "options": [f"{'ABCD'[j]}. Option {j} for {i}" if j % 2 else f"Option {j} for {i}" for j in range(5)],
+            "answer": "bcda"[i % 4],
+            "difficulty": ["easy", "medium", "hard"][i % 3],
+        }
+        for i in range(n)
+    ]
+
+
+def _cells(n: int) -> List[Dict[str, str]]:
+    cells = []
+    for i in range(n):
+        cells.append({"type": "markdown", "content": f"## Section {i}\n\n" + "Explanation of the idea. " * 40})
+        cells.append({"type": "code", "content": "for i in range(10):\n    print(i * i)\n"})
+        cells.append({"type": "resource", "content": [{"title": "Docs", "url": "https://example.com"}]})
+    return cells
+
+
+def _html(paragraphs: int) -> str:
+    body = "".join(
+        f"<div class='p'><h2>Heading {i}</h2>\n<p>Some <b>bold</b> and <a href='/x{i}'>linked</a>"
+        f" text,\n\n   with   odd   spacing.</p><script>var x{i}=1;</script></div>"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><title>Page</title></head><body>{body}</body></html>"
+
+
+# ---------------------------------------------------------
+# CASES
+# ---------------------------------------------------------
+@case("json")
+def json_cases(args):
+    from utils.common import extract_json, safe_parse_llm_json
+
+    corpus = _corpus()
+
+    def run_all(fn):
+        def run():
+            for raw in corpus:
+                try:
+                    fn(raw)
+                except ValueError:
+                    pass
+        return run
+
+    desc = f"all {len(corpus)} corpus outputs"
+    return [
+        ("extract_json", run_all(extract_json), desc),
+        ("safe_parse_llm_json", run_all(safe_parse_llm_json), desc),
+    ]
+
+
+@case("topics")
+def topic_cases(args):
+    from utils.common import limit_topics_by_difficulty, normalize_topic_fields
+
+    cases = []
+    for n in (10, 50):
+        topics = _topics(n)
+
+        def run(topics=topics):
+            # Both functions mutate the topics: fresh copies each call
+            fresh = [dict(t) for t in topics]
+            limit_topics_by_difficulty(normalize_topic_fields(fresh, "intermediate"), "intermediate")
+
+        cases.append((f"normalize+limit_topics[{n}]", run, f"{n} topics, copies included"))
+    return cases
+
+
+@case("quiz")
+def quiz_cases(args):
+    from graphs.quiz_gen import enforce_quality, extract_learning_text
+
+    questions = _questions(15)
+    cells = _cells(10)
+    return [
+        ("enforce_quality", lambda: enforce_quality(questions, limit=15), "15 questions"),
+        ("extract_learning_text", lambda: extract_learning_text(cells), f"{len(cells)} cells"),
+    ]
+
+
+@case("text")
+def text_cases(args):
+    from utils.text_cleaner import normalize
+
+    html = _html(200)
+    return [("text_cleaner.normalize", lambda: normalize(html), f"{len(html) // 1024} KB HTML page")]
+
+
+@case("docx")
+def docx_cases(args):
+    import docx
+
+    from vector_stores.ingestion.docx_parser import parse_docx
+
+    path = os.path.join(tempfile.mkdtemp(prefix="microbench-"), "resources.docx")
+    document = docx.Document()
+    for i in range(300):
+        document.add_paragraph(f"Resource {i} - https://example.com/r/{i} - Notes about resource {i}")
+        if i % 10 == 0:
+            document.add_paragraph("")
+    document.save(path)
+    return [("parse_docx", lambda: parse_docx(path), "300 resource paragraphs")]
+
+
+@case("vector")
+def vector_cases(args):
+    import faiss
+    import numpy as np
+
+    import vector_stores.faiss_vector as fv
+
+    fv.load_index()  # so the synthetic index below is not replaced on first search
+    dim = fv.embed("probe").shape[0]
+    rng = np.random.default_rng(0)
+    np.random.seed(0)  # embed() is still a random placeholder
+
+    cases = []
+    for size in [int(s) for s in args.vector_sizes.split(",") if s]:
+        index = faiss.IndexFlatIP(dim)
+        for start in range(0, size, 50_000):
+            block = rng.random((min(50_000, size - start), dim), dtype=np.float32)
+            block /= np.linalg.norm(block, axis=1, keepdims=True)
+            index.add(block)
+        metadata = [{"title": f"Item {i}", "url": f"https://example.com/{i}", "description": "d"} for i in range(size)]
+
+        def run(index=index, metadata=metadata):
+            # vector_search reads the module-level index and metadata
+            fv.index, fv.metadata = index, metadata
+            fv.vector_search("python list comprehension", k=5)
+
+        cases.append((f"vector_search[{size}]", run, f"flat index, {size} x {dim}"))
+    return cases
+
+
+# ---------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------
+def measure(fn: Callable[[], Any], rounds: int) -> Dict[str, Any]:
+    fn()  # warm up (imports, caches)
+
+    # Calls per round so one round takes about TARGET_ROUND_S
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_ROUND_S / 10 or number >= 1_000_000:
+            break
+        number *= 10
+    number = max(1, round(number * TARGET_ROUND_S / elapsed))
+
+    wall, cpu = [], []
+    for _ in range(rounds):
+        w0, c0 = time.perf_counter(), time.process_time()
+        for _ in range(number):
+            fn()
+        wall.append((time.perf_counter() - w0) / number * 1e6)
+        cpu.append((time.process_time() - c0) / number * 1e6)
+
+    return {
+        "calls_per_round": number,
+        "rounds": rounds,
+        "wall_us": {
+            "min": round(min(wall), 3),
+            "median": round(statistics.median(wall), 3),
+            "stdev": round(statistics.stdev(wall), 3) if rounds > 1 else 0.0,
+        },
+        "cpu_us": {
+            "min": round(min(cpu), 3),
+            "median": round(statistics.median(cpu), 3),
+        },
+    }
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def run(args):
+    groups = [g for g in CASES if not args.only or any(o in g for o in args.only.split(","))]
+
+    print("====================================")
+    print(f"🔬 Micro-benchmarks ({args.rounds} rounds)")
+    print("====================================")
+    print(f"{'case':34} {'wall µs (median)':>18} {'cpu µs':>12} {'stdev':>10}  fixture")
+
+    results = {}
+    for group in groups:
+        for name, fn, description in CASES[group](args):
+            stats = measure(fn, args.rounds)
+            results[name] = {"group": group, "fixture": description, **stats}
+            print(
+                f"{name:34} {stats['wall_us']['median']:18.1f} {stats['cpu_us']['median']:12.1f} "
+                f"{stats['wall_us']['stdev']:10.1f}  {description}"
+            )
+
+    report = {
+        "benchmark": "microbench",
+        "started_at": datetime.utcnow().isoformat(),
+        "environment": _environment(),
+        "results": results,
+    }
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Results saved to: {args.out}")
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)["results"]
+    with open(args.new) as f:
+        new = json.load(f)["results"]
+
+    metric = f"{args.metric}_us"
+    regressions = []
+    print(f"{'case':34} {'base µs':>12} {'new µs':>12} {'change':>8}")
+    for name in sorted(set(base) & set(new)):
+        b, n = base[name][metric]["median"], new[name][metric]["median"]
+        change = (n - b) / b if b else 0.0
+        flag = " ❌" if change > args.max_regression else ""
+        print(f"{name:34} {b:12.1f} {n:12.1f} {change:+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+
+    if regressions:
+        print(f"❌ Regressions over {args.max_regression:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("✅ No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for CPU hot paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run")
+    r.add_argument("--only", default=None, help=f"comma-separated groups: {', '.join(CASES)}")
+    r.add_argument("--rounds", type=int, default=7)
+    r.add_argument("--vector-sizes", default="1000,100000")
+    r.add_argument("--out", default=os.path.join(RESULTS_DIR, "microbench_results.json"))
+
+    c = sub.add_parser("compare")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--metric", choices=("wall", "cpu"), default="wall")
+    c.add_argument("--max-regression", type=float, default=0.15)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# ---------------------------------------------------------
+# cli/pregenerate.py — offline bulk pre-generation from a manifest
+# ---------------------------------------------------------
+# Generates learning paths, topic content and mini quizzes for the
+# courses and levels listed in a manifest, ahead of traffic. The results
+# go where the online endpoints look for them:
+#   - learning paths warm the skeleton cache, so learners of the same
+#     course, level and goal get their path without LLM calls. The path
+#     itself is kept in the artifact store by course, level and profile
+#     (not user) for the later stages and for resuming
+#   - topic content and mini quizzes go to the artifact store
+#     (stores/artifacts.py) under the keys the endpoints compute, and
+#     mini quizzes build their question banks
+#
+# Three stages, each run with --concurrency workers: paths, then content
+# for the topics of each path, then a quiz per generated submodule. LLM
+# calls are scheduled as `batch` priority. Work whose artifact is already
+# stored is skipped, so an interrupted run resumes where it stopped; a
+# stored path is regenerated when its skeleton is no longer cached.
+# Every finished unit is appended to the --progress log.
+#
+#   python -m cli.pregenerate cli/pregenerate_manifest.example.json
+#   python -m cli.pregenerate manifest.json --concurrency 32 --stages paths,content
+#   python -m cli.pregenerate manifest.json --dry-run
+#
+# The CLI has its own LLM scheduler: it doesn't yield to a running
+# server's requests. Run it off-peak, or cap it with --max-llm-concurrency.
+
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("cognigen-ai-service")
+
+PROGRESS_PATH = os.getenv("PREGENERATE_PROGRESS", "stores/data/pregenerate_progress.jsonl")
+USER_ID = "pregenerate"
+STAGES = ("paths", "content", "quizzes")
+
+DEFAULTS = {
+    "goal": "Build a solid foundation",
+    "preferred_learning_style": "mixed",
+    "time_availability": {"per_day_hours": 2},
+    "custom_topics": [],
+    "include_quiz": False,
+    "topics": [],
+    "max_topics": None,
+}
+
+
+# ---------------------------------------------------------
+# MANIFEST
+# ---------------------------------------------------------
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    One entry per (course, level). A manifest is
+      {"defaults": {...}, "courses": [{"course_name": ..., "levels": [...], ...}]}
+    with optional goal, preferred_learning_style, time_availability,
+    custom_topics (passed to path generation), topics (names to generate
+    content for; default all), max_topics and include_quiz per course.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    defaults = {**DEFAULTS, **manifest.get("defaults", {})}
+    entries = []
+    for course in manifest["courses"]:
+        course = {**defaults, **course}
+        for level in course.get("levels") or ["beginner"]:
+            entries.append({**course, "experience_level": level})
+    return entries
+
+
+def path_payload(entry: Dict[str, Any]) -> Dict[str, Any]:
+    from schemas import LearningPathCreateRequest
+
+    return LearningPathCreateRequest(
+        user_id=USER_ID,
+        course_name=entry["course_name"],
+        experience_level=entry["experience_level"],
+        custom_topics=entry["custom_topics"],
+        goal=entry["goal"],
+        preferred_learning_style=entry["preferred_learning_style"],
+        time_availability=entry["time_availability"],
+    ).dict(exclude={"deadline_ms"})
+
+
+def path_inputs(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Path artifact inputs: the profile of a course and level, not the user."""
+    return {k: v for k, v in payload.items() if k != "user_id"}
+
+
+def skeleton_cached(payload: Dict[str, Any]) -> bool:
+    from stores.skeleton_cache import skeleton_cache
+
+    return skeleton_cache.get(
+        payload["course_name"], payload["experience_level"], payload["goal"], count_hit=False
+    ) is not None
+
+
+def missing_topics(entry: Dict[str, Any], path: Dict[str, Any]) -> List[str]:
+    """Manifest `topics` that name no topic of the generated path."""
+    names = {t.get("name", "").lower() for t in path.get("topics", [])}
+    return [t for t in entry["topics"] if t.lower() not in names]
+
+
+def topic_payloads(entry: Dict[str, Any], path: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Topic content requests for the topics of a generated path."""
+    wanted = {t.lower() for t in entry["topics"]}
+    topics = [t for t in path.get("topics", []) if not wanted or t.get("name", "").lower() in wanted]
+    if entry["max_topics"]:
+        topics = topics[:entry["max_topics"]]
+    return [
+        {
+            "topic_id": str(topic.get("id")),
+            "topic_name": topic.get("name"),
+            "course_name": entry["course_name"],
+            "experience_level": entry["experience_level"],
+            "submodules": topic.get("submodules", []),
+            "include_quiz": bool(entry["include_quiz"]),
+        }
+        for topic in topics
+    ]
+
+
+# ---------------------------------------------------------
+# UNITS
+# ---------------------------------------------------------
+class Progress:
+    def __init__(self, path: str):
+        self.path = path
+        self.counts = {"generated": 0, "stored": 0, "failed": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, stage: str, unit: str, status: str, key: Optional[str], seconds: float,
+               error: Optional[str] = None):
+        self.counts[status] += 1
+        line = {
+            "at": datetime.utcnow().isoformat(), "stage": stage, "unit": unit, "status": status,
+            "key": key, "seconds": round(seconds, 2), **({"error": error} if error else {}),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        icon = {"generated": "✅", "stored": "📦", "failed": "❌"}[status]
+        logger.info(f"{icon} [{stage}] {unit} {status} ({seconds:.1f}s){': ' + error if error else ''}")
+
+
+def run_unit(stage: str, unit: str, kind: str, inputs: Dict[str, Any], generate: Callable[[], Any],
+             progress: Progress, force: bool,
+             still_warm: Optional[Callable[[], bool]] = None) -> Tuple[Optional[Any], bool]:
+    """
+    The artifact for `inputs`: the stored one, else freshly generated and
+    stored. A stored artifact is reused only while still_warm() holds,
+    when given. Returns (artifact or None on failure, generated).
+    """
+    from stores.artifacts import artifact_key, artifacts
+
+    key = artifact_key(kind, inputs)
+    start = time.perf_counter()
+    if not force:
+        stored = artifacts.get(key)
+        if stored is not None and (still_warm is None or still_warm()):
+            progress.record(stage, unit, "stored", key, 0.0)
+            return stored, False
+    try:
+        artifact = generate()
+        artifacts.put(key, kind, inputs, artifact, replace=True)
+    except Exception as e:
+        progress.record(stage, unit, "failed", key, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+        return None, False
+    progress.record(stage, unit, "generated", key, time.perf_counter() - start)
+    return artifact, True
+
+
+def generate_path(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from graphs.loader import get_graph
+
+    result = get_graph("learning_path").invoke(payload)
+    if not result.get("learning_path"):
+        raise ValueError("Graph returned no result")
+    return result["learning_path"]
+
+
+def generate_content(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from graphs.loader import get_graph
+
+    result = get_graph("topic_content").invoke(payload)
+    if not result.get("topic_content"):
+        raise ValueError("No content generated")
+    # Placeholder content or a missing inline quiz: failed, retried next run
+    if result.get("degradations"):
+        raise ValueError(f"Incomplete content: {', '.join(result['degradations'])}")
+    # Same layout as the endpoint stores
+    return {"topic_content": result["topic_content"], "summary": result.get("summary", {})}
+
+
+def generate_quiz(submodule_id: str, cells: List[Dict]) -> Dict[str, Any]:
+    from graphs.loader import get_graph
+
+    result = get_graph("mini_quiz").invoke({"submodule_id": submodule_id, "cells": cells})
+    if not result.get("quiz"):
+        raise ValueError("No quiz generated")
+    return {"quiz": result["quiz"]}
+
+
+# ---------------------------------------------------------
+# RUNNER
+# ---------------------------------------------------------
+def run_stage(name: str, jobs: List[Callable[[], Any]], concurrency: int) -> List[Any]:
+    """Run jobs on a thread pool as batch-priority LLM work; results in order."""
+    from llm.scheduler import llm_context
+
+    if not jobs:
+        return []
+    logger.info(f"⚙️ Stage {name}: {len(jobs)} units, {concurrency} workers")
+
+    def in_batch_context(job):
+        with llm_context("batch", USER_ID):
+            return job()
+
+    results: List[Any] = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"pregen-{name}") as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, in_batch_context, job): i
+            for i, job in enumerate(jobs)
+        }
+        try:
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        except KeyboardInterrupt:
+            # Units finished so far are stored; the next run resumes from them
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+def pregenerate(entries: List[Dict[str, Any]], stages: List[str], concurrency: int,
+                progress: Progress, force: bool = False) -> Dict[str, Any]:
+    from graphs.content_gen import generation_inputs
+    from stores.question_bank import content_hash
+
+    # Paths are always produced (or read back): the later stages need them.
+    # A stored path is generated again when its skeleton has left the
+    # cache; online requests are served from the skeleton, not the path.
+    def path_job(entry):
+        payload = path_payload(entry)
+        unit = f"{entry['course_name']}/{entry['experience_level']}"
+        return lambda: run_unit("paths", unit, "learning_path", path_inputs(payload),
+                                lambda: generate_path(payload), progress, force and "paths" in stages,
+                                still_warm=lambda: skeleton_cached(payload))[0]
+
+    paths = run_stage("paths", [path_job(e) for e in entries], concurrency)
+
+    topic_jobs = []
+    if "content" in stages or "quizzes" in stages:
+        for entry, path in zip(entries, paths):
+            if path is None:
+                continue  # already counted as failed
+            for name in missing_topics(entry, path):
+                unit = f"{entry['course_name']}/{entry['experience_level']}/{name}"
+                logger.warning(f"⚠️ [content] {unit}: not a topic of the generated path")
+                progress.record("content", unit, "failed", None, 0.0, "no such topic in the generated path")
+            for payload in topic_payloads(entry, path):
+                unit = f"{entry['course_name']}/{entry['experience_level']}/{payload['topic_name']}"
+                topic_jobs.append(lambda unit=unit, payload=payload: run_unit(
+                    "content", unit, "topic_content", generation_inputs(payload),
+                    lambda: generate_content(payload), progress, force and "content" in stages
+                )[0])
+    contents = run_stage("content", topic_jobs, concurrency)
+
+    quiz_jobs = []
+    if "quizzes" in stages:
+        for content in contents:
+            for sm in (content or {}).get("topic_content", []):
+                cells = sm.get("cells", [])
+                unit = f"quiz/{sm.get('title')}"
+                quiz_jobs.append(lambda unit=unit, sm=sm, cells=cells: run_unit(
+                    "quizzes", unit, "mini_quiz", {"content_hash": content_hash(cells)},
+                    lambda: generate_quiz(sm.get("id", ""), cells), progress, force
+                )[0])
+    run_stage("quizzes", quiz_jobs, concurrency)
+
+    return {
+        "paths": len(entries),
+        "topics": len(topic_jobs),
+        "quizzes": len(quiz_jobs),
+        **progress.counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate learning paths, content and quizzes")
+    parser.add_argument("manifest", help="JSON manifest of courses and levels")
+    parser.add_argument("--concurrency", type=int, default=16, help="units in flight per stage")
+    parser.add_argument("--max-llm-concurrency", type=int, default=0,
+                        help="LLM calls at once (0: backends x OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated: {', '.join(STAGES)}")
+    parser.add_argument("--progress", default=PROGRESS_PATH, help="JSONL log of finished units")
+    parser.add_argument("--force", action="store_true", help="regenerate artifacts that are already stored")
+    parser.add_argument("--dry-run", action="store_true", help="list the (course, level) entries and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    entries = load_manifest(args.manifest)
+    print("====================================")
+    print(f"🏭 Pre-generating {len(entries)} course/level entries ({', '.join(stages)})")
+    print("====================================")
+    if args.dry_run:
+        for entry in entries:
+            topics = ", ".join(entry["topics"]) or "all topics"
+            print(f"  {entry['course_name']} / {entry['experience_level']}: {topics}")
+        return
+
+    if args.max_llm_concurrency:
+        from llm.scheduler import scheduler
+        scheduler.max_concurrency = args.max_llm_concurrency
+
+    start = time.perf_counter()
+    try:
+        summary = pregenerate(entries, stages, args.concurrency, Progress(args.progress), args.force)
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted: run again to resume")
+        sys.exit(130)
+
+    summary["seconds"] = round(time.perf_counter() - start, 1)
+    print(f"📊 {json.dumps(summary)}")
+    print(f"📁 Progress log: {args.progress}")
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# cognigen-ai-service/graphs/checkpointing.py
+#
+# Resumable graph runs. Graphs compiled with the shared checkpointer save
+# their state after every node (and every parallel Send task). A request
+# carrying an Idempotency-Key runs under a thread id derived from that key
+# and its payload, so a retry after a failure resumes from the last
+# completed step instead of redoing every LLM call; a retry after success
+# returns the stored result.
+#
+# LLM calls are counted per node into the `llm_calls` state channel so a
+# resumed run can report how many calls it did not have to repeat.
+#
+# Every key leaves a thread behind, so runs not touched for
+# CHECKPOINT_TTL_S are pruned on startup and then at most once per
+# CHECKPOINT_PRUNE_INTERVAL_S.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from llm.client import count_llm_calls
+
+logger = logging.getLogger("cognigen-ai-service")
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "stores/data/checkpoints.sqlite3")
+# Retries come within minutes; a week covers clients that retry much later
+CHECKPOINT_TTL_S = float(os.getenv("CHECKPOINT_TTL_S", str(7 * 24 * 3600)))
+CHECKPOINT_PRUNE_INTERVAL_S = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_S", "3600"))
+
+_checkpointer = None
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """SQLite checkpointer shared by all resumable graphs."""
+    global _checkpointer
+    if _checkpointer is None:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        if os.path.dirname(CHECKPOINT_DB):
+            os.makedirs(os.path.dirname(CHECKPOINT_DB), exist_ok=True)
+        conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)
+        _checkpointer = SqliteSaver(conn)
+        with _checkpointer.cursor() as cur:
+            # When each thread was last run or replayed; the saver keeps no time
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_threads "
+                "(thread_id TEXT PRIMARY KEY, touched_at REAL NOT NULL)"
+            )
+        maybe_prune_checkpoints()
+    return _checkpointer
+
+
+# -------------------------------------------------------
+# PRUNING
+# -------------------------------------------------------
+def touch_thread(thread_id: str):
+    with get_checkpointer().cursor() as cur:
+        cur.execute(
+            "INSERT OR REPLACE INTO checkpoint_threads (thread_id, touched_at) VALUES (?, ?)",
+            (thread_id, time.time()),
+        )
+
+
+def prune_checkpoints(ttl_s: Optional[float] = None) -> int:
+    """
+    Delete the checkpoints and writes of threads not run or replayed
+    within `ttl_s` (default CHECKPOINT_TTL_S); threads from before
+    tracking count as expired. Returns the number of threads deleted.
+    """
+    saver = get_checkpointer()
+    cutoff = time.time() - (CHECKPOINT_TTL_S if ttl_s is None else ttl_s)
+    with saver.cursor() as cur:
+        cur.execute(
+            "SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id NOT IN "
+            "(SELECT thread_id FROM checkpoint_threads WHERE touched_at >= ?)",
+            (cutoff,),
+        )
+        stale = [row[0] for row in cur.fetchall()]
+
+    for thread_id in stale:
+        saver.delete_thread(thread_id)
+    with saver.cursor() as cur:
+        cur.execute("DELETE FROM checkpoint_threads WHERE touched_at < ?", (cutoff,))
+
+    if stale:
+        logger.info(f"🧹 Pruned {len(stale)} checkpointed runs older than {int(time.time() - cutoff)}s")
+    return len(stale)
+
+
+def maybe_prune_checkpoints():
+    """Prune if the last prune is older than CHECKPOINT_PRUNE_INTERVAL_S."""
+    global _last_prune
+    with _prune_lock:
+        if time.time() - _last_prune < CHECKPOINT_PRUNE_INTERVAL_S:
+            return
+        _last_prune = time.time()
+    try:
+        prune_checkpoints()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Checkpoint pruning failed: {e}")
+
+
+# -------------------------------------------------------
+# LLM CALL ACCOUNTING
+# -------------------------------------------------------
+def add_call_counts(left: Optional[Dict[str, int]], right: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """State reducer: per-node LLM call counts, summed."""
+    merged = dict(left or {})
+    for node, calls in (right or {}).items():
+        merged[node] = merged.get(node, 0) + calls
+    return merged
+
+
+def track_llm_calls(name: str, node: Callable) -> Callable:
+    """Wrap a graph node so the LLM calls it makes land in `llm_calls`."""
+
+    def wrapper(state):
+        with count_llm_calls() as counter:
+            result = node(state)
+
+        if result is None:
+            return result
+        result = dict(result)
+        # Nodes that return the whole state would re-add the running totals
+        result.pop("llm_calls", None)
+        if counter.calls:
+            result["llm_calls"] = {name: counter.calls}
+        return result
+
+    wrapper.__name__ = getattr(node, "__name__", name)
+    return wrapper
+
+
+def total_calls(values: Dict[str, Any]) -> int:
+    return sum((values.get("llm_calls") or {}).values())
+
+
+# -------------------------------------------------------
+# RESUMABLE INVOCATION
+# -------------------------------------------------------
+def thread_id_for(namespace: str, key: str, payload: Dict[str, Any]) -> str:
+    # The payload is part of the id: reusing a key for a different
+    # request starts a new run instead of returning the wrong result
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{namespace}:{key}:{digest}"
+
+
+def invoke_resumable(graph, payload: Dict[str, Any], key: str, namespace: str,
+                     extra_state: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run (or resume, or replay) `graph` for this idempotency key.
+    `extra_state` is added to the initial state but not to the run's
+    identity (e.g. the request deadline). Returns (final state, report)
+    where report has the LLM calls made by this attempt and the calls
+    saved by earlier attempts.
+    """
+    thread_id = thread_id_for(namespace, key, payload)
+    maybe_prune_checkpoints()
+    touch_thread(thread_id)
+
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = graph.get_state(config)
+
+    if snapshot.values and not snapshot.next:
+        saved = total_calls(snapshot.values)
+        logger.info(f"♻️ [{namespace}] Replaying completed run for key {key} ({saved} LLM calls saved)")
+        return snapshot.values, {"resumed": True, "llm_calls": 0, "llm_calls_saved": saved}
+
+    resumed = bool(snapshot.values)
+    with count_llm_calls() as counter:
+        result = graph.invoke(None if resumed else {**payload, **(extra_state or {})}, config)
+
+    saved = max(0, total_calls(result) - counter.calls)
+    if resumed:
+        logger.info(
+            f"♻️ [{namespace}] Resumed run for key {key} at {list(snapshot.next)}: "
+            f"{counter.calls} LLM calls made, {saved} saved"
+        )
+    return result, {"resumed": resumed, "llm_calls": counter.calls, "llm_calls_saved": saved}
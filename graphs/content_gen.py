@@ -1,16 +1,35 @@
+import contextvars
+import logging
 import operator
-import json
-from typing import TypedDict, List, Dict, Annotated
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import TypedDict, List, Dict, Annotated, Optional
 from datetime import datetime
-import ollama
 
 from langgraph.graph import StateGraph, END
 
-from utils.common import safe_parse_llm_json
+from graphs.checkpointing import add_call_counts, get_checkpointer, track_llm_calls
+from graphs.deadline import (
+    PROVIDER_TIMEOUT_S,
+    SINGLE_ATTEMPT_BELOW_S,
+    expired,
+    llm_plan,
+    merge_degradations,
+    provider_timeout,
+    time_left,
+)
+from graphs.quiz_gen import quiz_budget, quiz_for_cells
+from llm.structured import generate_structured, StructuredOutputError
+from observability.instrument import instrument_node
+from schemas import MarkdownContent
 from vector_stores.faiss_vector import vector_search
 from integrations.youtube_fetcher import fetch_youtube_videos
 from integrations.duckduckgo_search import duckduckgo_search
 
+logger = logging.getLogger("cognigen-ai-service")
+
+# Inline quizzes run here while resources are fetched for the same submodule
+_quiz_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="inline-quiz")
+
 
 # -------------------------------------------------------
 # STATE
@@ -20,6 +39,8 @@ class ContentState(TypedDict):
     topic_name: str
     course_name: str
     experience_level: str
+    include_quiz: bool
+    deadline: Optional[float]
 
     topic_content: Annotated[List[Dict], operator.add]
 
@@ -27,11 +48,16 @@ class ContentState(TypedDict):
     current_submodule: Dict
     vector_results: List[Dict]
 
+    llm_calls: Annotated[Dict[str, int], add_call_counts]
+    degradations: Annotated[List[str], merge_degradations]
+
 
 # -------------------------------------------------------
 # RESOURCE RESOLUTION (MULTI SOURCE)
 # -------------------------------------------------------
-def get_resource_url(title: str, vector_results: List[Dict], max_total: int = 5):
+def get_resource_url(title: str, vector_results: List[Dict], max_total: int = 5,
+                     timeout: Optional[float] = PROVIDER_TIMEOUT_S):
+    """Local, web and YouTube resources. timeout=None skips the web lookups."""
 
     resources = []
     seen_urls = set()
@@ -60,9 +86,12 @@ def get_resource_url(title: str, vector_results: List[Dict], max_total: int = 5)
             "local"
         )
 
+    if timeout is None:
+        return resources
+
     # 2️⃣ DuckDuckGo
     try:
-        ddg = duckduckgo_search(f"{title} tutorial", max_results=3)
+        ddg = duckduckgo_search(f"{title} tutorial", max_results=3, timeout=timeout)
         for item in ddg:
             if len(resources) >= max_total:
                 break
@@ -76,7 +105,7 @@ def get_resource_url(title: str, vector_results: List[Dict], max_total: int = 5)
 
     # 3️⃣ YouTube
     try:
-        yt = fetch_youtube_videos(f"{title} explained", max_results=3)
+        yt = fetch_youtube_videos(f"{title} explained", max_results=3, timeout=timeout)
         for item in yt:
             if len(resources) >= max_total:
                 break
@@ -118,7 +147,7 @@ def vector_search_node(state: ContentState):
 
 
 # -------------------------------------------------------
-# CONTENT GENERATION NODE (JSON SAFE + RETRY)
+# CONTENT GENERATION NODE (SCHEMA CONSTRAINED + REPAIR)
 # -------------------------------------------------------
 def content_generation_node(state: ContentState):
 
@@ -159,46 +188,84 @@ Requirements:
 - Keep everything inside markdown
 """
 
-    parsed = {}
-
-    # 🔁 Retry mechanism (2 attempts max)
-    for attempt in range(2):
-        response = ollama.chat(
-            model="qwen2.5:3b",
-            format="json", 
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            options={"temperature": 0.1}
-        )
-
-        raw = response["message"]["content"]
+    degradations = []
 
-        # Try strict JSON first
+    # Schema-constrained output; a bad reply costs one short repair
+    # request instead of a second full generation.
+    if expired(state):
+        parsed = {}
+        degradations.append("skipped_content_generation")
+    else:
+        model, max_repairs, degraded = llm_plan(state, "content")
+        degradations.extend(degraded)
         try:
-            parsed = json.loads(raw)
-        except:
-            try:
-                parsed = safe_parse_llm_json(raw)
-            except:
-                parsed = {}
-
-        if isinstance(parsed, dict) and parsed.get("markdown"):
-            break  
+            parsed = generate_structured(
+                "content_generation",
+                "content",
+                system_prompt,
+                user_prompt,
+                MarkdownContent,
+                options={"temperature": 0.1},
+                max_repairs=max_repairs,
+                model=model
+            )
+        except StructuredOutputError:
+            parsed = {}
 
     markdown = parsed.get("markdown", "")
-    if not isinstance(markdown, str) or not markdown.strip():
+    generated = isinstance(markdown, str) and bool(markdown.strip())
+    if not generated:
         markdown = f"# {sm['title']}\n\nContent generation failed. Please regenerate."
+        # Marks the placeholder, so it is never stored or served as content
+        if "skipped_content_generation" not in degradations:
+            degradations.append("content_generation_failed")
+
+    # -------------------------------------------------------
+    # INLINE QUIZ (overlaps with resource fetching)
+    # -------------------------------------------------------
+    quiz_future = None
+    left = time_left(state)
+    if state.get("include_quiz") and generated and left is not None and left < SINGLE_ATTEMPT_BELOW_S:
+        degradations.append("skipped_inline_quiz")
+    elif state.get("include_quiz") and generated:
+        # Same deadline plan as the mini quiz graph: degraded banks aren't stored
+        quiz_plan, degraded = quiz_budget(state)
+        degradations.extend(degraded)
+        quiz_future = _quiz_executor.submit(
+            contextvars.copy_context().run,
+            quiz_for_cells,
+            [{"type": "markdown", "content": markdown}],
+            quiz_plan,
+            not degraded
+        )
 
     # -------------------------------------------------------
     # RESOURCES
     # -------------------------------------------------------
+    timeout = provider_timeout(state)
+    if timeout is None:
+        degradations.append("skipped_web_resources")
+
     urls = get_resource_url(
         sm["title"],
-        state.get("vector_results", [])
+        state.get("vector_results", []),
+        timeout=timeout
     )
 
+    mini_quiz = []
+    if quiz_future is not None:
+        left = time_left(state)
+        try:
+            mini_quiz = quiz_future.result(timeout=None if left is None else max(0.0, left))
+        except FutureTimeout:
+            # Left to finish in the background: a stored bank serves the next request
+            logger.warning(f"⏱️ Inline quiz for {sm.get('id')} missed the deadline")
+            degradations.append("skipped_inline_quiz")
+        except Exception as e:
+            # The content is still useful; the quiz can be requested later
+            logger.warning(f"⚠️ Inline quiz failed for {sm.get('id')}: {e}")
+            degradations.append("inline_quiz_failed")
+
     # -------------------------------------------------------
     # BUILD CELLS
     # -------------------------------------------------------
@@ -220,12 +287,12 @@ Requirements:
         "title": sm.get("title"),
         "summary": sm.get("summary", ""),
         "cells": cells,
-        "miniQuiz": [],
+        "miniQuiz": mini_quiz,
         "contentVersion": 2,
         "generatedAt": datetime.utcnow().isoformat()
     }
 
-    return {"topic_content": [content_obj]}
+    return {"topic_content": [content_obj], "degradations": degradations}
 
 
 # -------------------------------------------------------
@@ -242,16 +309,43 @@ def should_continue(state: ContentState):
     return END
 
 
+# -------------------------------------------------------
+# REQUEST COALESCING
+# -------------------------------------------------------
+def generation_inputs(payload: Dict) -> Dict:
+    """
+    The request fields the generated content depends on. Topic and
+    submodule ids only label the output (each caller gets its own back),
+    and progress fields on the submodules do not affect generation. Nor
+    does their order: each is generated on its own, and learning styles
+    list the same submodules in different orders.
+    """
+    submodules = [
+        {"title": sm.get("title"), "summary": sm.get("summary", "")}
+        for sm in payload.get("submodules", [])
+    ]
+    return {
+        "course_name": payload.get("course_name"),
+        "experience_level": payload.get("experience_level"),
+        "include_quiz": bool(payload.get("include_quiz")),
+        "submodules": sorted(submodules, key=lambda sm: (str(sm["title"]), str(sm["summary"]))),
+    }
+
+
 # -------------------------------------------------------
 # BUILD GRAPH
 # -------------------------------------------------------
 builder = StateGraph(ContentState)
 
-builder.add_node("input", input_node)
-builder.add_node("pick_submodule", pick_submodule_node)
-builder.add_node("vector_search", vector_search_node)
-builder.add_node("generate", content_generation_node)
-builder.add_node("pop_submodule", pop_submodule_node)
+NODES = {
+    "input": input_node,
+    "pick_submodule": pick_submodule_node,
+    "vector_search": vector_search_node,
+    "generate": content_generation_node,
+    "pop_submodule": pop_submodule_node,
+}
+for name, node in NODES.items():
+    builder.add_node(name, instrument_node("topic_content", name, track_llm_calls(name, node)))
 
 builder.set_entry_point("input")
 
@@ -263,3 +357,8 @@ builder.add_edge("generate", "pop_submodule")
 builder.add_conditional_edges("pop_submodule", should_continue)
 
 content_graph = builder.compile()
+
+# Same graph, checkpointed: used for requests with an Idempotency-Key.
+# Each finished submodule is a checkpoint, so a retry resumes at the
+# submodule that failed.
+resumable_content_graph = builder.compile(checkpointer=get_checkpointer())
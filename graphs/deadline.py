@@ -0,0 +1,107 @@
+# cognigen-ai-service/graphs/deadline.py
+#
+# Per-request deadlines. The endpoint turns the client's budget into an
+# absolute `deadline` (epoch seconds) in graph state; nodes read the time
+# left and degrade step by step instead of working past the point where
+# the client has given up:
+#
+#   < SKIP_PROVIDERS_BELOW_S   skip DuckDuckGo / YouTube lookups
+#   < SINGLE_ATTEMPT_BELOW_S   no repair/continuation LLM requests
+#   < route latency budget     router picks a smaller, faster model
+#   < FEWER_SUBMODULES_BELOW_S one submodule per topic
+#   <= 0                       only the calls a response cannot do without
+#                              (the path outline); fallbacks for the rest
+#
+# Every degradation applied is recorded in state["degradations"].
+#
+# A run resumed from a checkpoint still carries the first attempt's
+# deadline in its state; request_deadline() overrides it with the retry's.
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm.router import router
+
+SKIP_PROVIDERS_BELOW_S = float(os.getenv("DEADLINE_SKIP_PROVIDERS_BELOW_S", "20"))
+SINGLE_ATTEMPT_BELOW_S = float(os.getenv("DEADLINE_SINGLE_ATTEMPT_BELOW_S", "15"))
+FEWER_SUBMODULES_BELOW_S = float(os.getenv("DEADLINE_FEWER_SUBMODULES_BELOW_S", "20"))
+
+# Upper bound on a single provider lookup (seconds)
+PROVIDER_TIMEOUT_S = float(os.getenv("PROVIDER_TIMEOUT_S", "10"))
+
+
+_deadline_override: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(deadline: Optional[float]):
+    """Deadline of the current request, taking precedence over graph state."""
+    token = _deadline_override.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline_override.reset(token)
+
+
+def deadline_after(budget_ms: Optional[int]) -> Optional[float]:
+    """Absolute deadline for a budget in milliseconds (None = no deadline)."""
+    if budget_ms is None or budget_ms <= 0:
+        return None
+    return time.time() + budget_ms / 1000
+
+
+def time_left(state: Dict[str, Any]) -> Optional[float]:
+    deadline = _deadline_override.get() or state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def expired(state: Dict[str, Any]) -> bool:
+    left = time_left(state)
+    return left is not None and left <= 0
+
+
+def merge_degradations(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """State reducer: degradations in the order first applied, no repeats."""
+    merged = list(left or [])
+    merged.extend(d for d in (right or []) if d not in merged)
+    return merged
+
+
+def llm_plan(state: Dict[str, Any], task: str, max_repairs: int = 1) -> Tuple[Optional[str], int, List[str]]:
+    """
+    (model, max_repairs, degradations) for one structured LLM call. The
+    model is None (router default) when the request has no deadline.
+    """
+    left = time_left(state)
+    if left is None:
+        return None, max_repairs, []
+
+    degradations = []
+    if max_repairs and left < SINGLE_ATTEMPT_BELOW_S:
+        max_repairs = 0
+        degradations.append("single_llm_attempt")
+
+    # The deadline only ever tightens the route's own latency budget
+    route_budget_s = router.latency_budget(task)
+    model = router.select(task, budget_s=max(0.0, min(left, route_budget_s)))
+    # Smaller than the route picks by itself (e.g. under load): the deadline's doing
+    if left < route_budget_s and model != router.select(task, record=False):
+        degradations.append(f"smaller_model:{task}")
+    return model, max_repairs, degradations
+
+
+def provider_timeout(state: Dict[str, Any]) -> Optional[float]:
+    """
+    Timeout for external lookups, or None when they should be skipped.
+    """
+    left = time_left(state)
+    if left is None:
+        return PROVIDER_TIMEOUT_S
+    if left < SKIP_PROVIDERS_BELOW_S:
+        return None
+    return min(PROVIDER_TIMEOUT_S, max(1.0, left - SKIP_PROVIDERS_BELOW_S))
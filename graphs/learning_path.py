@@ -1,21 +1,64 @@
 # cognigen-ai-service/graphs/learning_path.py
 
-from typing import TypedDict, List, Dict
+from typing import Annotated, TypedDict, List, Dict, Optional
+import contextvars
+import logging
+import os
 import uuid
-import ollama
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+
+from graphs.checkpointing import add_call_counts, get_checkpointer, track_llm_calls
+from observability.instrument import instrument_node
+from graphs.deadline import (
+    FEWER_SUBMODULES_BELOW_S,
+    SINGLE_ATTEMPT_BELOW_S,
+    expired,
+    llm_plan,
+    merge_degradations,
+    time_left,
+)
 
+from llm.structured import generate_structured, stream_structured, StructuredOutputError
+from schemas import TopicOutline, LearningPathOutline, SubmoduleOutline, LearningPathPlan
+from stores.skeleton_cache import skeleton_cache
 from utils.common import (
-    extract_json,
     normalize_topic_fields,
     limit_topics_by_difficulty
 )
 
+logger = logging.getLogger("cognigen-ai-service")
+
+SKELETON_CACHE_ENABLED = os.getenv("SKELETON_CACHE", "1") != "0"
+
+# "staged": seed topics, outline, then submodules per topic (4 stages)
+# "single_pass": one streamed call for the outline with submodules
+PLANNING_MODE = os.getenv("LEARNING_PATH_PLANNING_MODE", "staged")
+
+# Submodule expansion for streamed topics that came without submodules
+_expand_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="submodule-expand")
+
+# Topics kept for up to so many daily study hours (more hours -> longer path)
+MAX_TOPICS_BY_HOURS = ((1, 6), (2, 8))
+MAX_TOPICS = 10
+MAX_SUBMODULES = 2
+
+# Submodule title words that suit each learning style, shown first
+STYLE_KEYWORDS = {
+    "practical": ("example", "practice", "project", "exercise", "hands-on", "build", "lab", "application"),
+    "theory": ("introduction", "overview", "concept", "theory", "fundamental", "principle", "basics"),
+}
+
 
 # -------------------------------------------------------
 # STATE
 # -------------------------------------------------------
+def merge_dicts(left: Dict, right: Dict) -> Dict:
+    return {**(left or {}), **(right or {})}
+
+
 class LPState(TypedDict, total=False):
     user_id: str
     course_name: str
@@ -24,12 +67,27 @@ class LPState(TypedDict, total=False):
     goal: str
     preferred_learning_style: str
     time_availability: dict
+    planning_mode: str
+    deadline: Optional[float]
 
     student_profile: dict
     auto_topics: list
     llm_topics: dict
+    skeleton_hit: bool
     learning_path: dict
 
+    # Written by the per-topic submodule_gen tasks (topic index -> submodules)
+    submodules_by_topic: Annotated[Dict[str, List[Dict]], merge_dicts]
+    llm_calls: Annotated[Dict[str, int], add_call_counts]
+    degradations: Annotated[List[str], merge_degradations]
+    # Topics that got the placeholder submodule (fallback_submodules)
+    fallback_topics: Annotated[List[str], merge_degradations]
+
+
+def _degrade(state: LPState, degradations: List[str]):
+    if degradations:
+        state["degradations"] = merge_degradations(state.get("degradations"), degradations)
+
 
 def input_node(state: LPState):
     return state
@@ -70,9 +128,23 @@ Experience: {sp['experience_level']}
 Goal: {sp['goal']}
 """
 
-    raw = ollama.generate(model="gemma3:1b", prompt=system + user)["response"]
+    # Topic seeds are optional: topic_generation_node can plan without them
+    left = time_left(state)
+    if left is not None and left < SINGLE_ATTEMPT_BELOW_S:
+        _degrade(state, ["skipped_seed_topics"])
+        state["auto_topics"] = []
+        return state
+
+    model, max_repairs, degraded = llm_plan(state, "topic_planning")
+    _degrade(state, degraded)
+    try:
+        parsed = generate_structured(
+            "auto_topics", "topic_planning", system, user, TopicOutline,
+            max_repairs=max_repairs, model=model
+        )
+    except StructuredOutputError:
+        parsed = {}
 
-    parsed = extract_json(raw)
     state["auto_topics"] = parsed.get("topics", [])
     return state
 
@@ -120,8 +192,12 @@ Experience level: {sp['experience_level']}
 Core topics: {base_topics}
 """
 
-    raw = ollama.generate(model="gemma3:1b", prompt=system + user)["response"]
-    parsed = extract_json(raw)
+    model, max_repairs, degraded = llm_plan(state, "topic_planning")
+    _degrade(state, degraded)
+    parsed = generate_structured(
+        "topic_gen", "topic_planning", system, user, LearningPathOutline,
+        max_repairs=max_repairs, model=model
+    )
 
     topics = normalize_topic_fields(parsed.get("topics", []), sp["experience_level"])
     topics = limit_topics_by_difficulty(topics, sp["experience_level"])
@@ -136,12 +212,122 @@ Core topics: {base_topics}
 
 
 
-def submodule_gen_node(state: LPState):
+def single_pass_plan_node(state: LPState):
+    """
+    Title, description, topics and their submodules in one streamed
+    generation. Topics are handled as they stream in: one the model left
+    without submodules is expanded right away, while later topics are
+    still being generated.
+    """
     sp = state["student_profile"]
-    topics = state["llm_topics"]["topics"]
+
+    system = """
+Return only JSON:
+{
+  "title": "string",
+  "description": "string",
+  "topics": [
+    {
+      "id": "string",
+      "name": "string",
+      "order": number,
+      "submodules": [ { "title": "string", "summary": "string" } ]
+    }
+  ]
+}
+"""
+
+    user = f"""
+Generate a structured learning path for course: {sp['course_name']}
+Experience level: {sp['experience_level']}
+Goal: {sp['goal']}
+Start with foundational topics. Give every topic up to {MAX_SUBMODULES} submodules.
+"""
+
+    expansions = {}
+
+    def expand(name: str):
+        if name not in expansions and len(expansions) < MAX_TOPICS:
+            budget, degraded = submodule_budget(state)
+            _degrade(state, degraded)
+            if budget is None:
+                return
+            # Copied context: the calls count towards this node
+            expansions[name] = _expand_executor.submit(
+                contextvars.copy_context().run, generate_submodules, name, sp, budget
+            )
+
+    def on_topic(topic: Dict):
+        name = topic.get("name")
+        if isinstance(name, str) and name and not topic.get("submodules"):
+            expand(name)
+
+    model, max_repairs, degraded = llm_plan(state, "path_planning")
+    _degrade(state, degraded)
+    parsed = stream_structured(
+        "single_pass_plan", "path_planning", system, user, LearningPathPlan, on_topic,
+        max_repairs=max_repairs, model=model
+    )
+
+    topics = normalize_topic_fields(parsed.get("topics", []), sp["experience_level"])
+    topics = limit_topics_by_difficulty(topics, sp["experience_level"])
+
+    # Topics that only came out right after repair are expanded now
+    for topic in topics:
+        if not topic["submodules"]:
+            expand(topic["name"])
 
     for topic in topics:
-        system = """
+        submods = topic["submodules"][:MAX_SUBMODULES]
+        if not submods:
+            future = expansions.get(topic["name"])
+            submods = future.result() if future else fallback_submodules(topic["name"])
+        if is_fallback(submods):
+            state["fallback_topics"] = merge_degradations(state.get("fallback_topics"), [topic["name"]])
+        topic["submodules"] = enrich_submodules(submods)
+
+    state["llm_topics"] = {
+        "title": parsed.get("title", f"{sp['course_name']} Learning Path"),
+        "description": parsed.get("description", ""),
+        "topics": topics,
+    }
+    return state
+
+
+def submodule_budget(state: Dict):
+    """
+    (generate_submodules kwargs, degradations) under the request deadline.
+    The kwargs are None once the deadline has passed: no LLM call.
+    """
+    if expired(state):
+        return None, ["skipped_submodule_generation"]
+
+    model, max_repairs, degraded = llm_plan(state, "submodule_planning")
+    limit = MAX_SUBMODULES
+    left = time_left(state)
+    if left is not None and left < FEWER_SUBMODULES_BELOW_S:
+        limit = 1
+        degraded.append("fewer_submodules")
+    return {"limit": limit, "model": model, "max_repairs": max_repairs}, degraded
+
+
+def fallback_submodules(topic_name: str) -> List[Dict]:
+    """Placeholder when no submodules could be generated: the topic itself."""
+    return [{"title": topic_name, "summary": "", "fallback": True}]
+
+
+def is_fallback(submods: List[Dict]) -> bool:
+    return any(sm.get("fallback") for sm in submods)
+
+
+def generate_submodules(topic_name: str, sp: dict, budget: Optional[Dict] = None) -> List[Dict]:
+    """
+    Title/summary pairs for one topic (at most MAX_SUBMODULES, never empty).
+    `budget` holds the limit/model/max_repairs from submodule_budget().
+    """
+    budget = budget or {}
+
+    system = """
 Return only JSON:
 {
   "submodules": [
@@ -149,35 +335,211 @@ Return only JSON:
   ]
 }
 """
-        user = f"""
-Generate up to 4 high-quality submodules for topic: {topic['name']}
+    user = f"""
+Generate up to 4 high-quality submodules for topic: {topic_name}
 Course: {sp['course_name']}
 Experience level: {sp['experience_level']}
 """
 
-        raw = ollama.generate(model="gemma3:1b", prompt=system + user)["response"]
-        parsed = extract_json(raw)
+    try:
+        parsed = generate_structured(
+            "submodule_gen", "submodule_planning", system, user, SubmoduleOutline,
+            max_repairs=budget.get("max_repairs", 1), model=budget.get("model")
+        )
+    except StructuredOutputError:
+        parsed = {}
 
-        submods = parsed.get("submodules", [])[:2]
+    submods = parsed.get("submodules", [])[:budget.get("limit", MAX_SUBMODULES)]
+
+    return submods or fallback_submodules(topic_name)
+
+
+def fan_out_submodules(state: LPState):
+    """One submodule_gen task per topic; each is checkpointed on its own."""
+    topics = state["llm_topics"]["topics"]
+    if not topics:
+        return "attach_submodules"
+    return [
+        Send("submodule_gen", {
+            "student_profile": state["student_profile"],
+            "deadline": state.get("deadline"),
+            "topic_index": i,
+            "topic_name": topic["name"],
+        })
+        for i, topic in enumerate(topics)
+    ]
+
+
+def submodule_gen_node(task: Dict):
+    """One topic's submodules (a Send task: `task` is not the full state)."""
+    budget, degradations = submodule_budget(task)
+    if budget is None:
+        submods = fallback_submodules(task["topic_name"])
+    else:
+        submods = generate_submodules(task["topic_name"], task["student_profile"], budget)
+    return {
+        "submodules_by_topic": {str(task["topic_index"]): enrich_submodules(submods)},
+        "degradations": degradations,
+        "fallback_topics": [task["topic_name"]] if is_fallback(submods) else [],
+    }
 
-        if not submods:
-            submods = [{"title": topic["name"], "summary": ""}]
 
-        enriched = []
+def attach_submodules_node(state: LPState):
+    by_topic = state.get("submodules_by_topic") or {}
+    for i, topic in enumerate(state["llm_topics"]["topics"]):
+        topic["submodules"] = by_topic.get(str(i), [])
+    return state
+
+
+def enrich_submodules(submods: List[Dict]) -> List[Dict]:
+    """Submodule records (new ids, timestamps) from title/summary pairs."""
+    enriched = []
+    for i, sm in enumerate(submods, start=1):
+        enriched.append({
+            "id": str(uuid.uuid4()),
+            "title": sm["title"],
+            "summary": sm.get("summary", ""),
+            "order": i,
+            "createdAt": datetime.utcnow().isoformat(),
+            "updatedAt": datetime.utcnow().isoformat(),
+            "completed": False,
+            "content": {}
+        })
+    return enriched
+
+
+# -------------------------------------------------------
+# SKELETON CACHE
+# -------------------------------------------------------
+def _use_skeleton_cache(sp: dict) -> bool:
+    # Custom topics define the path themselves; nothing to share
+    return SKELETON_CACHE_ENABLED and not sp["custom_topics"]
+
+
+def skeleton_lookup_node(state: LPState):
+    sp = state["student_profile"]
+    state["skeleton_hit"] = False
+
+    if not _use_skeleton_cache(sp):
+        return state
+
+    try:
+        skeleton = skeleton_cache.get(sp["course_name"], sp["experience_level"], sp["goal"])
+    except Exception as e:
+        logger.warning(f"⚠️ Skeleton cache lookup failed: {e}")
+        skeleton = None
+
+    if skeleton is None:
+        return state
+
+    topics = normalize_topic_fields(
+        [
+            {
+                "id": t["id"],
+                "name": t["name"],
+                "order": t["order"],
+                "submodules": enrich_submodules(t["submodules"]),
+            }
+            for t in skeleton["topics"]
+        ],
+        sp["experience_level"]
+    )
+
+    state["llm_topics"] = {
+        "title": skeleton["title"],
+        "description": skeleton["description"],
+        "topics": topics,
+    }
+    state["skeleton_hit"] = True
+    logger.info(f"🦴 Reusing cached skeleton for {sp['course_name']} ({sp['experience_level']})")
+    return state
+
+
+def route_after_lookup(state: LPState):
+    if state.get("skeleton_hit"):
+        return "personalize"
+    if (state.get("planning_mode") or PLANNING_MODE) == "single_pass" and not state["student_profile"]["custom_topics"]:
+        return "single_pass_plan"
+    return "auto_topics"
+
+
+def skeleton_store_node(state: LPState):
+    sp = state["student_profile"]
+    if not _use_skeleton_cache(sp):
+        return state
+
+    # A path cut short by the deadline or by failed generations is fine
+    # for this learner, but must not be served to everyone after them
+    if state.get("degradations") or state.get("fallback_topics"):
+        reasons = (state.get("degradations") or []) + [
+            f"fallback_submodules:{name}" for name in state.get("fallback_topics") or []
+        ]
+        logger.info(f"🦴 Not caching the skeleton for {sp['course_name']}: {', '.join(reasons)}")
+        return state
+
+    llm = state["llm_topics"]
+    skeleton = {
+        "title": llm["title"],
+        "description": llm["description"],
+        "topics": [
+            {
+                "id": t["id"],
+                "name": t["name"],
+                "order": t["order"],
+                "submodules": [
+                    {"title": sm["title"], "summary": sm.get("summary", "")}
+                    for sm in t["submodules"]
+                ],
+            }
+            for t in llm["topics"]
+        ],
+    }
+
+    try:
+        skeleton_cache.put(sp["course_name"], sp["experience_level"], sp["goal"], skeleton)
+    except Exception as e:
+        logger.warning(f"⚠️ Skeleton cache store failed: {e}")
+    return state
+
+
+def _style_rank(title: str, style: str) -> int:
+    keywords = STYLE_KEYWORDS.get(style)
+    if not keywords:
+        return 0
+    return 0 if any(k in title.lower() for k in keywords) else 1
+
+
+def topic_cap(sp: dict) -> Optional[int]:
+    """Most topics for the learner's daily study time; None for custom topics."""
+    # Custom topics are kept exactly as the learner chose them
+    if sp.get("custom_topics"):
+        return None
+    try:
+        hours = float((sp.get("time_availability") or {}).get("per_day_hours"))
+    except (TypeError, ValueError):
+        return MAX_TOPICS
+    return next((cap for limit, cap in MAX_TOPICS_BY_HOURS if hours <= limit), MAX_TOPICS)
+
+
+def order_by_style(topics: List[Dict], style: Optional[str]) -> List[Dict]:
+    """Submodules that suit the learning style first, renumbered in place."""
+    for topic in topics:
+        submods = sorted(topic["submodules"], key=lambda sm: _style_rank(sm["title"], style))
         for i, sm in enumerate(submods, start=1):
-            enriched.append({
-                "id": str(uuid.uuid4()),
-                "title": sm["title"],
-                "summary": sm.get("summary", ""),
-                "order": i,
-                "createdAt": datetime.utcnow().isoformat(),
-                "updatedAt": datetime.utcnow().isoformat(),
-                "completed": False,
-                "content": {}
-            })
+            sm["order"] = i
+        topic["submodules"] = submods
+    return topics
 
-        topic["submodules"] = enriched
 
+def personalize_node(state: LPState):
+    """
+    Cheap, LLM-free tailoring of the planned topics: fewer topics for
+    less daily study time, submodules ordered by learning style.
+    """
+    sp = state["student_profile"]
+    topics = state["llm_topics"]["topics"][:topic_cap(sp)]
+
+    state["llm_topics"]["topics"] = order_by_style(topics, sp.get("preferred_learning_style"))
     return state
 
 
@@ -215,20 +577,37 @@ def learning_path_builder_node(state: LPState):
 # -------------------------------------------------------
 builder = StateGraph(LPState)
 
-builder.add_node("input", input_node)
-builder.add_node("profile", profile_node)
-builder.add_node("auto_topics", auto_topic_gen_node)
-builder.add_node("topic_gen", topic_generation_node)
-builder.add_node("submodule_gen", submodule_gen_node)
-builder.add_node("builder", learning_path_builder_node)
+NODES = {
+    "input": input_node,
+    "profile": profile_node,
+    "skeleton_lookup": skeleton_lookup_node,
+    "auto_topics": auto_topic_gen_node,
+    "topic_gen": topic_generation_node,
+    "submodule_gen": submodule_gen_node,
+    "attach_submodules": attach_submodules_node,
+    "single_pass_plan": single_pass_plan_node,
+    "skeleton_store": skeleton_store_node,
+    "personalize": personalize_node,
+    "builder": learning_path_builder_node,
+}
+for name, node in NODES.items():
+    builder.add_node(name, instrument_node("learning_path", name, track_llm_calls(name, node)))
 
 builder.set_entry_point("input")
 
 builder.add_edge("input", "profile")
-builder.add_edge("profile", "auto_topics")
+builder.add_edge("profile", "skeleton_lookup")
+builder.add_conditional_edges("skeleton_lookup", route_after_lookup)
 builder.add_edge("auto_topics", "topic_gen")
-builder.add_edge("topic_gen", "submodule_gen")
-builder.add_edge("submodule_gen", "builder")
+builder.add_conditional_edges("topic_gen", fan_out_submodules, ["submodule_gen", "attach_submodules"])
+builder.add_edge("submodule_gen", "attach_submodules")
+builder.add_edge("attach_submodules", "skeleton_store")
+builder.add_edge("single_pass_plan", "skeleton_store")
+builder.add_edge("skeleton_store", "personalize")
+builder.add_edge("personalize", "builder")
 builder.add_edge("builder", END)
 
 learning_path_graph = builder.compile()
+
+# Same graph, checkpointed: used for requests with an Idempotency-Key
+resumable_learning_path_graph = builder.compile(checkpointer=get_checkpointer())
@@ -0,0 +1,228 @@
+# cognigen-ai-service/graphs/learning_path_update.py
+#
+# Incremental update of an existing learning path after a profile edit.
+# Topics are matched by normalized name: matched topics keep their ids,
+# submodules and progress; only added topics cost an LLM call. The
+# outline itself is re-planned only when the experience level changes or
+# the path switches between custom and generated topics, or when a new
+# daily study time allows a different number of topics. Study time and
+# learning style are applied as in graphs/learning_path.py (topic cap,
+# submodule order). With a request deadline the LLM calls degrade as in
+# graphs/learning_path.py.
+
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Annotated, TypedDict, List, Optional
+
+from langgraph.graph import StateGraph, END
+
+from graphs.deadline import merge_degradations
+from graphs.learning_path import (
+    auto_topic_gen_node,
+    topic_generation_node,
+    generate_submodules,
+    enrich_submodules,
+    fallback_submodules,
+    submodule_budget,
+    topic_cap,
+    order_by_style,
+)
+from observability.instrument import instrument_node
+
+logger = logging.getLogger("cognigen-ai-service")
+
+PROFILE_FIELDS = (
+    "experience_level",
+    "custom_topics",
+    "goal",
+    "preferred_learning_style",
+    "time_availability",
+)
+
+
+# -------------------------------------------------------
+# STATE
+# -------------------------------------------------------
+class LPUpdateState(TypedDict, total=False):
+    learning_path: dict
+    changes: dict
+
+    student_profile: dict
+    llm_topics: dict
+    replanned: bool
+    topics: list
+    diff: dict
+    deadline: Optional[float]
+    degradations: Annotated[List[str], merge_degradations]
+
+
+def normalize_topic_name(name: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9+#]+", (name or "").lower()))
+
+
+# -------------------------------------------------------
+# NODES
+# -------------------------------------------------------
+def merge_profile_node(state: LPUpdateState):
+    old = state["learning_path"]["student_profile"]
+    changes = {k: v for k, v in (state.get("changes") or {}).items() if k in PROFILE_FIELDS and v is not None}
+
+    sp = {**old, **changes}
+    sp["custom_topics"] = sp.get("custom_topics") or []
+    state["student_profile"] = sp
+    return state
+
+
+def outline_node(state: LPUpdateState):
+    """Target topic list: re-planned, rebuilt from custom topics, or unchanged."""
+    old = state["learning_path"]["student_profile"]
+    sp = state["student_profile"]
+    path = state["learning_path"]
+
+    level_changed = sp["experience_level"] != old.get("experience_level")
+    custom_changed = sp["custom_topics"] != (old.get("custom_topics") or [])
+    was_custom = bool(old.get("custom_topics"))
+    # More study time can fit topics the old outline was cut short of
+    cap_changed = topic_cap(sp) != topic_cap(old)
+
+    state["replanned"] = False
+
+    if sp["custom_topics"] and (custom_changed or level_changed):
+        # Custom topics are used as given: no LLM call for the outline
+        planned = topic_generation_node({"student_profile": sp})["llm_topics"]
+        if was_custom:
+            planned["title"], planned["description"] = path["title"], path["description"]
+
+    elif not sp["custom_topics"] and (level_changed or was_custom or cap_changed):
+        planning = {"student_profile": sp, "deadline": state.get("deadline")}
+        auto_topic_gen_node(planning)
+        planned = topic_generation_node(planning)["llm_topics"]
+        state["replanned"] = True
+        state["degradations"] = merge_degradations(state.get("degradations"), planning.get("degradations"))
+
+    else:
+        planned = {
+            "title": path["title"],
+            "description": path["description"],
+            "topics": path["topics"],
+        }
+
+    planned["topics"] = planned["topics"][:topic_cap(sp)]
+    state["llm_topics"] = planned
+    return state
+
+
+def reconcile_topics_node(state: LPUpdateState):
+    """Keep matching topics as they are, generate submodules for new ones."""
+    existing = {normalize_topic_name(t["name"]): t for t in state["learning_path"]["topics"]}
+    planned = state["llm_topics"]["topics"]
+    sp = state["student_profile"]
+
+    # Ids of removed topics are not reused either: clients may still hold them
+    ids = {t["id"] for t in state["learning_path"]["topics"]}
+
+    topics, added = [], []
+    for order, p in enumerate(planned, start=1):
+        match = existing.pop(normalize_topic_name(p["name"]), None)
+        if match is not None:
+            topic = {**match, "order": order}
+            # Difficulty follows the (possibly new) experience level
+            for field in ("difficulty", "estimated_time_hours"):
+                if field in p:
+                    topic[field] = p[field]
+        else:
+            topic = {**p, "order": order, "submodules": []}
+            added.append(topic)
+        topics.append(topic)
+
+    for topic in added:
+        if topic["id"] in ids:
+            topic["id"] = _next_topic_id(ids)
+        ids.add(topic["id"])
+
+    if added:
+        budget, degraded = submodule_budget(state)
+        state["degradations"] = merge_degradations(state.get("degradations"), degraded)
+        if budget is None:
+            results = [fallback_submodules(t["name"]) for t in added]
+        else:
+            with ThreadPoolExecutor(max_workers=min(4, len(added)), thread_name_prefix="path-update") as ex:
+                futures = [
+                    ex.submit(contextvars.copy_context().run, generate_submodules, t["name"], sp, budget)
+                    for t in added
+                ]
+                results = [f.result() for f in futures]
+        for topic, submods in zip(added, results):
+            topic["submodules"] = enrich_submodules(submods)
+
+    state["topics"] = topics
+    state["diff"] = {
+        "kept": len(topics) - len(added),
+        "added": [t["name"] for t in added],
+        "removed": [t["name"] for t in existing.values()],
+        "replanned": state.get("replanned", False),
+    }
+    logger.info(f"🔁 Learning path update: {state['diff']}")
+    return state
+
+
+def personalize_node(state: LPUpdateState):
+    """Submodules ordered by the (possibly new) learning style."""
+    order_by_style(state["topics"], state["student_profile"].get("preferred_learning_style"))
+    return state
+
+
+def _next_topic_id(ids) -> str:
+    numeric = [int(i) for i in ids if str(i).isdigit()]
+    return str(max(numeric, default=0) + 1)
+
+
+def rebuild_node(state: LPUpdateState):
+    path = state["learning_path"]
+    sp = state["student_profile"]
+    topics = state["topics"]
+
+    submods = [sm for t in topics for sm in t["submodules"]]
+    done_submods = sum(1 for sm in submods if sm.get("completed"))
+
+    state["learning_path"] = {
+        **path,
+        "title": state["llm_topics"]["title"],
+        "description": state["llm_topics"]["description"],
+        "goal": sp["goal"],
+        "student_profile": sp,
+        "topics": topics,
+        "updatedAt": datetime.utcnow().isoformat(),
+        "progress": {
+            "topics_completed": sum(1 for t in topics if t.get("completed")),
+            "total_topics": len(topics),
+            "submodules_completed": done_submods,
+            "total_submodules": len(submods),
+            "percentage": round(100 * done_submods / len(submods)) if submods else 0,
+        }
+    }
+    return state
+
+
+# -------------------------------------------------------
+# BUILD GRAPH
+# -------------------------------------------------------
+builder = StateGraph(LPUpdateState)
+
+builder.add_node("merge_profile", instrument_node("learning_path_update", "merge_profile", merge_profile_node))
+builder.add_node("outline", instrument_node("learning_path_update", "outline", outline_node))
+builder.add_node("reconcile", instrument_node("learning_path_update", "reconcile", reconcile_topics_node))
+builder.add_node("personalize", instrument_node("learning_path_update", "personalize", personalize_node))
+builder.add_node("rebuild", instrument_node("learning_path_update", "rebuild", rebuild_node))
+
+builder.set_entry_point("merge_profile")
+builder.add_edge("merge_profile", "outline")
+builder.add_edge("outline", "reconcile")
+builder.add_edge("reconcile", "personalize")
+builder.add_edge("personalize", "rebuild")
+builder.add_edge("rebuild", END)
+
+learning_path_update_graph = builder.compile()
@@ -0,0 +1,103 @@
+# cognigen-ai-service/graphs/loader.py
+#
+# Compiled graphs, imported on first use. Importing a graph module pulls
+# in LangGraph, the Ollama client and (for content) FAISS, which together
+# take over a second; main.py only imports this module, so the process
+# answers liveness checks right away.
+#
+# warm_up() does the imports and loads the FAISS index ahead of traffic,
+# in a background thread started at app startup. The service reports
+# ready once it has finished.
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("cognigen-ai-service")
+
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") != "0"
+
+GRAPHS = {
+    "learning_path": ("graphs.learning_path", "learning_path_graph"),
+    "learning_path_resumable": ("graphs.learning_path", "resumable_learning_path_graph"),
+    "learning_path_update": ("graphs.learning_path_update", "learning_path_update_graph"),
+    "topic_content": ("graphs.content_gen", "content_graph"),
+    "topic_content_resumable": ("graphs.content_gen", "resumable_content_graph"),
+    "mini_quiz": ("graphs.quiz_gen", "quiz_graph"),
+}
+
+
+def get_graph(name: str):
+    module, attr = GRAPHS[name]
+    return getattr(importlib.import_module(module), attr)
+
+
+class Readiness:
+    """Startup warm-up progress, reported by /health/ready."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.components: Dict[str, Any] = {"graphs": False, "vector_index": False}
+        self.error: Optional[str] = None
+        self.ready_after_s: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after_s is not None
+
+    def mark(self, component: str):
+        with self._lock:
+            self.components[component] = True
+            if all(self.components.values()) and self.ready_after_s is None:
+                self.ready_after_s = round(time.time() - self.started_at, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "components": dict(self.components),
+                "ready_after_s": self.ready_after_s,
+                "error": self.error,
+            }
+
+
+readiness = Readiness()
+
+
+def warm_up(preload_models: bool = True):
+    """Import every graph and load the FAISS index, then preload models."""
+    try:
+        for name in GRAPHS:
+            get_graph(name)
+        readiness.mark("graphs")
+
+        from vector_stores.faiss_vector import load_index
+        load_index()
+        readiness.mark("vector_index")
+        logger.info(f"🔥 Warm-up finished in {readiness.ready_after_s}s")
+    except Exception as e:
+        # Requests still work: whatever failed here is retried on first use
+        readiness.error = f"{type(e).__name__}: {e}"
+        logger.error(f"❌ Warm-up failed: {readiness.error}")
+        return
+
+    if preload_models:
+        from llm.lifecycle import lifecycle
+        lifecycle.preload_in_background()
+
+
+def warm_up_in_background(preload_models: bool = True):
+    if not WARM_UP_ON_STARTUP:
+        # Everything loads on first use; nothing to wait for
+        for component in list(readiness.components):
+            readiness.mark(component)
+        return
+    readiness._thread = threading.Thread(
+        target=warm_up, args=(preload_models,), name="warm-up", daemon=True
+    )
+    readiness._thread.start()
@@ -2,12 +2,39 @@
 # quiz_gen.py — FINAL STABLE VERSION (QWEN OPTIMIZED)
 # -------------------------------------------------------
 
-from typing import TypedDict, List, Dict
+import contextvars
+import logging
+import math
+import os
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, TypedDict, List, Dict, Optional
 from datetime import datetime
-import ollama
 
 from langgraph.graph import StateGraph, END
-from utils.common import extract_json
+from graphs.deadline import llm_plan, merge_degradations
+from llm.structured import generate_structured, StructuredOutputError
+from llm.scheduler import llm_context
+from observability.instrument import instrument_node
+from schemas import QuizOutput
+from stores.question_bank import content_hash, question_banks
+
+logger = logging.getLogger("cognigen-ai-service")
+
+
+# Prompt budget per quiz call, and how many chunk calls run at once.
+# Long notebooks are split into at most MAX_CHUNKS chunks and quizzed in
+# parallel, so latency stays roughly flat as content grows.
+CHUNK_TOKENS = int(os.getenv("QUIZ_CHUNK_TOKENS", "1500"))
+MAX_CHUNKS = int(os.getenv("QUIZ_MAX_CHUNKS", "6"))
+
+QUIZ_MIX = {"easy": 2, "medium": 2, "hard": 1}
+
+# Questions generated once per submodule content; quizzes are sampled from it
+BANK_SIZE = int(os.getenv("QUESTION_BANK_SIZE", "15"))
+
+_bank_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quiz-bank")
 
 
 # -------------------------------------------------------
@@ -17,8 +44,11 @@ class QuizState(TypedDict, total=False):
     submodule_id: str
     submodule_title: str
     cells: List[Dict]
-    extracted_text: str
+    content_hash: str
+    chunks: List[str]
     quiz: List[Dict]
+    deadline: Optional[float]
+    degradations: Annotated[List[str], merge_degradations]
 
 
 # -------------------------------------------------------
@@ -34,11 +64,89 @@ def extract_learning_text(cells: List[Dict]) -> str:
     return "\n\n".join(chunks)
 
 
-def enforce_quality(questions: List[Dict]) -> List[Dict]:
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) — no tokenizer needed."""
+    return len(text) // 4 + 1
+
+
+def _split_markdown(text: str) -> List[str]:
+    """Split markdown at headings, never inside a ``` fence."""
+    sections, current = [], []
+    in_fence = False
+
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not in_fence and line.startswith("#") and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+
+    if current:
+        sections.append("\n".join(current))
+    return [s for s in sections if s.strip()]
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Split a block that alone exceeds the budget at blank lines, then hard."""
+    max_chars = max_tokens * 4
+    pieces, current = [], ""
+
+    for para in block.split("\n\n"):
+        while len(para) > max_chars:
+            pieces.append(para[:max_chars])
+            para = para[max_chars:]
+        if current and len(current) + len(para) + 2 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_learning_text(cells: List[Dict], max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """
+    Token-bounded chunks of the learning text, split at heading and code
+    cell boundaries. Same content as extract_learning_text.
+    """
+    blocks = []
+    for c in cells:
+        content = c.get("content", "")
+        if not isinstance(content, str):
+            continue
+        if c.get("type") == "markdown":
+            blocks.extend(_split_markdown(content))
+        elif c.get("type") == "code":
+            blocks.append("# Code Example\n" + content)
+
+    chunks, current = [], ""
+    for block in blocks:
+        for piece in ([block] if estimate_tokens(block) <= max_tokens else _split_oversized(block, max_tokens)):
+            if current and estimate_tokens(current) + estimate_tokens(piece) > max_tokens:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _spread(items: List[str], limit: int) -> List[str]:
+    """Pick `limit` items evenly across the list (keeps coverage)."""
+    if len(items) <= limit:
+        return items
+    step = len(items) / limit
+    return [items[int(i * step)] for i in range(limit)]
+
+
+def enforce_quality(questions: List[Dict], limit: int = 5) -> List[Dict]:
     labels = ["A.", "B.", "C.", "D."]
     cleaned = []
 
-    for q in questions[:5]:
+    for q in questions[:limit]:
 
         opts = q.get("options", [])
         new_opts = []
@@ -63,12 +171,68 @@ def enforce_quality(questions: List[Dict]) -> List[Dict]:
     return cleaned
 
 
+def _normalize_question(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def dedupe_questions(questions: List[Dict], threshold: float = 0.8) -> List[Dict]:
+    """Drop questions whose wording overlaps an earlier one (Jaccard)."""
+    kept, seen = [], []
+    for q in questions:
+        words = _normalize_question(q["question"])
+        if not words:
+            continue
+        if any(len(words & w) / len(words | w) >= threshold for w in seen):
+            continue
+        kept.append(q)
+        seen.append(words)
+    return kept
+
+
+def merge_candidates(candidates: List[List[Dict]]) -> List[Dict]:
+    """Interleave per-chunk candidates (coverage across content), deduped."""
+    pool = []
+    for i in range(max((len(c) for c in candidates), default=0)):
+        pool.extend(c[i] for c in candidates if i < len(c))
+    return dedupe_questions(pool)
+
+
+def _order_by_difficulty(questions: List[Dict], mix: Dict[str, int]) -> List[Dict]:
+    order = {level: i for i, level in enumerate(mix)}
+    return sorted(questions, key=lambda q: order.get(q["difficulty"], len(order)))
+
+
+def sample_quiz(bank: List[Dict], mix: Dict[str, int] = QUIZ_MIX,
+                rng: Optional[random.Random] = None) -> List[Dict]:
+    """
+    Random quiz from a question bank with the difficulty mix, topped up
+    from other levels when one is short. No LLM call.
+    """
+    rng = rng or random
+    picked = []
+    for level, count in mix.items():
+        level_questions = [q for q in bank if q["difficulty"] == level]
+        picked.extend(rng.sample(level_questions, min(count, len(level_questions))))
+
+    short = sum(mix.values()) - len(picked)
+    if short > 0:
+        rest = [q for q in bank if q not in picked]
+        picked.extend(rng.sample(rest, min(short, len(rest))))
+
+    return _order_by_difficulty(picked, mix)
+
+
 # -------------------------------------------------------
 # QUIZ GENERATION
 # -------------------------------------------------------
-def generate_quiz(text: str):
+def generate_quiz(text: str, mix: Dict[str, int] = QUIZ_MIX, budget: Optional[Dict] = None):
+    """`budget` holds the model/max_repairs from quiz_budget()."""
+    budget = budget or {}
+
+    total = sum(mix.values())
+    counts = ", ".join(f"{n} {level}" for level, n in mix.items() if n)
 
-    system = """
+    system = f"""
 Return ONLY valid JSON.
 No markdown.
 No explanations.
@@ -76,15 +240,15 @@ No extra text.
 
 FORMAT:
 
-{
+{{
   "quiz": [
-    { "question": "...", "options": ["A. ...","B. ...","C. ...","D. ..."], "answer": "A", "difficulty": "easy" }
+    {{ "question": "...", "options": ["A. ...","B. ...","C. ...","D. ..."], "answer": "A", "difficulty": "easy" }}
   ]
-}
+}}
 
 Rules:
-- EXACTLY 5 questions.
-- 2 easy, 2 medium, 1 hard.
+- EXACTLY {total} questions.
+- {counts}.
 - Exactly 4 options.
 - Answer must be A/B/C/D.
 """
@@ -95,13 +259,17 @@ Generate quiz based only on this text:
 {text}
 """
 
-    raw = ollama.generate(
-        model="qwen2.5:3b",
-        prompt=system + "\n" + user,
-        options={"temperature": 0.2}
-    )["response"]
-
-    parsed = extract_json(raw)
+    parsed = generate_structured(
+        "quiz",
+        "quiz",
+        system,
+        user,
+        QuizOutput,
+        options={"temperature": 0.2},
+        max_repairs=budget.get("max_repairs", 1),
+        hedge=True,
+        model=budget.get("model")
+    )
     return parsed.get("quiz", [])
 
 
@@ -113,14 +281,118 @@ def input_node(state: QuizState):
 
 
 def extract_text_node(state: QuizState):
-    state["extracted_text"] = extract_learning_text(state["cells"])
+    state["content_hash"] = content_hash(state["cells"])
+    state["chunks"] = _spread(chunk_learning_text(state["cells"]), MAX_CHUNKS)
     return state
 
 
+def _bank_mix(chunks: int) -> Dict[str, int]:
+    """Per-chunk mix so all chunks together propose about BANK_SIZE questions."""
+    factor = max(1, math.ceil(BANK_SIZE / (sum(QUIZ_MIX.values()) * max(1, chunks))))
+    return {level: n * factor for level, n in QUIZ_MIX.items()}
+
+
+def generate_candidates(chunks: List[str], per_chunk: Dict[str, int] = QUIZ_MIX,
+                        budget: Optional[Dict] = None) -> List[List[Dict]]:
+    """Map step: quiz every chunk in parallel, cleaned, per chunk."""
+    chunks = chunks or [""]
+    limit = sum(per_chunk.values())
+
+    def one(chunk: str) -> List[Dict]:
+        try:
+            questions = enforce_quality(generate_quiz(chunk, per_chunk, budget), limit=limit)
+        except StructuredOutputError:
+            if len(chunks) == 1:
+                raise
+            return []
+        # There are spare candidates, so incomplete questions can be dropped
+        return [q for q in questions if q["question"] and len(q["options"]) == 4]
+
+    if len(chunks) == 1:
+        candidates = [one(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="quiz-map") as ex:
+            # One context copy per task so LLM call counting follows
+            futures = [ex.submit(contextvars.copy_context().run, one, c) for c in chunks]
+            candidates = [f.result() for f in futures]
+
+    if not any(candidates):
+        raise StructuredOutputError("quiz", "no chunk produced valid questions", "")
+    return candidates
+
+
+def build_question_bank(chunks: List[str], budget: Optional[Dict] = None) -> List[Dict]:
+    """Generate a deduplicated bank of about BANK_SIZE questions."""
+    return merge_candidates(generate_candidates(chunks, _bank_mix(len(chunks)), budget))
+
+
+def get_question_bank(key: str, chunks: List[str], budget: Optional[Dict] = None,
+                      store: bool = True) -> List[Dict]:
+    """
+    Stored bank for this content hash, built on a miss. Concurrent
+    requests for the same content wait for one build. With store=False
+    (a bank built to meet a deadline) the new bank serves this request only.
+    """
+    bank = question_banks.get(key)
+    if bank is not None:
+        return bank
+
+    with question_banks.build_lock(key):
+        bank = question_banks.get(key)
+        if bank is not None:
+            return bank
+
+        bank = build_question_bank(chunks, budget)
+        # A bank too small to fill a quiz is used once but not stored
+        if store and len(bank) >= sum(QUIZ_MIX.values()):
+            question_banks.put(key, bank)
+            logger.info(f"🏦 Stored question bank {key[:12]} ({len(bank)} questions)")
+        return bank
+
+
+def quiz_for_cells(cells: List[Dict], budget: Optional[Dict] = None,
+                   store: bool = True) -> List[Dict]:
+    """Quiz for these cells from their bank — the graph without the graph."""
+    chunks = _spread(chunk_learning_text(cells), MAX_CHUNKS)
+    return sample_quiz(get_question_bank(content_hash(cells), chunks, budget, store=store))
+
+
+def warm_question_bank(cells: List[Dict]):
+    """Build the bank for these cells in the background (no-op if present)."""
+    key = content_hash(cells)
+    if question_banks.get(key) is not None:
+        return None
+
+    def build():
+        try:
+            # Nobody waits on it: behind every request's own LLM calls
+            with llm_context("batch"):
+                get_question_bank(key, _spread(chunk_learning_text(cells), MAX_CHUNKS))
+        except Exception as e:
+            logger.warning(f"⚠️ Background question bank build failed: {e}")
+
+    return _bank_executor.submit(build)
+
+
+def quiz_budget(state: Dict):
+    """
+    (generate_quiz budget, degradations) under the request deadline. A
+    quiz can't be made without the LLM, so an expired deadline still
+    gets the call, on the fastest model and without repairs.
+    """
+    model, max_repairs, degraded = llm_plan(state, "quiz")
+    return {"model": model, "max_repairs": max_repairs}, degraded
+
+
 def quiz_gen_node(state: QuizState):
 
-    questions = generate_quiz(state["extracted_text"])
-    state["quiz"] = enforce_quality(questions)
+    key = state["content_hash"]
+    bank = question_banks.get(key)
+    if bank is None:
+        budget, degraded = quiz_budget(state)
+        state["degradations"] = merge_degradations(state.get("degradations"), degraded)
+        bank = get_question_bank(key, state["chunks"], budget, store=not degraded)
+    state["quiz"] = sample_quiz(bank)
 
     return state
 
@@ -138,10 +410,10 @@ def finalize_node(state: QuizState):
 # -------------------------------------------------------
 builder = StateGraph(QuizState)
 
-builder.add_node("input", input_node)
-builder.add_node("extract", extract_text_node)
-builder.add_node("quiz", quiz_gen_node)
-builder.add_node("final", finalize_node)
+builder.add_node("input", instrument_node("mini_quiz", "input", input_node))
+builder.add_node("extract", instrument_node("mini_quiz", "extract", extract_text_node))
+builder.add_node("quiz", instrument_node("mini_quiz", "quiz", quiz_gen_node))
+builder.add_node("final", instrument_node("mini_quiz", "final", finalize_node))
 
 builder.set_entry_point("input")
 builder.add_edge("input", "extract")
@@ -1,8 +1,13 @@
-from duckduckgo_search import DDGS
+from observability.instrument import instrument_provider
+
+
+@instrument_provider("duckduckgo")
+def duckduckgo_search(query: str, max_results: int = 1, timeout: float = 10):
+    # Imported on first use: the client pulls in a large HTTP stack
+    from duckduckgo_search import DDGS
 
-def duckduckgo_search(query: str, max_results: int = 1):
     results = []
-    with DDGS() as ddgs:
+    with DDGS(timeout=timeout) as ddgs:
         for r in ddgs.text(query, max_results=max_results):
             results.append(r)
     return results
@@ -1,16 +1,21 @@
 import os
+from typing import Optional
+
 from dotenv import load_dotenv
-import googleapiclient.discovery
+
+from observability.instrument import instrument_provider
 
 load_dotenv()
 
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 
 
-def fetch_youtube_videos(query: str, max_results: int = 10):
+@instrument_provider("youtube")
+def fetch_youtube_videos(query: str, max_results: int = 10, timeout: Optional[float] = None):
     """
     Fetches YouTube videos safely using YouTube Data API v3.
     If API Key is missing or API fails, returns an empty list (does not crash).
+    `timeout` (seconds) bounds the HTTP request.
     """
 
     # -------------------------------------------------------------
@@ -21,8 +26,13 @@ def fetch_youtube_videos(query: str, max_results: int = 10):
         return []
 
     try:
+        # Imported on first use: the API client is slow to import
+        import httplib2
+        import googleapiclient.discovery
+
         youtube = googleapiclient.discovery.build(
-            "youtube", "v3", developerKey=API_KEY
+            "youtube", "v3", developerKey=API_KEY,
+            http=httplib2.Http(timeout=timeout) if timeout else None
         )
 
         request = youtube.search().list(
@@ -0,0 +1,144 @@
+# ---------------------------------------------------------
+# llm/client.py — single entry point for Ollama calls
+# ---------------------------------------------------------
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from llm.lifecycle import lifecycle
+from llm.pool import get_pool
+from llm.router import router
+from llm.scheduler import scheduler
+from observability.metrics import LLM_SECONDS, observe_llm_response
+from observability.tracing import end_span, span, start_span
+
+
+# ---------------------------------------------------------
+# CALL COUNTING
+# ---------------------------------------------------------
+class CallCounter:
+    """LLM calls made inside a count_llm_calls() block (and nested blocks)."""
+
+    def __init__(self, parent: Optional["CallCounter"] = None):
+        self.calls = 0
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def incr(self):
+        counter = self
+        while counter is not None:
+            with counter._lock:
+                counter.calls += 1
+            counter = counter.parent
+
+
+_counter: ContextVar[Optional[CallCounter]] = ContextVar("llm_call_counter", default=None)
+
+
+@contextmanager
+def count_llm_calls():
+    """
+    Count LLM calls in this context. Worker threads started inside only
+    count when they run in a copy of the context (contextvars.copy_context).
+    """
+    counter = CallCounter(_counter.get())
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+def _record_call():
+    counter = _counter.get()
+    if counter is not None:
+        counter.incr()
+
+
+def _annotate(s, response):
+    """Ollama's token counts on the span of the call."""
+    if s is not None:
+        s.set_attribute("prompt_tokens", response.get("prompt_eval_count") or 0)
+        s.set_attribute("eval_tokens", response.get("eval_count") or 0)
+
+
+def chat(
+    model: str,
+    messages: List[Dict[str, str]],
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    hedge: bool = False,
+):
+    """
+    Run one chat completion on the backend pool.
+
+    Every LLM call in graphs/ and planners/ goes through here so routing,
+    metrics and scheduling (llm/scheduler.py) apply in one place.
+    `hedge` races a second backend when the first is slower than the
+    model's p95.
+    """
+    _record_call()
+    with span("llm.chat", kind="client", model=model, hedge=hedge) as s, \
+            scheduler.slot(s), LLM_SECONDS.time(model=model, mode="chat"):
+        response = get_pool().chat(
+            model=model,
+            messages=messages,
+            format=format,
+            options=options,
+            hedge=hedge,
+            keep_alive=lifecycle.track_request(model),
+        )
+        _annotate(s, response)
+    lifecycle.observe(model, response)
+    router.observe(model, response)
+    observe_llm_response(model, response)
+    return response
+
+
+def chat_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Streaming variant of chat(): yields content pieces as they arrive.
+    The final chunk (with Ollama's timing stats) feeds the same
+    observers as chat().
+    """
+    _record_call()
+    # Not the current span: the consumer runs between chunks
+    s = start_span("llm.chat_stream", kind="client", model=model)
+    outcome = "error"
+    error = None
+    # The slot is held until the stream is consumed
+    with scheduler.slot(s):
+        start = time.perf_counter()
+        try:
+            for chunk in get_pool().chat_stream(
+                model=model,
+                messages=messages,
+                format=format,
+                options=options,
+                keep_alive=lifecycle.track_request(model),
+            ):
+                piece = chunk["message"]["content"]
+                if piece:
+                    yield piece
+                if chunk.get("done"):
+                    outcome = "ok"
+                    lifecycle.observe(model, chunk)
+                    router.observe(model, chunk)
+                    observe_llm_response(model, chunk)
+                    _annotate(s, chunk)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            end_span(s, error)
+            # Time spent by the consumer between chunks is included: a
+            # stream is only done when its reader is
+            LLM_SECONDS.observe(time.perf_counter() - start, model=model, mode="stream", outcome=outcome)
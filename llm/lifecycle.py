@@ -0,0 +1,194 @@
+# ---------------------------------------------------------
+# llm/lifecycle.py — model warm-up and keep_alive management
+# ---------------------------------------------------------
+# Ollama unloads a model after `keep_alive` of inactivity (5m by default)
+# and the next request pays the full load. This module:
+#   - preloads the configured models on every backend at startup
+#   - picks keep_alive per model from its recent traffic, so busy
+#     models stay resident and idle ones free memory
+#   - records load times (Ollama's load_duration) and cold loads
+#   - reports which models are resident where (/api/ps)
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from llm.pool import get_pool
+from llm.router import router
+
+logger = logging.getLogger("cognigen-ai-service")
+
+# Defaults to every model referenced by the routing table
+PRELOAD_MODELS = [
+    m.strip()
+    for m in os.getenv("PRELOAD_MODELS", ",".join(router.models())).split(",")
+    if m.strip()
+]
+
+# keep_alive tiers, chosen from the request count in TRAFFIC_WINDOW_S
+KEEP_ALIVE_HOT = os.getenv("KEEP_ALIVE_HOT", "60m")
+KEEP_ALIVE_WARM = os.getenv("KEEP_ALIVE_WARM", "20m")
+KEEP_ALIVE_COLD = os.getenv("KEEP_ALIVE_COLD", "5m")
+HOT_REQUESTS = int(os.getenv("KEEP_ALIVE_HOT_REQUESTS", "20"))
+WARM_REQUESTS = int(os.getenv("KEEP_ALIVE_WARM_REQUESTS", "1"))
+TRAFFIC_WINDOW_S = float(os.getenv("KEEP_ALIVE_WINDOW_S", "900"))
+
+# A reply whose load_duration exceeds this had to load the model first
+COLD_LOAD_THRESHOLD_S = 0.5
+
+
+class ModelStats:
+    def __init__(self):
+        self.requests: deque = deque()
+        self.cold_loads = 0
+        self.last_load_s: Optional[float] = None
+        self.max_load_s: Optional[float] = None
+        self.preload: List[Dict[str, Any]] = []
+
+
+class ModelLifecycleManager:
+    def __init__(self, models: List[str]):
+        self.models = list(models)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, ModelStats] = {m: ModelStats() for m in models}
+
+    def _model(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats.setdefault(model, ModelStats())
+        return stats
+
+    # ---------------- keep_alive ----------------
+    def _recent_requests(self, stats: ModelStats, now: float) -> int:
+        while stats.requests and stats.requests[0] < now - TRAFFIC_WINDOW_S:
+            stats.requests.popleft()
+        return len(stats.requests)
+
+    def track_request(self, model: str) -> str:
+        """Count a request for this model and return the keep_alive to send."""
+        now = time.time()
+        with self._lock:
+            stats = self._model(model)
+            stats.requests.append(now)
+            recent = self._recent_requests(stats, now)
+
+        if recent >= HOT_REQUESTS:
+            return KEEP_ALIVE_HOT
+        if recent > WARM_REQUESTS:
+            return KEEP_ALIVE_WARM
+        # Configured models stay warm even when quiet; others use Ollama's default
+        return KEEP_ALIVE_WARM if model in self.models else KEEP_ALIVE_COLD
+
+    # ---------------- load tracking ----------------
+    def observe(self, model: str, response) -> None:
+        """Record load time from an Ollama response (load_duration is in ns)."""
+        load_ns = response.get("load_duration") or 0
+        load_s = load_ns / 1e9
+        if load_s < COLD_LOAD_THRESHOLD_S:
+            return
+
+        with self._lock:
+            stats = self._model(model)
+            stats.cold_loads += 1
+            stats.last_load_s = load_s
+            stats.max_load_s = max(stats.max_load_s or 0.0, load_s)
+
+        logger.info(f"🧊 Cold load of {model}: {load_s:.2f}s")
+
+    # ---------------- preloading ----------------
+    def _preload_one(self, backend, model: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            # An empty prompt loads the model without generating anything
+            response = backend.client.generate(
+                model=model,
+                prompt="",
+                keep_alive=KEEP_ALIVE_WARM,
+            )
+            load_s = (response.get("load_duration") or 0) / 1e9
+            result = {"host": backend.host, "ok": True, "load_s": round(load_s, 3)}
+        except Exception as e:
+            result = {"host": backend.host, "ok": False, "error": str(e)}
+
+        result["wall_s"] = round(time.perf_counter() - start, 3)
+        with self._lock:
+            self._model(model).preload.append(result)
+        return result
+
+    def preload(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load every configured model on every backend that serves it."""
+        pool = get_pool()
+        jobs = [(b, m) for m in self.models for b in pool.backends if b.serves(m)]
+        if not jobs:
+            return {}
+
+        logger.info(f"🔥 Preloading {len(self.models)} models on {len(pool.backends)} backend(s)")
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="ollama-preload") as ex:
+            results = list(ex.map(lambda job: (job[1], self._preload_one(*job)), jobs))
+
+        summary: Dict[str, List[Dict[str, Any]]] = {}
+        for model, result in results:
+            summary.setdefault(model, []).append(result)
+            if result["ok"]:
+                logger.info(f"✅ Preloaded {model} on {result['host']} in {result['wall_s']}s")
+            else:
+                logger.warning(f"⚠️ Preload of {model} on {result['host']} failed: {result['error']}")
+        return summary
+
+    def preload_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.preload, name="ollama-preload", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------------- diagnostics ----------------
+    @staticmethod
+    def _resident_on(backend):
+        try:
+            return [
+                {
+                    "model": m.get("model") or m.get("name"),
+                    "expires_at": str(m.get("expires_at")),
+                    "size_vram": m.get("size_vram"),
+                }
+                for m in backend.loaded_models()
+            ]
+        except Exception as e:
+            return {"error": str(e)}
+
+    def residency(self) -> Dict[str, Any]:
+        """
+        Models currently loaded on each backend (Ollama /api/ps). Backends
+        are asked at once, each bounded by the health-check timeout, so a
+        hung host costs seconds rather than a request timeout.
+        """
+        backends = get_pool().backends
+        with ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix="ollama-ps") as ex:
+            results = list(ex.map(self._resident_on, backends))
+        return {backend.host: result for backend, result in zip(backends, results)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            models = {
+                name: {
+                    "configured": name in self.models,
+                    "requests_in_window": self._recent_requests(stats, now),
+                    "cold_loads": stats.cold_loads,
+                    "last_load_s": stats.last_load_s,
+                    "max_load_s": stats.max_load_s,
+                    "preload": list(stats.preload),
+                }
+                for name, stats in self._stats.items()
+            }
+        return {
+            "window_s": TRAFFIC_WINDOW_S,
+            "models": models,
+            "resident": self.residency(),
+        }
+
+
+lifecycle = ModelLifecycleManager(PRELOAD_MODELS)
@@ -0,0 +1,322 @@
+# ---------------------------------------------------------
+# llm/pool.py — Ollama backend pool
+# ---------------------------------------------------------
+# Spreads LLM calls over several Ollama hosts:
+#   - least-outstanding-requests routing among healthy backends
+#     that serve the requested model
+#   - background health checks + failover on connection errors
+#   - optional hedged requests: if the first backend has not answered
+#     by the model's observed p95, the same call goes to a second one
+#
+# Configure with OLLAMA_HOSTS, one backend per ";" and an optional
+# "=" model list per backend (no list = serves every model):
+#   OLLAMA_HOSTS="http://gpu-a:11434=qwen2.5:3b,gemma3:1b;http://gpu-b:11434"
+
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import ollama
+
+logger = logging.getLogger("cognigen-ai-service")
+
+DEFAULT_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+HEALTH_INTERVAL_S = float(os.getenv("OLLAMA_HEALTH_INTERVAL_S", "15"))
+HEALTH_TIMEOUT_S = float(os.getenv("OLLAMA_HEALTH_TIMEOUT_S", "2"))
+REQUEST_TIMEOUT_S = float(os.getenv("OLLAMA_REQUEST_TIMEOUT_S", "300"))
+
+# Consecutive call failures before a backend is taken out of rotation
+# (a passing health check puts it back).
+MAX_FAILURES = int(os.getenv("OLLAMA_MAX_FAILURES", "3"))
+
+# Hedging needs enough samples for a meaningful p95
+HEDGE_MIN_SAMPLES = int(os.getenv("OLLAMA_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 200
+
+
+class BackendUnavailableError(RuntimeError):
+    """No backend could serve the request."""
+
+
+def _is_backend_failure(err: Exception) -> bool:
+    """Errors that say something about the host, not about the request."""
+    if isinstance(err, (ConnectionError, httpx.HTTPError)):
+        return True
+    if isinstance(err, ollama.ResponseError):
+        return err.status_code >= 500 or err.status_code == 404
+    return False
+
+
+# ---------------------------------------------------------
+# BACKEND
+# ---------------------------------------------------------
+class Backend:
+    def __init__(self, host: str, models: Optional[Sequence[str]] = None):
+        self.host = host
+        self.models = set(models) if models else None
+        self.client = ollama.Client(host=host, timeout=REQUEST_TIMEOUT_S)
+        self._health_client = ollama.Client(host=host, timeout=HEALTH_TIMEOUT_S)
+
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.total_requests = 0
+        self.total_errors = 0
+        self.last_check: Optional[float] = None
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def check_health(self) -> bool:
+        try:
+            self._health_client.list()
+            ok = True
+        except Exception:
+            ok = False
+
+        if ok and not self.healthy:
+            logger.info(f"✅ Ollama backend {self.host} is healthy again")
+        elif not ok and self.healthy:
+            logger.warning(f"⚠️ Ollama backend {self.host} failed health check")
+
+        self.healthy = ok
+        if ok:
+            self.failures = 0
+        self.last_check = time.time()
+        return ok
+
+    def loaded_models(self) -> List[Dict[str, Any]]:
+        """Models resident on this host (/api/ps), with the health-check timeout."""
+        return self._health_client.ps().get("models", [])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "host": self.host,
+            "models": sorted(self.models) if self.models else "*",
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "total_requests": self.total_requests,
+            "total_errors": self.total_errors,
+            "last_check": self.last_check,
+        }
+
+
+def parse_hosts(spec: str) -> List[Backend]:
+    backends = []
+    for entry in spec.split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, models = entry.partition("=")
+        model_list = [m.strip() for m in models.split(",") if m.strip()]
+        backends.append(Backend(host.strip(), model_list))
+    return backends
+
+
+# ---------------------------------------------------------
+# POOL
+# ---------------------------------------------------------
+class BackendPool:
+    def __init__(self, backends: List[Backend]):
+        if not backends:
+            raise ValueError("BackendPool needs at least one backend")
+
+        self.backends = backends
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = {}
+        self._hedges_sent = 0
+        self._hedges_won = 0
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=max(4, 4 * len(backends)),
+            thread_name_prefix="ollama-hedge"
+        )
+        self._health_thread: Optional[threading.Thread] = None
+
+    # ---------------- routing ----------------
+    def _candidates(self, model: str, exclude: Sequence[Backend] = ()) -> List[Backend]:
+        serving = [b for b in self.backends if b.serves(model) and b not in exclude]
+        healthy = [b for b in serving if b.healthy]
+        # If everything looks down, still try rather than fail outright
+        return healthy or serving
+
+    def select(self, model: str, exclude: Sequence[Backend] = ()) -> Backend:
+        with self._lock:
+            candidates = self._candidates(model, exclude)
+            if not candidates:
+                raise BackendUnavailableError(f"No Ollama backend serves model '{model}'")
+            least = min(b.outstanding for b in candidates)
+            backend = random.choice([b for b in candidates if b.outstanding == least])
+            backend.outstanding += 1
+            backend.total_requests += 1
+            return backend
+
+    def _release(self, backend: Backend, model: str, elapsed: float, error: Optional[Exception]):
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.failures = 0
+                self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+                return
+
+            backend.total_errors += 1
+            if _is_backend_failure(error):
+                backend.failures += 1
+                if backend.failures >= MAX_FAILURES and backend.healthy:
+                    backend.healthy = False
+                    logger.warning(f"⚠️ Ollama backend {backend.host} marked unhealthy: {error}")
+
+    def p95(self, model: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    # ---------------- calls ----------------
+    def _call(self, backend: Backend, method: str, model: str, kwargs: Dict[str, Any]):
+        start = time.perf_counter()
+        error = None
+        try:
+            return getattr(backend.client, method)(model=model, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(backend, model, time.perf_counter() - start, error)
+
+    def _call_with_failover(self, method: str, model: str, kwargs: Dict[str, Any], exclude=()):
+        tried = list(exclude)
+        while True:
+            backend = self.select(model, exclude=tried)
+            try:
+                return self._call(backend, method, model, kwargs)
+            except Exception as e:
+                tried.append(backend)
+                if not _is_backend_failure(e) or not self._candidates(model, tried):
+                    raise
+                logger.warning(f"⚠️ Ollama backend {backend.host} failed, failing over: {e}")
+
+    def _hedged(self, method: str, model: str, kwargs: Dict[str, Any]):
+        delay = self.p95(model)
+        if delay is None or len(self._candidates(model)) < 2:
+            return self._call_with_failover(method, model, kwargs)
+
+        primary = self.select(model)
+        first = self._hedge_executor.submit(self._call, primary, method, model, kwargs)
+
+        done, _ = wait([first], timeout=delay)
+        if done:
+            try:
+                return first.result()
+            except Exception as e:
+                if not _is_backend_failure(e):
+                    raise
+                return self._call_with_failover(method, model, kwargs, exclude=[primary])
+
+        # Primary is slower than p95: race a second backend. The loser keeps
+        # running (HTTP calls can't be cancelled) but its result is dropped.
+        secondary = self.select(model, exclude=[primary])
+        second = self._hedge_executor.submit(self._call, secondary, method, model, kwargs)
+        with self._lock:
+            self._hedges_sent += 1
+
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is second:
+                        with self._lock:
+                            self._hedges_won += 1
+                    return fut.result()
+                error = fut.exception()
+        raise error
+
+    def chat(self, model: str, hedge: bool = False, **kwargs):
+        if hedge and len(self.backends) > 1:
+            return self._hedged("chat", model, kwargs)
+        return self._call_with_failover("chat", model, kwargs)
+
+    def generate(self, model: str, hedge: bool = False, **kwargs):
+        if hedge and len(self.backends) > 1:
+            return self._hedged("generate", model, kwargs)
+        return self._call_with_failover("generate", model, kwargs)
+
+    def chat_stream(self, model: str, **kwargs):
+        """
+        Streaming chat: yields Ollama chunks. Fails over to another backend
+        only before the first chunk; a stream that breaks midway raises.
+        """
+        tried = []
+        while True:
+            backend = self.select(model, exclude=tried)
+            start = time.perf_counter()
+            error = None
+            started = False
+            try:
+                for chunk in backend.client.chat(model=model, stream=True, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                error = e
+                tried.append(backend)
+                if started or not _is_backend_failure(e) or not self._candidates(model, tried):
+                    raise
+                logger.warning(f"⚠️ Ollama backend {backend.host} failed, failing over: {e}")
+            finally:
+                self._release(backend, model, time.perf_counter() - start, error)
+
+    # ---------------- health ----------------
+    def check_health(self):
+        for backend in self.backends:
+            backend.check_health()
+
+    def start_health_checks(self, interval: float = HEALTH_INTERVAL_S):
+        if self._health_thread is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            backends = [b.snapshot() for b in self.backends]
+            hedges = {"sent": self._hedges_sent, "won_by_hedge": self._hedges_won}
+            models = list(self._latencies)
+        return {
+            "backends": backends,
+            "hedging": hedges,
+            "p95_seconds": {m: self.p95(m) for m in models},
+        }
+
+
+# ---------------------------------------------------------
+# SHARED POOL
+# ---------------------------------------------------------
+_pool: Optional[BackendPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BackendPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                backends = parse_hosts(os.getenv("OLLAMA_HOSTS", "")) or [Backend(DEFAULT_HOST)]
+                pool = BackendPool(backends)
+                pool.start_health_checks()
+                _pool = pool
+    return _pool
@@ -0,0 +1,180 @@
+# ---------------------------------------------------------
+# llm/router.py — task -> model routing under latency budgets
+# ---------------------------------------------------------
+# Each task (topic planning, content, quiz, ...) has a tiered list of
+# models, best first. Per call we estimate how long each tier would take
+#
+#   (1 + queued requests ahead) * expected_tokens / observed tokens/sec
+#
+# and pick the first tier that fits the task's latency budget, falling
+# back to the fastest tier when none does (i.e. under load).
+#
+# Routes live in llm/model_routes.json (or MODEL_ROUTES_FILE) and are
+# reloaded when the file changes, so tiers and budgets can be tuned
+# without a redeploy.
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from llm.pool import get_pool
+
+logger = logging.getLogger("cognigen-ai-service")
+
+ROUTES_FILE = os.getenv(
+    "MODEL_ROUTES_FILE",
+    os.path.join(os.path.dirname(__file__), "model_routes.json")
+)
+RELOAD_CHECK_S = 5.0
+
+# Weight of the newest sample in the tokens/sec moving average
+TPS_ALPHA = 0.2
+
+# Requests one Ollama server runs at once, unless model_routes.json sets
+# backend_parallel. Same variable as the Ollama server's own setting.
+BACKEND_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+
+class ModelRouter:
+    def __init__(self, path: str = ROUTES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._parallel = BACKEND_PARALLEL
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+
+        self._tps: Dict[str, float] = {}
+        self._selections: Dict[str, Dict[str, int]] = {}
+
+        self._load()
+
+    # ---------------- config ----------------
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            if not self._routes:
+                raise
+            logger.error(f"❌ Could not reload model routes from {self.path}: {e}")
+            return
+
+        with self._lock:
+            self._routes = config["tasks"]
+            self._parallel = max(1, int(config.get("backend_parallel") or BACKEND_PARALLEL))
+            self._mtime = mtime
+        logger.info(f"🧭 Loaded model routes for {len(self._routes)} tasks")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_S:
+            return
+        self._last_check = now
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self._load()
+        except OSError:
+            pass
+
+    def tiers(self, task: str) -> List[str]:
+        self._maybe_reload()
+        return list(self._routes[task]["tiers"])
+
+    def models(self) -> List[str]:
+        """Every model referenced by any route."""
+        seen = []
+        for route in self._routes.values():
+            for m in route["tiers"]:
+                if m not in seen:
+                    seen.append(m)
+        return seen
+
+    # ---------------- selection ----------------
+    def _queued(self, model: str) -> float:
+        """Requests ahead of us on the least busy backend serving model."""
+        serving = [b for b in get_pool().backends if b.serves(model) and b.healthy]
+        if not serving:
+            return float("inf")
+        return min(b.outstanding for b in serving) / self._parallel
+
+    def estimate(self, task: str, model: str) -> Optional[float]:
+        """Expected seconds for this task on this model, None if unknown."""
+        tps = self._tps.get(model)
+        if not tps:
+            return None
+        tokens = self._routes[task].get("expected_tokens", 300)
+        return (1 + self._queued(model)) * tokens / tps
+
+    def latency_budget(self, task: str) -> float:
+        self._maybe_reload()
+        return self._routes[task]["latency_budget_s"]
+
+    def select(self, task: str, budget_s: Optional[float] = None, record: bool = True) -> str:
+        """
+        Pick the model for one call. budget_s overrides the configured
+        latency budget (e.g. with the time a request has left). With
+        record=False the pick isn't counted in the selection stats.
+        """
+        self._maybe_reload()
+        route = self._routes[task]
+        budget = route["latency_budget_s"] if budget_s is None else budget_s
+
+        chosen = None
+        fastest, fastest_s = None, float("inf")
+
+        for model in route["tiers"]:
+            expected = self.estimate(task, model)
+            if expected is None or expected <= budget:
+                chosen = model
+                break
+            if expected < fastest_s:
+                fastest, fastest_s = model, expected
+
+        chosen = chosen or fastest or route["tiers"][-1]
+        if not record:
+            return chosen
+
+        with self._lock:
+            counts = self._selections.setdefault(task, {})
+            counts[chosen] = counts.get(chosen, 0) + 1
+        return chosen
+
+    # ---------------- observation ----------------
+    def observe(self, model: str, response) -> None:
+        """Update tokens/sec for model from an Ollama response."""
+        tokens = response.get("eval_count") or 0
+        duration_ns = response.get("eval_duration") or 0
+        if tokens < 8 or duration_ns <= 0:
+            return
+
+        tps = tokens / (duration_ns / 1e9)
+        with self._lock:
+            prev = self._tps.get(model)
+            self._tps[model] = tps if prev is None else (1 - TPS_ALPHA) * prev + TPS_ALPHA * tps
+
+    def backend_parallel(self) -> int:
+        """Requests one backend runs at once (Ollama's OLLAMA_NUM_PARALLEL)."""
+        self._maybe_reload()
+        return self._parallel
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._maybe_reload()
+        with self._lock:
+            tasks = {
+                task: {
+                    **route,
+                    "estimates_s": {m: self.estimate(task, m) for m in route["tiers"]},
+                    "selections": dict(self._selections.get(task, {})),
+                }
+                for task, route in self._routes.items()
+            }
+            tps = {m: round(v, 2) for m, v in self._tps.items()}
+        return {"routes_file": self.path, "tokens_per_second": tps, "tasks": tasks}
+
+
+router = ModelRouter()
@@ -0,0 +1,177 @@
+# ---------------------------------------------------------
+# llm/scheduler.py — priority and per-user fair LLM call scheduling
+# ---------------------------------------------------------
+# Every LLM call takes a slot here before it goes to the backend pool.
+# At most `capacity` calls run at once: backends x backend_parallel
+# (OLLAMA_NUM_PARALLEL, default 4, unless model_routes.json sets it), or
+# LLM_MAX_CONCURRENCY. Calls over the cap wait,
+# and a free slot goes to the next call in weighted fair queuing order
+# (start-time fair queuing):
+#
+#   flow   = (priority class, user_id)
+#   start  = max(virtual time, finish tag of the flow's previous call)
+#   finish = start + 1 / weight of the priority class
+#
+# The waiting call with the smallest finish tag goes next. A class with
+# weight 8 gets 8 slots for every slot a weight-1 class gets while both
+# wait, so a quiz gets ahead of a 12-call learning path, but batch work
+# is never starved outright. Within a class every user is its own flow:
+# one user's burst can't hold back everyone else's calls.
+#
+# Priority and user come from the request context, set with
+# llm_context() by the endpoint; worker threads inherit it through
+# contextvars.
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from llm.pool import get_pool
+from llm.router import router
+from observability.metrics import LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger("cognigen-ai-service")
+
+PRIORITY_WEIGHTS = {
+    "interactive": 8.0,   # mini quizzes: short, a learner is waiting
+    "standard": 3.0,      # topic content
+    "batch": 1.0,         # learning paths, background question banks
+}
+DEFAULT_PRIORITY = "standard"
+DEFAULT_USER = "anonymous"
+
+# 0 = backends x backend_parallel
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "0"))
+
+# Finish tags of idle flows are dropped past this many flows
+MAX_FLOWS = 10_000
+
+_context: ContextVar[Tuple[str, str]] = ContextVar(
+    "llm_schedule_context", default=(DEFAULT_PRIORITY, DEFAULT_USER)
+)
+
+
+@contextmanager
+def llm_context(priority: str = DEFAULT_PRIORITY, user_id: Optional[str] = None):
+    """LLM calls made in this context are scheduled as `priority` for `user_id`."""
+    if priority not in PRIORITY_WEIGHTS:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _context.set((priority, user_id or DEFAULT_USER))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("start", "event")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.event = threading.Event()
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._queue: list = []  # (finish tag, seq, priority, waiter)
+        self._seq = itertools.count()
+        self._virtual = 0.0
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self.in_flight = 0
+
+        self.scheduled: Dict[str, int] = {p: 0 for p in PRIORITY_WEIGHTS}
+        self.waited: Dict[str, int] = {p: 0 for p in PRIORITY_WEIGHTS}
+        self.wait_s: Dict[str, float] = {p: 0.0 for p in PRIORITY_WEIGHTS}
+
+    def capacity(self) -> int:
+        if self.max_concurrency > 0:
+            return self.max_concurrency
+        return max(1, len(get_pool().backends) * router.backend_parallel())
+
+    # ---------------- slots ----------------
+    def _acquire(self, priority: str, user_id: str) -> float:
+        """Block until this call may run; returns the seconds waited."""
+        flow = (priority, user_id)
+        with self._lock:
+            start = max(self._virtual, self._last_finish.get(flow, 0.0))
+            finish = start + 1.0 / PRIORITY_WEIGHTS[priority]
+            self._last_finish[flow] = finish
+            if len(self._last_finish) > MAX_FLOWS:
+                self._last_finish = {f: t for f, t in self._last_finish.items() if t > self._virtual}
+
+            self.scheduled[priority] += 1
+            if self.in_flight < self.capacity() and not self._queue:
+                self.in_flight += 1
+                self._virtual = max(self._virtual, start)
+                LLM_IN_FLIGHT.inc()
+                return 0.0
+
+            waiter = _Waiter(start)
+            heapq.heappush(self._queue, (finish, next(self._seq), priority, waiter))
+            LLM_QUEUE_DEPTH.inc(priority=priority)
+
+        began = time.perf_counter()
+        # The slot is handed over by _release (in_flight already counted)
+        waiter.event.wait()
+        waited = time.perf_counter() - began
+        with self._lock:
+            self.waited[priority] += 1
+            self.wait_s[priority] += waited
+        return waited
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            LLM_IN_FLIGHT.dec()
+            while self._queue and self.in_flight < self.capacity():
+                _, _, priority, waiter = heapq.heappop(self._queue)
+                LLM_QUEUE_DEPTH.dec(priority=priority)
+                self._virtual = max(self._virtual, waiter.start)
+                self.in_flight += 1
+                LLM_IN_FLIGHT.inc()
+                waiter.event.set()
+
+    @contextmanager
+    def slot(self, span=None):
+        """Hold one LLM slot for the block, scheduled by the current llm_context()."""
+        priority, user_id = _context.get()
+        waited = self._acquire(priority, user_id)
+        LLM_QUEUE_WAIT_SECONDS.observe(waited, priority=priority)
+        if span is not None:
+            span.set_attribute("priority", priority)
+            span.set_attribute("queue_wait_ms", round(waited * 1000, 1))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = {p: 0 for p in PRIORITY_WEIGHTS}
+            for _, _, priority, _ in self._queue:
+                queued[priority] += 1
+            return {
+                "capacity": self.capacity(),
+                "in_flight": self.in_flight,
+                "queued": queued,
+                "weights": dict(PRIORITY_WEIGHTS),
+                "priorities": {
+                    p: {
+                        "calls": self.scheduled[p],
+                        "waited": self.waited[p],
+                        "avg_wait_s": round(self.wait_s[p] / self.waited[p], 3) if self.waited[p] else 0.0,
+                    }
+                    for p in PRIORITY_WEIGHTS
+                },
+            }
+
+
+scheduler = LLMScheduler()
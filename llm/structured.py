@@ -0,0 +1,293 @@
+# ---------------------------------------------------------
+# llm/structured.py — schema-constrained LLM output
+# ---------------------------------------------------------
+# Replies are constrained with the JSON schema of a pydantic model
+# (Ollama structured outputs). When a reply still fails to parse or
+# validate we try, in order of cost:
+#   1. local repair (utils.json_scanner) — no LLM call
+#   2. continuation — the reply was cut off, ask the model to finish it
+#   3. repair request — short prompt with the broken JSON + errors
+# instead of regenerating the whole answer.
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from llm import client
+from llm.router import router
+from utils.common import extract_json
+from utils.json_scanner import JSONStreamScanner
+
+logger = logging.getLogger("cognigen-ai-service")
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply cannot be turned into a valid schema instance."""
+
+    def __init__(self, node: str, message: str, raw: str):
+        super().__init__(f"[{node}] {message}")
+        self.node = node
+        self.raw = raw
+
+
+# ---------------------------------------------------------
+# PER-NODE PARSE STATS
+# ---------------------------------------------------------
+class OutputStats:
+    """Thread-safe counters of parse failures and follow-up requests per node."""
+
+    FIELDS = (
+        "calls",            # first-attempt generations
+        "parse_failures",   # first attempts that did not validate
+        "local_repairs",    # fixed without another LLM call
+        "continuations",    # truncated replies we asked the model to finish
+        "repair_requests",  # short "fix this JSON" requests
+        "failures",         # gave up, StructuredOutputError raised
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, node: str, field: str, amount: int = 1):
+        with self._lock:
+            counters = self._nodes.setdefault(node, dict.fromkeys(self.FIELDS, 0))
+            counters[field] += amount
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            nodes = {name: dict(c) for name, c in self._nodes.items()}
+
+        for c in nodes.values():
+            calls = c["calls"] or 1
+            c["parse_failure_rate"] = round(c["parse_failures"] / calls, 4)
+            c["retry_rate"] = round((c["continuations"] + c["repair_requests"]) / calls, 4)
+        return nodes
+
+
+output_stats = OutputStats()
+
+
+def get_output_stats() -> Dict[str, Dict[str, Any]]:
+    return output_stats.snapshot()
+
+
+# ---------------------------------------------------------
+# PARSING
+# ---------------------------------------------------------
+def _validate(raw: str, schema: Type[BaseModel]) -> BaseModel:
+    """Parse (with local repair) and validate. Raises ValueError."""
+    parsed = extract_json(raw)
+
+    # Small models sometimes wrap the object in a one-element array
+    if isinstance(parsed, list) and len(parsed) == 1 and isinstance(parsed[0], dict):
+        parsed = parsed[0]
+
+    return schema.model_validate(parsed)
+
+
+def _is_strict_json(raw: str) -> bool:
+    try:
+        json.loads(raw)
+        return True
+    except ValueError:
+        return False
+
+
+def _error_summary(err: Exception, limit: int = 600) -> str:
+    if isinstance(err, ValidationError):
+        lines = [
+            f"- {'.'.join(str(p) for p in e['loc']) or '<root>'}: {e['msg']}"
+            for e in err.errors()[:8]
+        ]
+        return "\n".join(lines)
+    return str(err).split("\nRAW OUTPUT:")[0][:limit]
+
+
+# ---------------------------------------------------------
+# FOLLOW-UP REQUESTS
+# ---------------------------------------------------------
+REPAIR_SYSTEM = """
+You repair JSON. Return ONLY the corrected JSON object that matches the
+schema. Keep the original content; fix only syntax and missing fields.
+"""
+
+
+def _continue(model: str, messages: List[Dict[str, str]], partial: str, options: Optional[Dict]) -> str:
+    # Ollama continues a trailing assistant message instead of starting a
+    # new reply. No `format` here: the grammar would force a fresh "{".
+    response = client.chat(
+        model=model,
+        messages=messages + [{"role": "assistant", "content": partial}],
+        options=options,
+    )
+    return partial + response["message"]["content"]
+
+
+def _repair(model: str, schema: Type[BaseModel], raw: str, err: Exception) -> str:
+    user = f"""
+Schema:
+{json.dumps(schema.model_json_schema())}
+
+Invalid JSON:
+{raw}
+
+Problems:
+{_error_summary(err)}
+"""
+    response = client.chat(
+        model=model,
+        messages=[
+            {"role": "system", "content": REPAIR_SYSTEM},
+            {"role": "user", "content": user},
+        ],
+        format=schema.model_json_schema(),
+        options={"temperature": 0},
+    )
+    return response["message"]["content"]
+
+
+# ---------------------------------------------------------
+# PUBLIC API
+# ---------------------------------------------------------
+def generate_structured(
+    node: str,
+    task: str,
+    system: str,
+    user: str,
+    schema: Type[BaseModel],
+    options: Optional[Dict[str, Any]] = None,
+    max_repairs: int = 1,
+    hedge: bool = False,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Generate a reply constrained to `schema` and return it as a dict.
+
+    The model comes from the router for `task` unless `model` is given.
+    `node` labels the parse stats. At most `max_repairs` follow-up LLM
+    requests are made; after that StructuredOutputError is raised.
+    `hedge` is forwarded to the backend pool for latency-sensitive calls.
+    """
+
+    model = model or router.select(task)
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+    response = client.chat(
+        model=model,
+        messages=messages,
+        format=schema.model_json_schema(),
+        options=options,
+        hedge=hedge,
+    )
+    raw = response["message"]["content"]
+    truncated = response.get("done_reason") == "length"
+    output_stats.incr(node, "calls")
+
+    try:
+        result = _validate(raw, schema)
+        if not _is_strict_json(raw):
+            output_stats.incr(node, "parse_failures")
+            output_stats.incr(node, "local_repairs")
+        return result.model_dump()
+    except ValueError as e:
+        err = e
+
+    output_stats.incr(node, "parse_failures")
+    logger.warning(f"⚠️ [{node}] invalid structured output from {model}: {_error_summary(err, 200)}")
+
+    for _ in range(max_repairs):
+        if truncated:
+            output_stats.incr(node, "continuations")
+            raw = _continue(model, messages, raw, options)
+            truncated = False
+        else:
+            output_stats.incr(node, "repair_requests")
+            raw = _repair(model, schema, raw, err)
+
+        try:
+            return _validate(raw, schema).model_dump()
+        except ValueError as e:
+            err = e
+
+    output_stats.incr(node, "failures")
+    raise StructuredOutputError(node, f"invalid output from {model}: {_error_summary(err, 200)}", raw)
+
+
+def stream_structured(
+    node: str,
+    task: str,
+    system: str,
+    user: str,
+    schema: Type[BaseModel],
+    on_item: Callable[[Dict[str, Any]], None],
+    item_depth: int = 2,
+    options: Optional[Dict[str, Any]] = None,
+    max_repairs: int = 1,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Streaming generate_structured(): `on_item` is called with every
+    container that completes at `item_depth` (e.g. each element of a
+    top-level list) while the rest of the reply is still being generated.
+    The full reply is validated at the end, with the same repair path.
+    """
+
+    model = model or router.select(task)
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+    scanner = JSONStreamScanner(item_depth=item_depth)
+    pieces = []
+    for piece in client.chat_stream(
+        model=model,
+        messages=messages,
+        format=schema.model_json_schema(),
+        options=options,
+    ):
+        pieces.append(piece)
+        scanner.feed(piece)
+        for item in scanner.pop_items():
+            if isinstance(item, dict):
+                on_item(item)
+
+    scanner.finish()
+    for item in scanner.pop_items():
+        if isinstance(item, dict):
+            on_item(item)
+
+    raw = "".join(pieces)
+    output_stats.incr(node, "calls")
+
+    try:
+        if scanner.result is None:
+            raise ValueError("no JSON value in streamed reply")
+        result = schema.model_validate(scanner.result)
+        if not _is_strict_json(raw):
+            output_stats.incr(node, "parse_failures")
+            output_stats.incr(node, "local_repairs")
+        return result.model_dump()
+    except ValueError as e:
+        err = e
+
+    output_stats.incr(node, "parse_failures")
+    logger.warning(f"⚠️ [{node}] invalid streamed output from {model}: {_error_summary(err, 200)}")
+
+    for _ in range(max_repairs):
+        output_stats.incr(node, "repair_requests")
+        raw = _repair(model, schema, raw, err)
+        try:
+            return _validate(raw, schema).model_dump()
+        except ValueError as e:
+            err = e
+
+    output_stats.incr(node, "failures")
+    raise StructuredOutputError(node, f"invalid output from {model}: {_error_summary(err, 200)}", raw)
@@ -1,20 +1,36 @@
+import asyncio
 import logging
 import json
+import os
+import sqlite3
+import time
 import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request
-from typing import Dict
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional, Tuple
 
 from schemas import (
     LearningPathCreateRequest,
+    LearningPathUpdateRequest,
     LearningPathResponse,
     TopicContentGenerateRequest,
-    TopicContentResponse
+    TopicContentResponse,
+    MiniQuizBatchRequest,
+    MiniQuizBatchResponse,
+    ArtifactLookupRequest,
+    ProfilingSettingsUpdate
 )
 
-from graphs.learning_path import learning_path_graph
-from graphs.content_gen import content_graph
-from graphs.quiz_gen import quiz_graph
+from graphs.loader import get_graph, readiness, warm_up_in_background
+from observability import metrics
+from observability.profiling import profiler
+from observability.tracing import span
+from stores.question_bank import content_hash
+from utils.admission import Rejected, build_controllers
+from utils.singleflight import SingleFlight, canonical_key
 
 
 # ---------------------------------------------------------
@@ -32,7 +48,292 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
-app = FastAPI(title="Cognigen AI Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Graphs, the FAISS index and the models load in the background, so
+    # the process is live at once and reports ready when warm. Models are
+    # preloaded so the first requests don't pay the cold-start cost;
+    # startup isn't blocked if an Ollama host is slow or down.
+    warm_up_in_background(preload_models=os.getenv("PRELOAD_ON_STARTUP", "1") != "0")
+    yield
+
+
+app = FastAPI(title="Cognigen AI Service", lifespan=lifespan)
+
+# Admin endpoints (and per-request profiling) are disabled until set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token == ADMIN_TOKEN
+
+
+def require_admin(token: Optional[str]):
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Sample this request's stacks when asked to (X-Profile: 1 with the
+    admin token) or when picked by automatic slow-request profiling.
+    """
+    explicit = request.headers.get("x-profile") == "1" and is_admin(request.headers.get("x-admin-token"))
+    # Automatic profiling is for the generation endpoints only
+    sampler = profiler.begin(explicit) if explicit or request.url.path.startswith("/api/") else None
+    if sampler is None:
+        return await call_next(request)
+
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        profile_id = profiler.end(
+            sampler, explicit,
+            route=getattr(request.scope.get("route"), "path", request.url.path),
+            method=request.method, status=status,
+            duration_ms=(time.perf_counter() - start) * 1000
+        )
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """
+    Request metrics, and the root span of the request's trace: a child of
+    the caller's span when the request carries a W3C traceparent header.
+    """
+    start = time.perf_counter()
+    status = 500
+    with span(
+        f"{request.method} {request.url.path}", kind="server",
+        traceparent=request.headers.get("traceparent"), method=request.method
+    ) as s:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if s is not None:
+                response.headers["traceparent"] = s.traceparent
+                response.headers["X-Trace-Id"] = s.trace_id
+            return response
+        finally:
+            # Route template, not the raw path, to keep label values bounded
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            if s is not None:
+                s.name = f"{request.method} {route}"
+                s.set_attribute("status", status)
+            metrics.HTTP_SECONDS.observe(
+                time.perf_counter() - start, route=route, method=request.method, status=status
+            )
+
+# Quiz graph runs allowed at once across all batch requests
+QUIZ_BATCH_CONCURRENCY = int(os.getenv("QUIZ_BATCH_CONCURRENCY", "4"))
+quiz_batch_semaphore = asyncio.Semaphore(QUIZ_BATCH_CONCURRENCY)
+
+# Identical generation requests in flight at the same time share one run
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "1") != "0"
+topic_content_flights = SingleFlight("topic_content")
+mini_quiz_flights = SingleFlight("mini_quiz")
+
+
+# Graph runs allowed at once per endpoint group, with a bounded wait
+# queue; over capacity, requests get a fast 429/503 instead of piling
+# onto Ollama
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") != "0"
+admission = build_controllers()
+
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, e: Rejected):
+    return JSONResponse(
+        status_code=e.status,
+        content={"detail": f"Service over capacity ({e.reason}), retry later"},
+        headers={"Retry-After": str(e.retry_after_s)},
+    )
+
+
+# LLM call priority of each endpoint group (llm/scheduler.py)
+GROUP_PRIORITY = {
+    "learning_path": "batch",
+    "topic_content": "standard",
+    "mini_quiz": "interactive",
+}
+
+
+def request_user(request: Request, user_id: Optional[str] = None) -> Optional[str]:
+    """Who the LLM calls are scheduled for: X-User-Id, else the body's user_id."""
+    return request.headers.get("x-user-id") or user_id
+
+
+async def admitted(group: str, fn, *args, user_id: Optional[str] = None):
+    """
+    Run fn(*args) in a worker thread once admission control lets it in.
+    Its LLM calls are scheduled with the group's priority, for user_id.
+    """
+    def run():
+        # Imported in the worker: the LLM client stack loads off the event loop
+        from llm.scheduler import llm_context
+
+        with llm_context(GROUP_PRIORITY[group], user_id):
+            return fn(*args)
+
+    if not ADMISSION_CONTROL:
+        return await asyncio.to_thread(run)
+    try:
+        async with admission[group].admit():
+            return await asyncio.to_thread(run)
+    except Rejected as e:
+        logger.warning(f"🚦 [{group}] Shed request ({e.reason}), retry after {e.retry_after_s}s")
+        metrics.ADMISSION_REJECTED.inc(group=group, reason=e.reason)
+        raise
+
+
+async def coalesced(flights: SingleFlight, key: Optional[str], fn, *args,
+                    user_id: Optional[str] = None):
+    """
+    Run fn(*args) through admission control (the flights name is the
+    admission group), shared with identical requests in flight (key=None:
+    not coalesced). Requests that join a run don't take a slot of their
+    own. Returns (result, coalesced).
+    """
+    if not REQUEST_COALESCING or key is None:
+        return await admitted(flights.name, fn, *args, user_id=user_id), False
+    return await flights.do(key, lambda: admitted(flights.name, fn, *args, user_id=user_id))
+
+
+def run_graph(graph: str, resumable_graph: Optional[str], payload: Dict, idempotency_key: Optional[str],
+              namespace: str, response: Optional[Response], deadline_ms: Optional[int] = None) -> Dict:
+    """
+    Plain run, or with an Idempotency-Key a checkpointed one that resumes
+    a failed attempt (and replays a finished one) for the same key.
+    With a deadline, nodes degrade as time runs out; the degradations
+    applied are reported in X-Degradations (when there is a response).
+    """
+    from graphs.checkpointing import invoke_resumable
+    from graphs.deadline import deadline_after, request_deadline
+
+    deadline = deadline_after(deadline_ms)
+
+    with request_deadline(deadline):
+        if not idempotency_key:
+            result = get_graph(graph).invoke({**payload, "deadline": deadline})
+        else:
+            result, report = invoke_resumable(
+                get_graph(resumable_graph), payload, idempotency_key, namespace,
+                extra_state={"deadline": deadline}
+            )
+            response.headers["X-Resumed"] = str(report["resumed"]).lower()
+            response.headers["X-LLM-Calls"] = str(report["llm_calls"])
+            response.headers["X-LLM-Calls-Saved"] = str(report["llm_calls_saved"])
+
+    degradations = result.get("degradations") or []
+    if degradations:
+        logger.warning(f"⏱️ [{namespace}] Degraded response: {degradations}")
+        if response is not None:
+            response.headers["X-Degradations"] = ",".join(degradations)
+    return result
+
+
+# Generated artifacts are stored by a hash of their inputs; requests with
+# `X-Artifact-Reuse: if-present` are served from the store when possible.
+# These helpers import graph modules and touch SQLite: async endpoints
+# call them with asyncio.to_thread.
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "1") != "0"
+
+
+def artifact_inputs(kind: str, payload: Dict) -> Dict:
+    """The fields of a validated request body that its artifact depends on."""
+    if kind == "learning_path":
+        return {k: v for k, v in payload.items() if k != "deadline_ms"}
+    if kind == "topic_content":
+        from graphs.content_gen import generation_inputs
+        return generation_inputs(payload)
+    return {"content_hash": content_hash(payload.get("cells") or [])}
+
+
+def lookup_artifact(kind: str, inputs: Dict, reuse: Optional[str],
+                    response: Optional[Response] = None) -> Tuple[Optional[str], Any]:
+    """(artifact key, stored artifact if reuse was asked for and it exists)."""
+    if not ARTIFACT_STORE:
+        return None, None
+    from stores.artifacts import artifact_key, artifacts
+
+    key = artifact_key(kind, inputs)
+    if response is not None:
+        response.headers["X-Artifact-Key"] = key
+    if (reuse or "").lower() != "if-present":
+        return key, None
+    try:
+        artifact = artifacts.get(key)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Artifact lookup failed: {e}")
+        return key, None
+    if artifact is not None:
+        logger.info(f"📦 [{kind}] Served from stored artifact {key[:12]}")
+        if response is not None:
+            response.headers["X-Artifact-Reused"] = "true"
+    return key, artifact
+
+
+def save_artifact(key: Optional[str], kind: str, inputs: Dict, artifact: Any):
+    """Store a generated artifact; a storage failure never fails the request."""
+    if key is None:
+        return
+    from stores.artifacts import artifacts
+
+    try:
+        artifacts.put(key, kind, inputs, artifact)
+    except sqlite3.Error as e:
+        logger.error(f"❌ Could not store artifact {key[:12]}: {e}")
+
+
+def label_contents(contents: List[Dict], submodules: List[Dict]) -> List[Dict]:
+    """
+    One content item per submodule in this request's order, labelled with
+    its own submodule ids. Stored and shared results may list the same
+    submodules in another order (learning styles order them differently).
+    """
+    by_submodule = {}
+    for content in contents:
+        by_submodule.setdefault((content.get("title"), content.get("summary", "")), []).append(content)
+
+    labelled = []
+    for sm in submodules:
+        matches = by_submodule.get((sm.get("title"), sm.get("summary", "")))
+        if not matches:
+            raise ValueError(f"No content generated for submodule {sm.get('id')}")
+        labelled.append({**matches.pop(0), "id": sm.get("id")})
+    return labelled
+
+
+def warm_question_banks(contents: List[Dict]):
+    """Start background question bank builds for generated submodule content."""
+    from graphs.quiz_gen import warm_question_bank
+
+    for content in contents:
+        warm_question_bank(content.get("cells", []))
+
+
+def request_deadline_ms(field_ms: Any, header_ms: Optional[str]) -> Optional[int]:
+    """Budget from the request body, else the X-Request-Deadline-Ms header."""
+    # Untyped bodies (the mini quiz) pass the field through unvalidated
+    if field_ms is not None:
+        if isinstance(field_ms, bool) or not isinstance(field_ms, int) or field_ms <= 0:
+            raise HTTPException(status_code=400, detail="deadline_ms must be a positive integer")
+        return field_ms
+    try:
+        deadline_ms = int(header_ms) if header_ms else None
+    except ValueError:
+        deadline_ms = 0
+    if deadline_ms is not None and deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="X-Request-Deadline-Ms must be a positive integer")
+    return deadline_ms
 
 
 @app.get("/health")
@@ -41,20 +342,198 @@ def health():
     return {"status": "ok", "time": datetime.utcnow().isoformat()}
 
 
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving; says nothing about warm-up."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness_check(response: Response):
+    """503 until the graphs and the FAISS index are loaded."""
+    state = readiness.snapshot()
+    if not state["ready"]:
+        response.status_code = 503
+    return {"status": "ready" if state["ready"] else "warming_up", **state}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Node, LLM, vector search, provider and HTTP metrics (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/admin/profiling")
+def get_profiling_settings(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return profiler.settings()
+
+
+@app.put("/admin/profiling")
+def update_profiling_settings(payload: ProfilingSettingsUpdate, x_admin_token: Optional[str] = Header(None)):
+    """Turn automatic slow-request profiling on/off and tune its limits."""
+    require_admin(x_admin_token)
+    return profiler.configure(**payload.dict())
+
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    return {"profiles": profiler.list()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Profile metadata and the functions with the most self time."""
+    require_admin(x_admin_token)
+    meta = profiler.get(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return meta
+
+
+@app.get("/admin/profiles/{profile_id}/download", response_class=PlainTextResponse)
+def download_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks, for flamegraph.pl or speedscope."""
+    require_admin(x_admin_token)
+    stacks = profiler.read(profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        stacks, headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+    )
+
+
+@app.get("/diagnostics/llm-output")
+def llm_output_diagnostics():
+    """Per-node parse-failure and retry rates of structured LLM output."""
+    from llm.structured import get_output_stats
+    return {"nodes": get_output_stats()}
+
+
+@app.get("/diagnostics/backends")
+def backend_diagnostics():
+    """Ollama backend pool: health, outstanding requests, hedging."""
+    from llm.pool import get_pool
+    return get_pool().snapshot()
+
+
+@app.get("/diagnostics/models")
+def model_diagnostics():
+    """Model residency per backend, keep_alive traffic and load times."""
+    from llm.lifecycle import lifecycle
+    return lifecycle.snapshot()
+
+
+@app.get("/diagnostics/routing")
+def routing_diagnostics():
+    """Model tiers per task, observed tokens/sec and routing decisions."""
+    from llm.router import router
+    return router.snapshot()
+
+
+@app.get("/diagnostics/scheduler")
+def scheduler_diagnostics():
+    """LLM call slots in use, queued calls and waits per priority class."""
+    from llm.scheduler import scheduler
+    return scheduler.snapshot()
+
+
+@app.get("/diagnostics/coalescing")
+def coalescing_diagnostics():
+    """Graph runs started vs. requests that joined an identical run in flight."""
+    return {
+        "enabled": REQUEST_COALESCING,
+        "topic_content": topic_content_flights.snapshot(),
+        "mini_quiz": mini_quiz_flights.snapshot(),
+    }
+
+
+@app.get("/diagnostics/admission")
+def admission_diagnostics():
+    """Per-group concurrency limit, queue depth and shed requests."""
+    return {
+        "enabled": ADMISSION_CONTROL,
+        **{group: controller.snapshot() for group, controller in admission.items()},
+    }
+
+
+# ---------------------------------------------------------
+# STORED ARTIFACTS
+# ---------------------------------------------------------
+@app.get("/api/artifacts")
+def list_artifacts(kind: Optional[str] = None, limit: int = 50):
+    """Most recent stored artifacts (metadata only) and totals per kind."""
+    from stores.artifacts import artifacts
+    return {"artifacts": artifacts.list(kind, min(max(limit, 1), 500)), "stats": artifacts.stats()}
+
+
+@app.get("/api/artifacts/{key}")
+def get_artifact(key: str):
+    from stores.artifacts import artifacts
+    meta = artifacts.describe(key)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return {**meta, "artifact": artifacts.get(key)}
+
+
+@app.post("/api/artifacts/lookup")
+def lookup_artifact_by_request(payload: ArtifactLookupRequest):
+    """
+    The stored artifact a generation request body would produce, without
+    generating anything: 404 when it has not been generated yet.
+    """
+    models = {
+        "learning_path": LearningPathCreateRequest,
+        "topic_content": TopicContentGenerateRequest,
+    }
+    body = payload.payload
+    if payload.kind in models:
+        try:
+            body = models[payload.kind](**body).dict()
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors())
+
+    key, artifact = lookup_artifact(payload.kind, artifact_inputs(payload.kind, body), "if-present")
+    if artifact is None:
+        raise HTTPException(status_code=404, detail={"message": "Artifact not found", "key": key})
+    from stores.artifacts import artifacts
+    return {**artifacts.describe(key), "artifact": artifact}
+
+
 # ---------------------------------------------------------
 # LEARNING PATH GENERATION
 # ---------------------------------------------------------
 @app.post("/api/generate-learning-path", response_model=LearningPathResponse)
-async def generate_learning_path(payload: LearningPathCreateRequest, request: Request):
+async def generate_learning_path(
+    payload: LearningPathCreateRequest,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    x_request_deadline_ms: Optional[str] = Header(None),
+    x_artifact_reuse: Optional[str] = Header(None)
+):
     start_time = datetime.utcnow()
 
+    deadline_ms = request_deadline_ms(payload.deadline_ms, x_request_deadline_ms)
+
     logger.info("📥 Received Learning Path Request")
     logger.info(f"➡ Endpoint: {request.url.path}")
     logger.info(f"➡ Payload: {json.dumps(payload.dict(), indent=2)}")
 
     try:
+        graph_payload = payload.dict(exclude={"deadline_ms"})
+        inputs = artifact_inputs("learning_path", graph_payload)
+        key, stored = await asyncio.to_thread(lookup_artifact, "learning_path", inputs, x_artifact_reuse, response)
+        if stored is not None:
+            return stored
+
         logger.info("⚙️ Running Learning Path Graph...")
-        result = learning_path_graph.invoke(payload.dict())
+        result = await admitted(
+            "learning_path", run_graph, "learning_path", "learning_path_resumable",
+            graph_payload, idempotency_key, "learning_path", response,
+            deadline_ms, user_id=request_user(request, payload.user_id)
+        )
         logger.info("✅ Graph Execution Completed")
 
         path = result.get("learning_path")
@@ -62,12 +541,19 @@ async def generate_learning_path(payload: LearningPathCreateRequest, request: Re
         if not path:
             raise ValueError("Graph returned no result")
 
+        # A path cut short to meet a deadline is not what the inputs ask for
+        if not result.get("degradations"):
+            await asyncio.to_thread(save_artifact, key, "learning_path", inputs, path)
+
         exec_time = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⏳ Learning Path generation took {exec_time} seconds")
         logger.info("📤 Sending Learning Path Response")
 
         return path
 
+    except Rejected:
+        raise
+
     except Exception as e:
         logger.error("❌ Error during learning path generation")
         logger.error(f"Exception: {str(e)}")
@@ -79,27 +565,114 @@ async def generate_learning_path(payload: LearningPathCreateRequest, request: Re
         )
 
 
+@app.post("/api/update-learning-path", response_model=LearningPathResponse)
+async def update_learning_path(
+    payload: LearningPathUpdateRequest,
+    request: Request,
+    response: Response,
+    x_request_deadline_ms: Optional[str] = Header(None)
+):
+    start_time = datetime.utcnow()
+
+    deadline_ms = request_deadline_ms(payload.deadline_ms, x_request_deadline_ms)
+    changes = payload.dict(exclude={"learning_path", "deadline_ms"}, exclude_none=True)
+
+    logger.info("📥 Received Learning Path Update Request")
+    logger.info(f"➡ Endpoint: {request.url.path}")
+    logger.info(f"➡ Path: {payload.learning_path.id}  Changes: {json.dumps(changes, indent=2)}")
+
+    try:
+        logger.info("⚙️ Running Learning Path Update Graph...")
+        result = await admitted(
+            "learning_path", run_graph, "learning_path_update", None,
+            {"learning_path": payload.learning_path.dict(), "changes": changes},
+            None, "learning_path_update", response, deadline_ms,
+            user_id=request_user(request, payload.learning_path.student_profile.user_id)
+        )
+        logger.info("✅ Graph Execution Completed")
+
+        exec_time = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(f"⏳ Learning Path update took {exec_time} seconds")
+        logger.info("📤 Sending Updated Learning Path Response")
+
+        return result["learning_path"]
+
+    except Rejected:
+        raise
+
+    except Exception as e:
+        logger.error("❌ Error during learning path update")
+        logger.error(f"Exception: {str(e)}")
+        logger.error(traceback.format_exc())
+
+        raise HTTPException(
+            status_code=500,
+            detail=f"Learning path update failed: {str(e)}"
+        )
+
+
 # ---------------------------------------------------------
 # TOPIC CONTENT GENERATION
 # ---------------------------------------------------------
 @app.post("/api/generate-topic-content", response_model=TopicContentResponse)
-async def generate_topic_content(payload: TopicContentGenerateRequest, request: Request):
+async def generate_topic_content(
+    payload: TopicContentGenerateRequest,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    x_request_deadline_ms: Optional[str] = Header(None),
+    x_artifact_reuse: Optional[str] = Header(None)
+):
     start_time = datetime.utcnow()
 
+    deadline_ms = request_deadline_ms(payload.deadline_ms, x_request_deadline_ms)
+
     logger.info("📥 Received Topic Content Request")
     logger.info(f"➡ Endpoint: {request.url.path}")
     logger.info(f"➡ Payload: {json.dumps(payload.dict(), indent=2)}")
 
     try:
         logger.info("⚙️ Running Content Generation Graph...")
-        result = content_graph.invoke(payload.dict())
-        logger.info("✅ Graph Execution Completed")
+        graph_payload = payload.dict(exclude={"deadline_ms"})
+        inputs = await asyncio.to_thread(artifact_inputs, "topic_content", graph_payload)
+        artifact_key, result = await asyncio.to_thread(
+            lookup_artifact, "topic_content", inputs, x_artifact_reuse, response
+        )
+
+        if result is None:
+            # Checkpointed runs and runs with their own deadline are not
+            # shared; the others by their generation inputs (the artifact inputs)
+            key = None if idempotency_key or deadline_ms else canonical_key(inputs)
+            result, joined = await coalesced(
+                topic_content_flights, key, run_graph,
+                "topic_content", "topic_content_resumable",
+                graph_payload, idempotency_key, "topic_content", response, deadline_ms,
+                user_id=request_user(request)
+            )
+            if joined:
+                response.headers["X-Coalesced"] = "true"
+            logger.info("✅ Graph Execution Completed")
+
+            if result.get("topic_content") and not result.get("degradations") and not joined:
+                await asyncio.to_thread(save_artifact, artifact_key, "topic_content", inputs, {
+                    "topic_content": result["topic_content"],
+                    "summary": result.get("summary", {}),
+                })
 
         contents = result.get("topic_content")
 
         if not contents:
             raise ValueError("No content generated")
 
+        contents = label_contents(contents, payload.submodules)
+
+        # Build question banks now so the mini-quiz requests that follow
+        # are served from the bank without waiting on the LLM (never from
+        # placeholder or otherwise degraded content)
+        if (not payload.include_quiz and not result.get("degradations")
+                and os.getenv("QUESTION_BANK_PREWARM", "1") != "0"):
+            await asyncio.to_thread(warm_question_banks, contents)
+
         exec_time = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⏳ Topic Content generation took {exec_time} seconds")
         logger.info("📤 Sending Topic Content Response")
@@ -108,9 +681,15 @@ async def generate_topic_content(payload: TopicContentGenerateRequest, request:
             "topic_id": payload.topic_id,
             "topic_name": payload.topic_name,
             "content": contents,
-            "summary": result.get("summary", {})
+            "summary": {
+                **result.get("summary", {}),
+                **({"degradations": result["degradations"]} if result.get("degradations") else {})
+            }
         }
 
+    except Rejected:
+        raise
+
     except Exception as e:
         logger.error("❌ Error during content generation")
         logger.error(f"Exception: {str(e)}")
@@ -126,27 +705,50 @@ async def generate_topic_content(payload: TopicContentGenerateRequest, request:
 # MINI QUIZ GENERATION
 # ---------------------------------------------------------
 @app.post("/api/generate-mini-quiz")
-async def generate_mini_quiz(payload: Dict, request: Request):
+async def generate_mini_quiz(
+    payload: Dict,
+    request: Request,
+    response: Response,
+    x_request_deadline_ms: Optional[str] = Header(None),
+    x_artifact_reuse: Optional[str] = Header(None)
+):
     start_time = datetime.utcnow()
 
+    deadline_ms = request_deadline_ms(payload.get("deadline_ms"), x_request_deadline_ms)
+
     logger.info("📥 Received Mini Quiz Generation Request")
     logger.info(f"➡ Endpoint: {request.url.path}")
     logger.info(f"➡ Payload: {json.dumps(payload, indent=2)}")
 
     try:
-        logger.info("⚙️ Running Mini Quiz Graph...")
-        result = quiz_graph.invoke(payload)
-        logger.info("✅ Mini Quiz Graph Execution Completed")
+        inputs = artifact_inputs("mini_quiz", payload)
+        key, result = await asyncio.to_thread(lookup_artifact, "mini_quiz", inputs, x_artifact_reuse, response)
+
+        if result is None:
+            logger.info("⚙️ Running Mini Quiz Graph...")
+            graph_payload = {k: v for k, v in payload.items() if k != "deadline_ms"}
+            # Runs with their own deadline are not shared
+            result, joined = await coalesced(
+                mini_quiz_flights, None if deadline_ms else inputs["content_hash"],
+                run_graph, "mini_quiz", None, graph_payload, None, "mini_quiz", response, deadline_ms,
+                user_id=request_user(request, payload.get("user_id"))
+            )
+            logger.info("✅ Mini Quiz Graph Execution Completed")
+            if result.get("quiz") and not result.get("degradations") and not joined:
+                await asyncio.to_thread(save_artifact, key, "mini_quiz", inputs, {"quiz": result["quiz"]})
 
         exec_time = (datetime.utcnow() - start_time).total_seconds()
         logger.info(f"⏳ Mini Quiz generation took {exec_time} seconds")
         logger.info("📤 Sending Mini Quiz Response")
 
         return {
-        "submodule_id": result.get("submodule_id"),
+        "submodule_id": payload.get("submodule_id"),
         "quiz": result.get("quiz", [])
     }
 
+    except Rejected:
+        raise
+
     except Exception as e:
         logger.error("❌ Error during mini quiz generation")
         logger.error(f"Exception: {str(e)}")
@@ -158,6 +760,63 @@ async def generate_mini_quiz(payload: Dict, request: Request):
         )
 
 
+@app.post("/api/generate-mini-quiz/batch", response_model=MiniQuizBatchResponse)
+async def generate_mini_quiz_batch(
+    payload: MiniQuizBatchRequest,
+    request: Request,
+    x_request_deadline_ms: Optional[str] = Header(None),
+    x_artifact_reuse: Optional[str] = Header(None)
+):
+    start_time = datetime.utcnow()
+
+    logger.info("📥 Received Mini Quiz Batch Request")
+    logger.info(f"➡ Endpoint: {request.url.path}")
+    logger.info(f"➡ Items: {[item.submodule_id for item in payload.items]}")
+
+    deadline_ms = request_deadline_ms(payload.deadline_ms, x_request_deadline_ms)
+    started = time.monotonic()
+
+    def left_ms() -> Optional[int]:
+        # The items share the batch's budget: each gets what is left of it
+        if not deadline_ms:
+            return None
+        return max(1, deadline_ms - int((time.monotonic() - started) * 1000))
+
+    async def run_one(item):
+        async with quiz_batch_semaphore:
+            try:
+                inputs = artifact_inputs("mini_quiz", item.dict())
+                key, result = await asyncio.to_thread(lookup_artifact, "mini_quiz", inputs, x_artifact_reuse)
+                if result is None:
+                    result, joined = await coalesced(
+                        mini_quiz_flights, None if deadline_ms else inputs["content_hash"],
+                        run_graph, "mini_quiz", None, item.dict(), None, "mini_quiz", None, left_ms(),
+                        user_id=request_user(request)
+                    )
+                    if result.get("quiz") and not result.get("degradations") and not joined:
+                        await asyncio.to_thread(save_artifact, key, "mini_quiz", inputs, {"quiz": result["quiz"]})
+                return {"submodule_id": item.submodule_id, "quiz": result.get("quiz", [])}
+            except Exception as e:
+                # One bad submodule must not fail the whole batch
+                logger.error(f"❌ Mini quiz failed for {item.submodule_id}: {str(e)}")
+                return {"submodule_id": item.submodule_id, "error": str(e)}
+
+    logger.info(f"⚙️ Running Mini Quiz Graph for {len(payload.items)} submodules...")
+    results = await asyncio.gather(*(run_one(item) for item in payload.items))
+
+    failed = sum(1 for r in results if r.get("error"))
+
+    exec_time = (datetime.utcnow() - start_time).total_seconds()
+    logger.info(f"⏳ Mini Quiz batch took {exec_time} seconds ({failed} failed)")
+    logger.info("📤 Sending Mini Quiz Batch Response")
+
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }
+
+
 
 
 # cognigen-ai-service/
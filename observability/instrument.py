@@ -0,0 +1,41 @@
+# ---------------------------------------------------------
+# observability/instrument.py — metrics + spans in one wrapper
+# ---------------------------------------------------------
+
+import functools
+from typing import Callable
+
+from observability.metrics import NODE_SECONDS, PROVIDER_RESULTS, PROVIDER_SECONDS
+from observability.tracing import span
+
+
+def instrument_node(graph: str, name: str, node: Callable) -> Callable:
+    """Wrap a graph node: a span per run, duration in NODE_SECONDS."""
+
+    @functools.wraps(node)
+    def wrapper(state):
+        with span(f"{graph}.{name}", graph=graph, node=name), \
+                NODE_SECONDS.time(graph=graph, node=name):
+            return node(state)
+
+    return wrapper
+
+
+def instrument_provider(provider: str) -> Callable:
+    """Decorator for provider lookups returning a list of results."""
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(f"provider.{provider}", kind="client", provider=provider) as s, \
+                    PROVIDER_SECONDS.time(provider=provider):
+                results = fn(*args, **kwargs)
+                if s is not None:
+                    s.set_attribute("results", len(results or []))
+            if results:
+                PROVIDER_RESULTS.inc(len(results), provider=provider)
+            return results
+
+        return wrapper
+
+    return decorate
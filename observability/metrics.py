@@ -0,0 +1,245 @@
+# ---------------------------------------------------------
+# observability/metrics.py — counters and histograms for /metrics
+# ---------------------------------------------------------
+# A small in-process registry rendered in the Prometheus text format
+# (version 0.0.4). Recording is a dict lookup and a few additions under
+# a per-metric lock, so it can sit on every node and LLM call.
+#
+# What is measured:
+#   - every LangGraph node (graph, node, outcome)
+#   - every LLM call: latency, prompt/eval tokens, tokens/sec (model)
+#   - the LLM call scheduler: queue depth, wait time (priority), in flight
+#   - vector search and external providers (DuckDuckGo, YouTube)
+#   - requests shed by admission control (endpoint group, reason)
+#   - HTTP requests (route template, method, status)
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TPS_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last = +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block; outcome="error" if it raises."""
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            if "outcome" in self.labelnames:
+                labels["outcome"] = outcome
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------------------------------------------------------
+# METRICS
+# ---------------------------------------------------------
+NODE_SECONDS = Histogram(
+    "cognigen_graph_node_duration_seconds", "Time spent in a LangGraph node.",
+    ("graph", "node", "outcome"),
+)
+LLM_SECONDS = Histogram(
+    "cognigen_llm_request_duration_seconds", "Wall time of one LLM call, end to end.",
+    ("model", "mode", "outcome"),
+)
+LLM_PROMPT_TOKENS = Counter(
+    "cognigen_llm_prompt_tokens_total", "Prompt tokens evaluated by Ollama.", ("model",),
+)
+LLM_EVAL_TOKENS = Counter(
+    "cognigen_llm_eval_tokens_total", "Tokens generated by Ollama.", ("model",),
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "cognigen_llm_tokens_per_second", "Generation speed reported by Ollama (eval_count / eval_duration).",
+    ("model",), buckets=TPS_BUCKETS,
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "cognigen_llm_queue_depth", "LLM calls waiting for a scheduler slot.", ("priority",),
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "cognigen_llm_queue_wait_seconds", "Time an LLM call waited for a scheduler slot.", ("priority",),
+)
+LLM_IN_FLIGHT = Gauge(
+    "cognigen_llm_in_flight", "LLM calls holding a scheduler slot.",
+)
+VECTOR_SEARCH_SECONDS = Histogram(
+    "cognigen_vector_search_duration_seconds", "FAISS vector search latency.", ("outcome",),
+)
+PROVIDER_SECONDS = Histogram(
+    "cognigen_provider_duration_seconds", "External resource provider call latency.",
+    ("provider", "outcome"),
+)
+PROVIDER_RESULTS = Counter(
+    "cognigen_provider_results_total", "Results returned by external resource providers.", ("provider",),
+)
+ADMISSION_REJECTED = Counter(
+    "cognigen_admission_rejected_total", "Requests shed by admission control.", ("group", "reason"),
+)
+HTTP_SECONDS = Histogram(
+    "cognigen_http_request_duration_seconds", "HTTP request latency by route.",
+    ("route", "method", "status"),
+)
+
+
+# ---------------------------------------------------------
+# INSTRUMENTATION HELPERS
+# ---------------------------------------------------------
+def observe_llm_response(model: str, response):
+    """Token counts and tokens/sec from an Ollama response (or final stream chunk)."""
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    eval_tokens = response.get("eval_count") or 0
+    duration_ns = response.get("eval_duration") or 0
+
+    if prompt_tokens:
+        LLM_PROMPT_TOKENS.inc(prompt_tokens, model=model)
+    if eval_tokens:
+        LLM_EVAL_TOKENS.inc(eval_tokens, model=model)
+        if duration_ns > 0:
+            LLM_TOKENS_PER_SECOND.observe(eval_tokens / (duration_ns / 1e9), model=model)
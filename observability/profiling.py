@@ -0,0 +1,229 @@
+# ---------------------------------------------------------
+# observability/profiling.py — on-demand request profiles
+# ---------------------------------------------------------
+# A sampling profiler: while a profiled request runs, a background thread
+# records the Python stack of every thread (LangGraph nodes run in worker
+# threads, so profiling only the request's own thread would miss most of
+# the work) every PROFILE_INTERVAL_S. Idle threads, the ones blocked in a
+# lock, queue or selector wait, are left out, so the profile shows where
+# CPU time goes: JSON extraction, pydantic validation, BeautifulSoup,
+# logging, ...
+#
+# A request is profiled when
+#   - it carries `X-Profile: 1` (with the admin token), or
+#   - automatic mode is on and it is picked by `sample_rate`; its profile
+#     is kept only if the request took longer than `slow_threshold_ms`.
+# At most one profile runs at a time and at most `max_per_minute` start
+# per minute, which bounds the overhead when left on in production.
+#
+# Profiles are saved as collapsed stacks ("thread;outer;inner count"
+# lines), the input format of flamegraph.pl and speedscope.
+
+import collections
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("cognigen-ai-service")
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "stores/data/profiles")
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_S", "0.01"))
+PROFILE_MAX_S = float(os.getenv("PROFILE_MAX_S", "120"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# (file suffix, function) pairs whose frames mean "this thread is waiting"
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("threading.py", "_wait_for_tstate_lock"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+class StackSampler:
+    """Collects collapsed stacks of all other threads until stopped."""
+
+    def __init__(self, interval_s: float = PROFILE_INTERVAL_S, max_s: float = PROFILE_MAX_S):
+        self.interval_s = interval_s
+        self.max_s = max_s
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        give_up = time.monotonic() + self.max_s
+        while not self._stop.wait(self.interval_s) and time.monotonic() < give_up:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def top(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Functions with the most samples at the top of the stack (self time)."""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": fn, "samples": n, "share": round(n / total, 3)}
+            for fn, n in leaves.most_common(limit)
+        ]
+
+
+class Profiler:
+    def __init__(self, directory: str = PROFILE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._active = False
+        self._starts: collections.deque = collections.deque()
+        self._index: collections.OrderedDict = collections.OrderedDict()
+
+        self.auto_enabled = os.getenv("PROFILE_AUTO", "0") == "1"
+        self.slow_threshold_ms = int(os.getenv("PROFILE_SLOW_THRESHOLD_MS", "10000"))
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+        self.max_per_minute = int(os.getenv("PROFILE_MAX_PER_MINUTE", "2"))
+
+    # ---------------- config ----------------
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "auto_enabled": self.auto_enabled,
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "sample_rate": self.sample_rate,
+            "max_per_minute": self.max_per_minute,
+        }
+
+    def configure(self, **changes) -> Dict[str, Any]:
+        with self._lock:
+            for key, value in changes.items():
+                if value is not None and key in self.settings():
+                    setattr(self, key, value)
+        logger.info(f"🔬 Profiling settings: {self.settings()}")
+        return self.settings()
+
+    # ---------------- per request ----------------
+    def begin(self, explicit: bool) -> Optional[StackSampler]:
+        """A running sampler when this request should be profiled, else None."""
+        if not explicit and (not self.auto_enabled or random.random() >= self.sample_rate):
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            while self._starts and now - self._starts[0] > 60:
+                self._starts.popleft()
+            if self._active or len(self._starts) >= self.max_per_minute:
+                return None
+            self._active = True
+            self._starts.append(now)
+
+        sampler = StackSampler()
+        sampler.start()
+        return sampler
+
+    def end(self, sampler: StackSampler, explicit: bool, route: str, method: str,
+            status: int, duration_ms: float) -> Optional[str]:
+        """Stop sampling; returns the profile id when the profile is kept."""
+        sampler.stop()
+        with self._lock:
+            self._active = False
+
+        if not explicit and duration_ms < self.slow_threshold_ms:
+            return None
+        return self._save(sampler, {
+            "trigger": "header" if explicit else "slow_request",
+            "route": route,
+            "method": method,
+            "status": status,
+            "duration_ms": round(duration_ms, 1),
+        })
+
+    # ---------------- storage ----------------
+    def _save(self, sampler: StackSampler, meta: Dict[str, Any]) -> Optional[str]:
+        profile_id = uuid.uuid4().hex[:12]
+        meta = {
+            "id": profile_id,
+            **meta,
+            "samples": sampler.samples,
+            "interval_ms": sampler.interval_s * 1000,
+            "created_at": datetime.utcnow().isoformat(),
+            "top": sampler.top(),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(profile_id), "w", encoding="utf-8") as f:
+                f.write(sampler.collapsed())
+        except OSError as e:
+            logger.error(f"❌ Could not save profile: {e}")
+            return None
+
+        with self._lock:
+            self._index[profile_id] = meta
+            while len(self._index) > PROFILE_KEEP:
+                old, _ = self._index.popitem(last=False)
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+        logger.info(f"🔬 Saved profile {profile_id} ({meta['trigger']}, {meta['route']}, {meta['duration_ms']} ms)")
+        return profile_id
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.folded")
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {k: v for k, v in meta.items() if k != "top"}
+                for meta in reversed(self._index.values())
+            ]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._index.get(profile_id)
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if self.get(profile_id) is None:
+            return None
+        try:
+            with open(self._path(profile_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+profiler = Profiler()
@@ -0,0 +1,324 @@
+# ---------------------------------------------------------
+# observability/tracing.py — request-scoped spans
+# ---------------------------------------------------------
+# Spans follow the OpenTelemetry data model (128-bit trace id, 64-bit
+# span ids, W3C `traceparent` propagation) without requiring the SDK.
+# The current span lives in a ContextVar, so spans opened in LangGraph
+# node threads, or in workers started with contextvars.copy_context(),
+# nest under the request that caused them. Parallel nodes show up as
+# overlapping siblings.
+#
+# Finished spans are exported in batches from a background thread:
+#   - to an OTLP/HTTP collector (JSON encoding) when
+#     OTEL_EXPORTER_OTLP_ENDPOINT is set; a batch the collector does
+#     not take is written to the JSONL file instead
+#   - otherwise to TRACE_FILE, one span per line, for offline inspection;
+#     the file is rotated at TRACE_FILE_MAX_BYTES, keeping
+#     TRACE_FILE_BACKUPS older files (traces.jsonl.1, .2, ...)
+# TRACE_EXPORTER=none turns tracing off.
+#
+# Only TRACE_SAMPLE_RATE of new traces are exported (head sampling on the
+# trace id, like OTel's TraceIdRatioBased). A request with a traceparent
+# follows the caller's sampled flag. Unsampled spans are still created,
+# so context and response headers work the same; they are just not
+# exported.
+
+import atexit
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("cognigen-ai-service")
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "cognigen-ai-service")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").rstrip("/")
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "otlp" if OTLP_ENDPOINT else "jsonl")
+TRACE_FILE = os.getenv("TRACE_FILE", "stores/data/traces.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_FILE_BACKUPS = int(os.getenv("TRACE_FILE_BACKUPS", "3"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+
+EXPORT_BATCH = 256
+EXPORT_INTERVAL_S = 1.0
+EXPORT_QUEUE_MAX = 10000
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error", "thread")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = "internal", attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "thread": self.thread,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "service": SERVICE_NAME,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent, or None."""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def should_sample(trace_id: str, rate: Optional[float] = None) -> bool:
+    """Sampling decision for a new trace: the same for the same trace id."""
+    rate = TRACE_SAMPLE_RATE if rate is None else rate
+    return int(trace_id[-16:], 16) < rate * (1 << 64)
+
+
+def start_span(name: str, kind: str = "internal", traceparent: Optional[str] = None,
+               **attributes) -> Optional[Span]:
+    """
+    Child of the current span; a new trace when there is none. A valid
+    `traceparent` (incoming request header) makes the span a child of the
+    caller's span instead. The span is not made current: use span() for
+    that, or this for work that outlives a block (e.g. a generator).
+    """
+    if not TRACING_ENABLED:
+        return None
+
+    remote = parse_traceparent(traceparent) if traceparent else None
+    parent = _current.get()
+    if remote:
+        return Span(name, remote[0], remote[1], remote[2], kind, attributes)
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+    trace_id = f"{random.getrandbits(128):032x}"
+    return Span(name, trace_id, None, should_sample(trace_id), kind, attributes)
+
+
+def end_span(s: Optional[Span], error: Optional[BaseException] = None):
+    if s is None:
+        return
+    if error is not None:
+        s.error = f"{type(error).__name__}: {error}"
+    s.end_ns = time.time_ns()
+    if s.sampled:
+        _exporter.submit(s)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", traceparent: Optional[str] = None, **attributes):
+    """start_span() as the current span for the duration of the block."""
+    s = start_span(name, kind, traceparent, **attributes)
+    if s is None:
+        yield None
+        return
+
+    token = _current.set(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        end_span(s, error)
+
+
+def traced(name: str, **attributes) -> Callable:
+    """Decorator: run the function inside a span."""
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+# ---------------------------------------------------------
+# EXPORT
+# ---------------------------------------------------------
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def _otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "cognigen"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_id or "",
+                        "name": s.name,
+                        "kind": _OTLP_KINDS.get(s.kind, 1),
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [
+                            {"key": k, "value": _otlp_value(v)}
+                            for k, v in {**s.attributes, "thread.name": s.thread}.items()
+                        ],
+                        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]
+    }
+
+
+class SpanExporter:
+    def __init__(self, exporter: str = TRACE_EXPORTER, path: str = TRACE_FILE, endpoint: str = OTLP_ENDPOINT):
+        self.exporter = exporter
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=EXPORT_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, s: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            # Never block a request on the exporter
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EXPORT_INTERVAL_S
+            while len(batch) < EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            self._export(batch)
+
+    def flush(self):
+        """Export whatever is queued now (used at exit and by tests/tools)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._export(batch)
+
+    def _export(self, batch: List[Span]):
+        if self.exporter == "otlp" and self.endpoint:
+            try:
+                request = urllib.request.Request(
+                    f"{self.endpoint}/v1/traces",
+                    data=json.dumps(_otlp_payload(batch)).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                urllib.request.urlopen(request, timeout=5).close()
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Trace collector unavailable ({e}); writing {len(batch)} spans to {self.path}")
+        self._write_jsonl(batch)
+
+    def _rotate(self):
+        """traces.jsonl -> traces.jsonl.1 -> ... up to TRACE_FILE_BACKUPS."""
+        if TRACE_FILE_BACKUPS <= 0:
+            os.remove(self.path)
+            return
+        for i in range(TRACE_FILE_BACKUPS - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _write_jsonl(self, batch: List[Span]):
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._lock:
+                if TRACE_FILE_MAX_BYTES > 0 and os.path.exists(self.path) \
+                        and os.path.getsize(self.path) >= TRACE_FILE_MAX_BYTES:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for s in batch:
+                        f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Could not write spans to {self.path}: {e}")
+
+
+TRACING_ENABLED = TRACE_EXPORTER != "none"
+_exporter = SpanExporter()
+
+
+def flush():
+    _exporter.flush()
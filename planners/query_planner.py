@@ -1,12 +1,14 @@
-import ollama
-from utils.common import extract_json
+from llm.structured import generate_structured
+from schemas import SearchQueryPlan
 
 def generate_search_queries(submodule_title: str, summary: str, course: str):
     system = """
-Return only JSON array:
-[
-  { "site": "string", "query": "string" }
-]
+Return only JSON:
+{
+  "queries": [
+    { "site": "string", "query": "string" }
+  ]
+}
 """
 
     user = f"""
@@ -24,9 +26,5 @@ Summary: {summary}
 Course: {course}
 """
 
-    raw = ollama.generate(
-        model="gemma2:2b",
-        prompt=system + user
-    )["response"]
-
-    return extract_json(raw)
+    parsed = generate_structured("query_planner", "query_planning", system, user, SearchQueryPlan)
+    return parsed["queries"]
@@ -2,7 +2,7 @@
 # schemas.py — ALIGNED WITH NEW NOTEBOOK STRUCTURE
 # ---------------------------------------------------------
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Literal, Optional, Union, Any
 from datetime import datetime
 
@@ -32,6 +32,10 @@ class LearningPathCreateRequest(BaseModel):
     goal: str
     preferred_learning_style: Literal["theory", "practical", "mixed"]
     time_availability: TimeAvailability
+    # "single_pass" plans outline and submodules in one streamed LLM call
+    planning_mode: Optional[Literal["staged", "single_pass"]] = None
+    # Time budget for this request; nodes degrade as it runs out
+    deadline_ms: Optional[int] = Field(None, gt=0)
 
 
 # ---------------------------------------------------------
@@ -77,6 +81,10 @@ class TopicContentGenerateRequest(BaseModel):
     course_name: str
     experience_level: Literal["beginner", "intermediate", "advanced"]
     submodules: List[Dict]
+    # Generate each submodule's mini quiz in the same request
+    include_quiz: bool = False
+    # Time budget for this request; nodes degrade as it runs out
+    deadline_ms: Optional[int] = Field(None, gt=0)
 
 
 # ---------------------------------------------------------
@@ -104,3 +112,137 @@ class LearningPathResponse(BaseModel):
     status: Literal["draft", "active", "archived"] = "draft"
     createdAt: str
     updatedAt: str
+
+
+class LearningPathUpdateRequest(BaseModel):
+    """An existing learning path plus the profile fields that changed."""
+    learning_path: LearningPathResponse
+    experience_level: Optional[Literal["beginner", "intermediate", "advanced"]] = None
+    custom_topics: Optional[List[str]] = None
+    goal: Optional[str] = None
+    preferred_learning_style: Optional[Literal["theory", "practical", "mixed"]] = None
+    time_availability: Optional[TimeAvailability] = None
+    # Time budget for this request; nodes degrade as it runs out
+    deadline_ms: Optional[int] = Field(None, gt=0)
+
+
+# ---------------------------------------------------------
+# MINI QUIZ BATCH
+# ---------------------------------------------------------
+class MiniQuizItem(BaseModel):
+    submodule_id: str
+    submodule_title: Optional[str] = None
+    cells: List[Dict]
+
+
+class MiniQuizBatchRequest(BaseModel):
+    items: List[MiniQuizItem] = Field(..., min_length=1)
+    # Time budget for the whole batch
+    deadline_ms: Optional[int] = Field(None, gt=0)
+
+
+class MiniQuizBatchResult(BaseModel):
+    submodule_id: str
+    quiz: List[Dict] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class MiniQuizBatchResponse(BaseModel):
+    results: List[MiniQuizBatchResult]
+    succeeded: int
+    failed: int
+
+
+
+# ---------------------------------------------------------
+# ARTIFACTS
+# ---------------------------------------------------------
+class ArtifactLookupRequest(BaseModel):
+    """A generation request body: is its artifact already stored?"""
+    kind: Literal["learning_path", "topic_content", "mini_quiz"]
+    payload: Dict[str, Any]
+
+
+
+# ---------------------------------------------------------
+# ADMIN
+# ---------------------------------------------------------
+class ProfilingSettingsUpdate(BaseModel):
+    auto_enabled: Optional[bool] = None
+    slow_threshold_ms: Optional[int] = Field(None, gt=0)
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+    max_per_minute: Optional[int] = Field(None, ge=0)
+
+
+
+# ---------------------------------------------------------
+# LLM OUTPUT SCHEMAS
+# ---------------------------------------------------------
+# Passed to Ollama as structured-output `format` (JSON schema) and used to
+# validate replies before they reach the graphs.
+class LLMTopic(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    id: str
+    name: str
+    order: int
+    submodules: List[Dict] = Field(default_factory=list)
+
+
+class TopicOutline(BaseModel):
+    topics: List[LLMTopic]
+
+
+class LearningPathOutline(BaseModel):
+    title: str
+    description: str
+    topics: List[LLMTopic]
+
+
+class LLMSubmodule(BaseModel):
+    title: str
+    summary: str = ""
+
+
+class SubmoduleOutline(BaseModel):
+    submodules: List[LLMSubmodule]
+
+
+class PlannedTopic(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    id: str
+    name: str
+    order: int
+    submodules: List[LLMSubmodule] = Field(default_factory=list)
+
+
+class LearningPathPlan(BaseModel):
+    """Single-pass plan: the outline with submodules per topic."""
+    title: str
+    description: str
+    topics: List[PlannedTopic]
+
+
+class MarkdownContent(BaseModel):
+    markdown: str = Field(..., min_length=1)
+
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    answer: Literal["A", "B", "C", "D"]
+    difficulty: Literal["easy", "medium", "hard"]
+
+
+class QuizOutput(BaseModel):
+    quiz: List[QuizQuestion]
+
+
+class SearchQuery(BaseModel):
+    site: str
+    query: str
+
+
+class SearchQueryPlan(BaseModel):
+    queries: List[SearchQuery]
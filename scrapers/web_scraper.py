@@ -1,11 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
 from utils.text_cleaner import clean_html, truncate
+from observability.tracing import traced
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0"
 }
 
+@traced("scrape_url", kind="client")
 def scrape_url(url: str):
     try:
         html = requests.get(url, headers=HEADERS, timeout=10).text
@@ -0,0 +1,163 @@
+# ---------------------------------------------------------
+# stores/artifacts.py — content-addressed store of generated artifacts
+# ---------------------------------------------------------
+# Learning paths, topic content (notebook cells) and mini quizzes are
+# stored once generated, keyed by a hash of
+#   - the artifact kind,
+#   - the generation inputs (only the fields that change the output;
+#     ids that merely label it are left out), and
+#   - the model version: the model tiers routed to the kind's LLM tasks.
+# A change of models (llm/model_routes.json) or of ARTIFACT_FORMAT gives
+# new keys, so stale artifacts are never served. Blobs are zlib-compressed JSON.
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.singleflight import canonical_key
+
+DB_PATH = os.getenv("ARTIFACT_DB", "stores/data/artifacts.sqlite3")
+
+# Bump when prompts or the artifact layout change in a way inputs don't show
+ARTIFACT_FORMAT = 1
+
+# kind -> LLM tasks (llm/model_routes.json) that produce it
+KIND_TASKS = {
+    "learning_path": ("topic_planning", "submodule_planning", "path_planning"),
+    "topic_content": ("content", "quiz", "query_planning"),
+    "mini_quiz": ("quiz",),
+}
+
+
+def model_version(kind: str) -> str:
+    """Models that may generate this kind of artifact, per task, best first."""
+    from llm.router import router
+
+    return ";".join(f"{task}={','.join(router.tiers(task))}" for task in KIND_TASKS[kind])
+
+
+def artifact_key(kind: str, inputs: Dict[str, Any]) -> str:
+    return canonical_key({
+        "kind": kind,
+        "format": ARTIFACT_FORMAT,
+        "model_version": model_version(kind),
+        "inputs": inputs,
+    })
+
+
+class ArtifactStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    inputs TEXT NOT NULL,
+                    blob BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    reads INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    last_read_at TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts (kind, created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """The stored artifact, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT blob FROM artifacts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE artifacts SET reads = reads + 1, last_read_at = ? WHERE key = ?",
+                (datetime.utcnow().isoformat(), key),
+            )
+            conn.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, kind: str, inputs: Dict[str, Any], artifact: Any, replace: bool = False):
+        """Store an artifact; replace=True overwrites one stored under the key."""
+        raw = json.dumps(artifact, ensure_ascii=False, default=str).encode("utf-8")
+        blob = zlib.compress(raw, 6)
+        with self._lock:
+            conn = self._connect()
+            # The same key always holds the same kind of output: keep the
+            # first, unless it is regenerated on purpose
+            conn.execute(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO artifacts "
+                "(key, kind, model_version, inputs, blob, size, stored_size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, model_version(kind), json.dumps(inputs, ensure_ascii=False, sort_keys=True),
+                 blob, len(raw), len(blob), datetime.utcnow().isoformat()),
+            )
+            conn.commit()
+
+    def describe(self, key: str) -> Optional[Dict[str, Any]]:
+        """Metadata of one artifact (no blob)."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT key, kind, model_version, inputs, size, stored_size, reads, created_at, last_read_at "
+                "FROM artifacts WHERE key = ?", (key,)
+            ).fetchone()
+        return self._meta(row) if row else None
+
+    def list(self, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = ("SELECT key, kind, model_version, inputs, size, stored_size, reads, created_at, last_read_at "
+                 "FROM artifacts")
+        params: tuple = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._connect().execute(query, params + (limit,)).fetchall()
+        return [self._meta(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT kind, COUNT(*), SUM(size), SUM(stored_size), SUM(reads) FROM artifacts GROUP BY kind"
+            ).fetchall()
+        return {
+            kind: {"artifacts": count, "bytes": size, "stored_bytes": stored, "reads": reads}
+            for kind, count, size, stored, reads in rows
+        }
+
+    @staticmethod
+    def _meta(row) -> Dict[str, Any]:
+        key, kind, version, inputs, size, stored_size, reads, created_at, last_read_at = row
+        return {
+            "key": key,
+            "kind": kind,
+            "model_version": version,
+            "inputs": json.loads(inputs),
+            "size": size,
+            "stored_size": stored_size,
+            "reads": reads,
+            "created_at": created_at,
+            "last_read_at": last_read_at,
+        }
+
+
+artifacts = ArtifactStore()
@@ -0,0 +1,89 @@
+# ---------------------------------------------------------
+# stores/question_bank.py — per-submodule question banks (SQLite)
+# ---------------------------------------------------------
+# A bank is a larger set of validated questions generated once per
+# submodule content. Banks are keyed by a hash of the markdown/code cells,
+# so a bank is regenerated only when that content changes.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DB_PATH = os.getenv("QUESTION_BANK_DB", "stores/data/question_bank.sqlite3")
+
+
+def content_hash(cells: List[Dict]) -> str:
+    """Hash of the cell content the quiz is generated from."""
+    relevant = [
+        {"type": c.get("type"), "content": c.get("content", "")}
+        for c in cells
+        if c.get("type") in ("markdown", "code")
+    ]
+    canonical = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class QuestionBankStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, list] = {}  # key -> [lock, waiters]
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS question_banks (
+                    content_hash TEXT PRIMARY KEY,
+                    questions TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT questions FROM question_banks WHERE content_hash = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, questions: List[Dict]):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO question_banks (content_hash, questions, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(questions, ensure_ascii=False), datetime.utcnow().isoformat()),
+            )
+            conn.commit()
+
+    @contextmanager
+    def build_lock(self, key: str):
+        """Serialize bank builds per content hash (no duplicate LLM work)."""
+        with self._lock:
+            entry = self._build_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._build_locks.pop(key, None)
+
+
+question_banks = QuestionBankStore()
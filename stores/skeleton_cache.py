@@ -0,0 +1,142 @@
+# ---------------------------------------------------------
+# stores/skeleton_cache.py — learning-path skeletons shared across learners
+# ---------------------------------------------------------
+# A skeleton is the LLM-planned part of a learning path: title,
+# description, ordered topics and their submodule titles. Learners of the
+# same course and experience level with a similar goal get the same
+# skeleton, personalized without an LLM call.
+#
+# Goals are matched by the overlap (Jaccard) of their normalized terms,
+# so "Become a backend developer with Django" and "I want to become a
+# Django backend developer" share a skeleton.
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+DB_PATH = os.getenv("SKELETON_CACHE_DB", "stores/data/skeleton_cache.sqlite3")
+
+# Min term overlap for two goals to count as the same
+MIN_SIMILARITY = float(os.getenv("SKELETON_MIN_SIMILARITY", "0.6"))
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "for", "with", "as",
+    "at", "by", "be", "become", "i", "my", "me", "want", "would", "like",
+    "learn", "learning", "able", "get", "into", "is", "am", "so", "that",
+    "using", "use", "how", "good", "skill", "skills", "career",
+}
+
+
+def goal_terms(goal: str) -> str:
+    """Normalized goal: sorted unique content words, space separated."""
+    words = set()
+    for w in re.findall(r"[a-z0-9+#]+", (goal or "").lower()):
+        if w in _STOPWORDS:
+            continue
+        if len(w) > 3 and w.endswith("s"):
+            w = w[:-1]
+        words.add(w)
+    return " ".join(sorted(words))
+
+
+def _similarity(a: str, b: str) -> float:
+    sa, sb = set(a.split()), set(b.split())
+    if not sa and not sb:
+        return 1.0
+    return len(sa & sb) / len(sa | sb)
+
+
+class SkeletonCache:
+    def __init__(self, path: str = DB_PATH, min_similarity: float = MIN_SIMILARITY):
+        self.path = path
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS skeletons (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    course TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    goal TEXT NOT NULL,
+                    goal_terms TEXT NOT NULL,
+                    skeleton TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_skeletons_course ON skeletons (course, level)")
+            # One skeleton per (course, level, goal terms): keep the newest of
+            # the duplicates older versions of put() could leave behind
+            conn.execute(
+                "DELETE FROM skeletons WHERE id NOT IN "
+                "(SELECT MAX(id) FROM skeletons GROUP BY course, level, goal_terms)"
+            )
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_skeletons_goal ON skeletons (course, level, goal_terms)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _course_key(course: str) -> str:
+        return " ".join((course or "").lower().split())
+
+    def get(self, course: str, level: str, goal: str, count_hit: bool = True) -> Optional[Dict]:
+        """Skeleton with the nearest goal for this course and level, if close enough."""
+        target = goal_terms(goal)
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT id, goal_terms, skeleton FROM skeletons WHERE course = ? AND level = ?",
+                (self._course_key(course), level),
+            ).fetchall()
+
+            best = None
+            for row_id, terms, skeleton in rows:
+                similarity = _similarity(target, terms)
+                if similarity >= self.min_similarity and (best is None or similarity > best[0]):
+                    best = (similarity, row_id, skeleton)
+
+            if best is None:
+                return None
+            if count_hit:
+                conn.execute("UPDATE skeletons SET hits = hits + 1 WHERE id = ?", (best[1],))
+                conn.commit()
+        return json.loads(best[2])
+
+    def put(self, course: str, level: str, goal: str, skeleton: Dict):
+        """Store the skeleton, replacing the one stored for the same goal terms."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO skeletons (course, level, goal, goal_terms, skeleton, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (course, level, goal_terms) DO UPDATE SET "
+                "goal = excluded.goal, skeleton = excluded.skeleton, created_at = excluded.created_at",
+                (
+                    self._course_key(course),
+                    level,
+                    goal or "",
+                    goal_terms(goal),
+                    json.dumps(skeleton, ensure_ascii=False),
+                    datetime.utcnow().isoformat(),
+                ),
+            )
+            conn.commit()
+
+
+skeleton_cache = SkeletonCache()
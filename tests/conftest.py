@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the service modules the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import start_fake_ollama  # noqa: E402
+
+
+def stop_fake_ollama(server):
+    """Stop serving and close the socket: new connections are refused."""
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_ollama():
+    """Factory for local fake Ollama servers, all stopped after the test."""
+    servers = []
+
+    def start(**config):
+        server, url = start_fake_ollama(**config)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        try:
+            stop_fake_ollama(server)
+        except OSError:
+            pass
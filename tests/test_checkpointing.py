@@ -0,0 +1,70 @@
+# Checkpointed runs (graphs/checkpointing.py): pruning of runs past their
+# TTL from the SQLite checkpointer.
+
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import StateGraph, END
+
+from graphs import checkpointing
+from graphs.checkpointing import invoke_resumable, prune_checkpoints, thread_id_for
+
+
+class CountState(TypedDict):
+    n: int
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    """A one-node resumable graph on a fresh checkpoint database."""
+    monkeypatch.setattr(checkpointing, "CHECKPOINT_DB", str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(checkpointing, "_checkpointer", None)
+    monkeypatch.setattr(checkpointing, "_last_prune", 0.0)
+
+    builder = StateGraph(CountState)
+    builder.add_node("inc", lambda state: {"n": state["n"] + 1})
+    builder.set_entry_point("inc")
+    builder.add_edge("inc", END)
+    return builder.compile(checkpointer=checkpointing.get_checkpointer())
+
+
+def thread_ids():
+    with checkpointing.get_checkpointer().cursor() as cur:
+        cur.execute("SELECT DISTINCT thread_id FROM checkpoints")
+        return {row[0] for row in cur.fetchall()}
+
+
+def backdate(thread_id: str, seconds: float):
+    with checkpointing.get_checkpointer().cursor() as cur:
+        cur.execute(
+            "UPDATE checkpoint_threads SET touched_at = touched_at - ? WHERE thread_id = ?",
+            (seconds, thread_id),
+        )
+
+
+def test_prunes_runs_past_the_ttl(graph):
+    old_id = thread_id_for("test", "old", {"n": 1})
+    new_id = thread_id_for("test", "new", {"n": 1})
+    invoke_resumable(graph, {"n": 1}, "old", "test")
+    invoke_resumable(graph, {"n": 1}, "new", "test")
+    assert thread_ids() == {old_id, new_id}
+
+    backdate(old_id, 7200)
+    assert prune_checkpoints(ttl_s=3600) == 1
+    assert thread_ids() == {new_id}
+
+    # The kept run still replays; the pruned one runs again from the start
+    _, report = invoke_resumable(graph, {"n": 1}, "new", "test")
+    assert report["resumed"]
+    result, report = invoke_resumable(graph, {"n": 1}, "old", "test")
+    assert not report["resumed"] and result["n"] == 2
+
+
+def test_replay_renews_the_ttl(graph):
+    thread_id = thread_id_for("test", "key", {"n": 1})
+    invoke_resumable(graph, {"n": 1}, "key", "test")
+    backdate(thread_id, 7200)
+
+    invoke_resumable(graph, {"n": 1}, "key", "test")
+    assert prune_checkpoints(ttl_s=3600) == 0
+    assert thread_ids() == {thread_id}
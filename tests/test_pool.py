@@ -0,0 +1,116 @@
+# Backend pool (llm/pool.py) against local fake Ollama servers:
+# model-aware routing, failover and hedged requests.
+
+import time
+
+import pytest
+
+from llm import pool as pool_module
+from llm.pool import Backend, BackendPool, BackendUnavailableError
+from tests.conftest import stop_fake_ollama
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def chat(pool: BackendPool, model: str = "qwen2.5:3b", **kwargs):
+    return pool.chat(model=model, messages=MESSAGES, **kwargs)
+
+
+def test_routes_to_the_backend_that_serves_the_model(fake_ollama):
+    small, small_url = fake_ollama(models=["gemma3:1b"])
+    large, large_url = fake_ollama(models=["qwen2.5:3b"])
+    pool = BackendPool([Backend(small_url, ["gemma3:1b"]), Backend(large_url, ["qwen2.5:3b"])])
+
+    for _ in range(5):
+        chat(pool, "qwen2.5:3b")
+    for _ in range(3):
+        chat(pool, "gemma3:1b")
+
+    assert large.config.requests == 5
+    assert small.config.requests == 3
+
+
+def test_unserved_model_is_rejected(fake_ollama):
+    _, url = fake_ollama()
+    pool = BackendPool([Backend(url, ["gemma3:1b"])])
+
+    with pytest.raises(BackendUnavailableError):
+        chat(pool, "qwen2.5:3b")
+
+
+def test_fails_over_when_a_host_dies_after_the_health_check(fake_ollama, monkeypatch):
+    doomed, doomed_url = fake_ollama()
+    survivor, survivor_url = fake_ollama()
+    pool = BackendPool([Backend(doomed_url), Backend(survivor_url)])
+    pool.check_health()
+    assert all(b.healthy for b in pool.backends)
+
+    stop_fake_ollama(doomed)
+    # The dead host is tried first for as long as it counts as healthy
+    monkeypatch.setattr(pool_module.random, "choice", lambda candidates: candidates[0])
+
+    calls = pool_module.MAX_FAILURES + 3
+    for _ in range(calls):
+        reply = chat(pool)
+        assert reply["message"]["content"]
+
+    dead = pool.backends[0]
+    assert survivor.config.requests == calls
+    # Out of rotation after MAX_FAILURES failed calls in a row, not tried since
+    assert not dead.healthy
+    assert dead.total_errors == pool_module.MAX_FAILURES
+
+
+def test_failover_also_skips_a_dead_host_for_streams(fake_ollama):
+    doomed, doomed_url = fake_ollama()
+    _, survivor_url = fake_ollama()
+    pool = BackendPool([Backend(doomed_url), Backend(survivor_url)])
+    stop_fake_ollama(doomed)
+
+    for _ in range(4):
+        chunks = list(pool.chat_stream(model="qwen2.5:3b", messages=MESSAGES))
+        assert chunks and chunks[-1].get("done")
+
+
+def test_hedged_request_returns_the_faster_answer(fake_ollama, monkeypatch):
+    slow, slow_url = fake_ollama(latency=0.01)
+    fast, fast_url = fake_ollama(latency=0.01)
+    pool = BackendPool([Backend(slow_url), Backend(fast_url)])
+
+    # Enough fast samples for a p95 to hedge at
+    for _ in range(pool_module.HEDGE_MIN_SAMPLES):
+        chat(pool)
+    assert pool.p95("qwen2.5:3b") < 0.5
+
+    # From now on the first backend stalls, and is always picked first
+    slow.config.latency = 2.0
+    monkeypatch.setattr(pool_module.random, "choice", lambda candidates: candidates[0])
+    slow_before, fast_before = slow.config.requests, fast.config.requests
+
+    start = time.perf_counter()
+    reply = chat(pool, hedge=True)
+    elapsed = time.perf_counter() - start
+
+    assert reply["message"]["content"]
+    assert elapsed < 1.0
+    assert slow.config.requests == slow_before + 1
+    assert fast.config.requests == fast_before + 1
+    assert pool.snapshot()["hedging"] == {"sent": 1, "won_by_hedge": 1}
+
+
+def test_no_hedge_when_the_primary_answers_within_p95(fake_ollama, monkeypatch):
+    _, first_url = fake_ollama(latency=0.01)
+    second, second_url = fake_ollama(latency=0.01)
+    pool = BackendPool([Backend(first_url), Backend(second_url)])
+    for _ in range(pool_module.HEDGE_MIN_SAMPLES):
+        chat(pool)
+
+    monkeypatch.setattr(pool_module.random, "choice", lambda candidates: candidates[0])
+    second_before = second.config.requests
+    # Slack over the p95 so a scheduling hiccup doesn't hedge
+    monkeypatch.setattr(pool, "p95", lambda model: 1.0)
+
+    chat(pool, hedge=True)
+
+    assert second.config.requests == second_before
+    assert pool.snapshot()["hedging"]["sent"] == 0
@@ -0,0 +1,193 @@
+# ---------------------------------------------------------
+# utils/admission.py — admission control for LLM-bound endpoints
+# ---------------------------------------------------------
+# Each endpoint group runs at most `limit` requests at once. Requests
+# over the limit wait in a bounded FIFO queue. A full queue is rejected
+# at once with 429, and a request that waited `queue_timeout_s` without
+# getting a slot gets 503. Both carry Retry-After. Shedding early keeps
+# the accepted requests within their SLO; otherwise every request piles
+# onto Ollama and all of them slow down together.
+#
+# The limit adapts (AIMD) to the service time of finished requests. That
+# time is almost entirely LLM calls, and it excludes the queue wait:
+#   - slower than the SLO: limit *= DECREASE_FACTOR, at most once per
+#     `cooldown_s`, so one burst of slow requests counts once
+#   - within the SLO and the limit was in use: limit += 1 / limit, i.e.
+#     about +1 per `limit` requests that finish in time
+# The limit stays within [min_limit, max_limit].
+
+import asyncio
+import collections
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("cognigen-ai-service")
+
+DECREASE_FACTOR = 0.75
+
+# group -> (initial limit, max limit, SLO seconds)
+DEFAULT_GROUPS = {
+    "learning_path": (4, 16, 60.0),
+    "topic_content": (4, 16, 120.0),
+    "mini_quiz": (8, 32, 45.0),
+}
+
+
+class Rejected(Exception):
+    """Request not admitted; `status` is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, status: int, reason: str, retry_after_s: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    def __init__(self, name: str, limit: int, max_limit: int, slo_s: float,
+                 min_limit: int = 1, max_queue: int = 16, queue_timeout_s: float = 5.0,
+                 cooldown_s: Optional[float] = None):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slo_s = slo_s
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.cooldown_s = slo_s if cooldown_s is None else cooldown_s
+
+        self.in_flight = 0
+        self._waiters: collections.deque = collections.deque()
+        self._last_decrease = 0.0
+        # Moving average of the service time, for Retry-After
+        self._avg_service_s = slo_s / 2
+
+        self.admitted = 0
+        self.rejected = collections.Counter()
+        self.slo_misses = 0
+
+    # ---------------- admission ----------------
+    def _has_slot(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead should have drained, 1 to 60."""
+        rounds = (len(self._waiters) + 1) / max(1, int(self.limit))
+        return max(1, min(60, math.ceil(rounds * self._avg_service_s)))
+
+    async def _acquire(self):
+        if self._has_slot() and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise Rejected(429, "queue_full", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The slot is handed over by _release (in_flight already counted)
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return  # handed a slot just as the wait ran out
+            self._waiters.remove(waiter)
+            self.rejected["queue_timeout"] += 1
+            raise Rejected(503, "queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # Client gone: give back a slot that was handed over meanwhile
+            if waiter.done():
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        while self._waiters and self._has_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one slot for the block; raises Rejected when shedding."""
+        await self._acquire()
+        self.admitted += 1
+        saturated = self.in_flight >= int(self.limit)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._adapt(time.monotonic() - start, saturated)
+            self._release()
+
+    # ---------------- adaptation ----------------
+    def _adapt(self, service_s: float, saturated: bool):
+        self._avg_service_s += 0.2 * (service_s - self._avg_service_s)
+
+        if service_s > self.slo_s:
+            self.slo_misses += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_s:
+                self._last_decrease = now
+                old = int(self.limit)
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                if int(self.limit) != old:
+                    logger.warning(
+                        f"🚦 [{self.name}] {service_s:.1f}s over the {self.slo_s:.0f}s SLO: "
+                        f"limit {old} -> {int(self.limit)}"
+                    )
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "slo_s": self.slo_s,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "avg_service_s": round(self._avg_service_s, 3),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "slo_misses": self.slo_misses,
+        }
+
+
+def _group_overrides(env: str) -> Dict[str, float]:
+    """`name=value,name=value` from an env var."""
+    overrides = {}
+    for part in os.getenv(env, "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            overrides[name.strip()] = float(value)
+    return overrides
+
+
+def build_controllers() -> Dict[str, AdmissionController]:
+    """
+    One controller per endpoint group. Initial limits and SLOs can be set
+    per group: ADMISSION_LIMITS=mini_quiz=12 ADMISSION_SLO_S=topic_content=90
+    """
+    limits = _group_overrides("ADMISSION_LIMITS")
+    slos = _group_overrides("ADMISSION_SLO_S")
+    max_queue = int(os.getenv("ADMISSION_QUEUE_SIZE", "16"))
+    queue_timeout_s = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "5"))
+
+    controllers = {}
+    for name, (limit, max_limit, slo_s) in DEFAULT_GROUPS.items():
+        limit = int(limits.get(name, limit))
+        controllers[name] = AdmissionController(
+            name, limit, max(limit, max_limit), slos.get(name, slo_s),
+            max_queue=max_queue, queue_timeout_s=queue_timeout_s,
+        )
+    return controllers
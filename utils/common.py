@@ -1,10 +1,15 @@
 
 import json
-import re
 import uuid
 from typing import List, Dict
 from datetime import datetime
 
+from utils.json_scanner import scan_json_spans, loads_lenient
+
+# When no top-level block parses (e.g. a stray "{" in prose swallowed the
+# real JSON), fall back to this many of the largest nested blocks.
+MAX_NESTED_CANDIDATES = 8
+
 
 # ---------------------------------------------------------
 # SAFE JSON EXTRACTION (Production Stable)
@@ -16,41 +21,48 @@ def extract_json(text: str):
     Handles:
     - Markdown fences
     - Embedded ```python blocks
-    - Noise before/after JSON
-    - Trailing commas
+    - Noise before/after JSON (including braces in prose/code)
+    - Trailing commas, comments, Python literals, bad escapes
+    - Truncated output
     - Array wrapping
+
+    Runs in linear time: one scan over the text, then each candidate
+    block is parsed at most twice (strict, then repaired).
     """
 
     raw_text = text.strip()
 
-    # Remove markdown fences only (do NOT remove backticks inside content)
-    cleaned = raw_text.replace("```json", "").replace("```", "").strip()
-
     # -------------------------------
     # 1️⃣ Direct JSON parse (fast path)
     # -------------------------------
     try:
-        parsed = json.loads(cleaned)
-        return parsed
-    except:
+        return json.loads(raw_text)
+    except ValueError:
         pass
 
     # -------------------------------
-    # 2️⃣ Extract biggest JSON block
+    # 2️⃣ Balanced-bracket scan
     # -------------------------------
-    blocks = re.findall(r"\{[\s\S]*\}|\[[\s\S]*\]", cleaned)
-
-    if blocks:
-        largest = max(blocks, key=len)
-
-        # Remove trailing commas
-        largest = re.sub(r",(\s*[}\]])", r"\1", largest)
+    # Fences and prose are skipped by the scanner itself, so backticks
+    # inside JSON string values are preserved.
+    spans = scan_json_spans(raw_text, max_depth=1)
+
+    top_level = sorted(
+        (s for s in spans if s.depth == 0),
+        key=lambda s: s.end - s.start,
+        reverse=True
+    )
+    nested = sorted(
+        (s for s in spans if s.depth == 1),
+        key=lambda s: s.end - s.start,
+        reverse=True
+    )
 
+    for span in top_level + nested[:MAX_NESTED_CANDIDATES]:
         try:
-            parsed = json.loads(largest)
-            return parsed
-        except:
-            pass
+            return loads_lenient(raw_text[span.start:span.end])
+        except ValueError:
+            continue
 
     # -------------------------------
     # 3️⃣ Final fallback
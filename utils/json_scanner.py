@@ -0,0 +1,441 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+
+# ---------------------------------------------------------
+# SINGLE-PASS JSON SCANNER (string + escape aware)
+# ---------------------------------------------------------
+# LLM replies wrap JSON in prose, markdown fences and code samples that
+# are full of braces. Instead of regex backtracking we walk the text once,
+# tracking string/escape state and a bracket stack, and record where each
+# balanced container starts and ends.
+
+_OPENERS = {"{": "}", "[": "]"}
+_CLOSERS = {"}": "{", "]": "["}
+
+# The scanner jumps between structural characters with these (single
+# character classes, so the regex engine never backtracks).
+_OPENER_RE = re.compile(r"[{\[]")
+_STRUCTURAL_RE = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+
+
+class Span:
+    """A container found by the scanner: text[start:end] at a given depth."""
+
+    __slots__ = ("start", "end", "depth", "closed")
+
+    def __init__(self, start: int, end: int, depth: int, closed: bool):
+        self.start = start
+        self.end = end
+        self.depth = depth
+        self.closed = closed
+
+    def __repr__(self):
+        state = "closed" if self.closed else "open"
+        return f"Span({self.start}, {self.end}, depth={self.depth}, {state})"
+
+
+def _skip_string(text: str, pos: int) -> Tuple[int, bool, bool]:
+    """
+    Advance past the body of a string starting at pos.
+    Returns (new_pos, still_in_string, pending_escape).
+    """
+    n = len(text)
+    while True:
+        m = _STRING_SPECIAL_RE.search(text, pos)
+        if m is None:
+            return n, True, False
+        if m.group() == "\\":
+            if m.end() >= n:
+                return n, True, True
+            pos = m.end() + 1
+            continue
+        return m.end(), False, False
+
+
+def _pop_to(stack: List[Tuple[str, int]], closer: str) -> Optional[int]:
+    """
+    Pop the container matching closer and return its start offset.
+
+    A mismatched closer auto-closes inner containers when the matching
+    opener is further down the stack; otherwise it is ignored (None).
+    """
+    opener = _CLOSERS[closer]
+    if stack[-1][0] != opener:
+        if not any(o == opener for o, _ in stack):
+            return None
+        while stack[-1][0] != opener:
+            stack.pop()
+    return stack.pop()[1]
+
+
+def scan_json_spans(text: str, max_depth: int = 1) -> List[Span]:
+    """
+    Scan text once and return container spans up to max_depth.
+
+    Top-level spans (depth 0) never overlap. A top-level container that is
+    still open at the end of the text (truncated output) is returned with
+    closed=False so the caller can try to repair it.
+    """
+
+    spans: List[Span] = []
+    stack: List[Tuple[str, int]] = []
+    pos = 0
+
+    while True:
+        if not stack:
+            # Outside JSON: quotes in prose must not swallow the next brace
+            m = _OPENER_RE.search(text, pos)
+        else:
+            m = _STRUCTURAL_RE.search(text, pos)
+        if m is None:
+            break
+
+        ch = m.group()
+        i = m.start()
+        pos = m.end()
+
+        if ch == '"':
+            pos, _, _ = _skip_string(text, pos)
+        elif ch in _OPENERS:
+            stack.append((ch, i))
+        else:
+            start = _pop_to(stack, ch)
+            if start is None:
+                continue
+            depth = len(stack)
+            if depth <= max_depth:
+                spans.append(Span(start, i + 1, depth, True))
+
+    if stack:
+        spans.append(Span(stack[0][1], len(text), 0, False))
+
+    return spans
+
+
+# ---------------------------------------------------------
+# REPAIR PARSER
+# ---------------------------------------------------------
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_DQ_SPECIAL_RE = re.compile(r'["\\]')
+_SQ_SPECIAL_RE = re.compile(r"['\"\\]")
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite common LLM JSON mistakes in a single pass.
+
+    Handles:
+    - Trailing commas before } or ]
+    - // and /* */ comments
+    - Python literals (True / False / None)
+    - Single-quoted strings
+    - Invalid escapes such as \\d or \\_ inside strings
+    - Truncated output (closes open strings and containers)
+    """
+
+    out: List[str] = []
+    stack: List[str] = []
+    quote: Optional[str] = None
+    i = 0
+    n = len(text)
+
+    while i < n:
+        # ---------------- inside a string ----------------
+        if quote is not None:
+            special = _DQ_SPECIAL_RE if quote == '"' else _SQ_SPECIAL_RE
+            m = special.search(text, i)
+            if m is None:
+                out.append(text[i:])
+                break
+            out.append(text[i:m.start()])
+            ch = m.group()
+            i = m.end()
+
+            if ch == "\\":
+                if i >= n:
+                    break  # dangling backslash at the cut-off point
+                nxt = text[i]
+                i += 1
+                if nxt in _VALID_ESCAPES:
+                    out.append("\\" + nxt)
+                elif nxt == "'":
+                    out.append("'")
+                else:
+                    out.append("\\\\" + nxt)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            else:
+                # Double quote inside a single-quoted string
+                out.append('\\"')
+            continue
+
+        ch = text[i]
+
+        # ---------------- structural text ----------------
+        if ch == '"' or ch == "'":
+            quote = ch
+            out.append('"')
+        elif ch in _OPENERS:
+            stack.append(_OPENERS[ch])
+            out.append(ch)
+        elif ch in _CLOSERS:
+            if ch not in stack:
+                # Stray closer with nothing to close
+                i += 1
+                continue
+            # Close any inner containers the model forgot about
+            while stack[-1] != ch:
+                _strip_trailing_comma(out)
+                out.append(stack.pop())
+            _strip_trailing_comma(out)
+            stack.pop()
+            out.append(ch)
+        elif ch == "/" and i + 1 < n and text[i + 1] == "/":
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif ch == "/" and i + 1 < n and text[i + 1] == "*":
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # ---------------- truncated output ----------------
+    if quote is not None:
+        out.append('"')
+
+    repaired = "".join(out)
+    if stack:
+        repaired = _strip_dangling(repaired.rstrip())
+        while stack:
+            repaired = repaired.rstrip().rstrip(",") + stack.pop()
+
+    return repaired
+
+
+def _strip_trailing_comma(out: List[str]):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def _last_string_start(text: str) -> int:
+    """Index of the opening quote of the string that ends text."""
+    k = len(text) - 2
+    while k >= 0:
+        if text[k] == '"':
+            slashes = 0
+            while k - 1 - slashes >= 0 and text[k - 1 - slashes] == "\\":
+                slashes += 1
+            if slashes % 2 == 0:
+                return k
+        k -= 1
+    return -1
+
+
+def _strip_dangling(text: str) -> str:
+    """Drop a half-written `"key"` or `"key":` left behind by truncation."""
+    if text.endswith(":"):
+        text = text[:-1].rstrip()
+        k = _last_string_start(text) if text.endswith('"') else -1
+        return text[:k] if k >= 0 else text
+
+    if text.endswith('"'):
+        k = _last_string_start(text)
+        before = text[:k].rstrip() if k >= 0 else ""
+        if before.endswith("{") or (before.endswith(",") and _inside_object(before)):
+            return before
+
+    return text
+
+
+def _inside_object(text: str) -> bool:
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _OPENERS:
+            stack.append(ch)
+        elif ch in _CLOSERS and stack:
+            stack.pop()
+    return bool(stack) and stack[-1] == "{"
+
+
+def loads_lenient(text: str) -> Any:
+    """json.loads that tolerates raw control characters, then repairs."""
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return json.loads(repair_json(text), strict=False)
+
+
+# ---------------------------------------------------------
+# INCREMENTAL MODE (streamed token chunks)
+# ---------------------------------------------------------
+class JSONStreamScanner:
+    """
+    Feed streamed LLM chunks and get the first complete JSON value back as
+    soon as its closing bracket arrives.
+
+        scanner = JSONStreamScanner()
+        for chunk in stream:
+            obj = scanner.feed(chunk)
+            if obj is not None:
+                break
+
+    With item_depth set, containers that close at that depth inside the
+    first value are collected as well (e.g. item_depth=2 yields each topic
+    of {"topics": [...]} while later topics are still streaming).
+    """
+
+    def __init__(self, item_depth: Optional[int] = None):
+        self.item_depth = item_depth
+        self.result: Any = None
+        self.done = False
+
+        # Text of the current candidate value, kept as chunks; offsets in
+        # _stack are relative to the start of the candidate.
+        self._parts: List[str] = []
+        self._length = 0
+        self._stack: List[Tuple[str, int]] = []
+        self._in_string = False
+        self._escape = False
+        self._items: List[Any] = []
+
+    def _text(self, start: int = 0) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0][start:] if self._parts else ""
+
+    def feed(self, chunk: str) -> Any:
+        if self.done or not chunk:
+            return None
+
+        pos = 0
+        n = len(chunk)
+
+        if not self._stack:
+            # Outside JSON: discard prose, wait for an opener
+            m = _OPENER_RE.search(chunk)
+            if m is None:
+                return None
+            chunk = chunk[m.start():]
+            n = len(chunk)
+            self._parts = []
+            self._length = 0
+
+        base = self._length
+        self._parts.append(chunk)
+        self._length += n
+
+        while pos < n:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                pos, self._in_string, self._escape = _skip_string(chunk, pos)
+                continue
+
+            if not self._stack:
+                m = _OPENER_RE.search(chunk, pos)
+            else:
+                m = _STRUCTURAL_RE.search(chunk, pos)
+            if m is None:
+                break
+
+            ch = m.group()
+            i = base + m.start()
+            pos = m.end()
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in _OPENERS:
+                if not self._stack:
+                    # New candidate after a failed one: drop the prose
+                    # before it so offsets stay relative to the candidate.
+                    rest = chunk[m.start():]
+                    self._parts = [rest]
+                    self._length = len(rest)
+                    base = -m.start()
+                    i = 0
+                self._stack.append((ch, i))
+            else:
+                start = _pop_to(self._stack, ch)
+                if start is None:
+                    continue
+                depth = len(self._stack)
+                end = base + pos
+
+                if depth == self.item_depth:
+                    try:
+                        self._items.append(loads_lenient(self._text()[start:end]))
+                    except ValueError:
+                        pass
+
+                if depth == 0:
+                    try:
+                        self.result = loads_lenient(self._text()[:end])
+                    except ValueError:
+                        # Not JSON after all (e.g. `{x}` in prose) — keep going
+                        self._items = []
+                        continue
+                    self.done = True
+                    return self.result
+
+        return None
+
+    def pop_items(self) -> List[Any]:
+        """Return (and clear) containers completed at item_depth so far."""
+        items, self._items = self._items, []
+        return items
+
+    def finish(self) -> Any:
+        """End of stream: repair and return a truncated value, if any."""
+        if self.done:
+            return self.result
+        if not self._stack:
+            return None
+
+        text = self._text(self._stack[0][1])
+        # Whole (repaired) value first, then the blocks nested inside it in
+        # case the opener was a stray brace in prose.
+        nested = sorted(
+            (s for s in scan_json_spans(text, max_depth=1) if s.depth == 1),
+            key=lambda s: s.end - s.start,
+            reverse=True
+        )
+        for start, end in [(0, len(text))] + [(s.start, s.end) for s in nested]:
+            try:
+                self.result = loads_lenient(text[start:end])
+            except ValueError:
+                continue
+            self.done = True
+            break
+        return self.result
@@ -0,0 +1,62 @@
+# ---------------------------------------------------------
+# utils/singleflight.py — coalesce identical in-flight requests
+# ---------------------------------------------------------
+# When many learners open the same course at once, identical generation
+# requests arrive together. The first caller for a key runs the work;
+# callers arriving while it is in flight wait for the same result instead
+# of starting their own run. Nothing is cached once the run finishes.
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger("cognigen-ai-service")
+
+
+def canonical_key(obj: Any) -> str:
+    """Stable hash of a JSON-like value (key order does not matter)."""
+    canonical = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `fn` once per key at a time. Returns (result, coalesced). The
+        result object is shared between callers: copy before mutating.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.info(f"🔗 [{self.name}] Joined in-flight run {key[:12]}")
+            return await asyncio.shield(task), True
+
+        self.executions += 1
+        # A separate task: the leader's client disconnecting must not
+        # cancel the run the other callers are waiting on
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), False
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
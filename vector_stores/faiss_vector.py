@@ -1,24 +1,39 @@
-import faiss
 import numpy as np
 import json
 import os
+import threading
+
+from observability.metrics import VECTOR_SEARCH_SECONDS
+from observability.tracing import traced
 
 # Paths to index + metadata
 INDEX_PATH = "vector_stores/python.index"
 META_PATH = "vector_stores/python_metadata.json"
 
-# Load index
-if os.path.exists(INDEX_PATH):
-    index = faiss.read_index(INDEX_PATH)
-else:
-    index = None
+# Loaded on first search (or by the startup warm-up), not at import:
+# importing faiss and reading the index would delay every worker start
+index = None
+metadata = []
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def load_index():
+    """Read the FAISS index and its metadata (titles, urls, descriptions) once."""
+    global index, metadata, _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        if os.path.exists(INDEX_PATH):
+            import faiss
+            index = faiss.read_index(INDEX_PATH)
 
-# Load metadata that stores titles, urls, descriptions
-if os.path.exists(META_PATH):
-    with open(META_PATH, "r") as f:
-        metadata = json.load(f)
-else:
-    metadata = []
+        if os.path.exists(META_PATH):
+            with open(META_PATH, "r") as f:
+                metadata = json.load(f)
+        _loaded = True
 
 
 def embed(text: str) -> np.ndarray:
@@ -28,15 +43,18 @@ def embed(text: str) -> np.ndarray:
     return vec / np.linalg.norm(vec)
 
 
+@traced("vector_search")
 def vector_search(query: str, k: int = 5):
     """Search in FAISS index and return top resources."""
+    load_index()
     if index is None or len(metadata) == 0:
         return []
 
-    q_vec = embed(query)
-    q_vec = np.expand_dims(q_vec, axis=0)
+    with VECTOR_SEARCH_SECONDS.time():
+        q_vec = embed(query)
+        q_vec = np.expand_dims(q_vec, axis=0)
 
-    scores, indices = index.search(q_vec, k)
+        scores, indices = index.search(q_vec, k)
     results = []
 
     for i in indices[0]: